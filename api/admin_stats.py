@@ -0,0 +1,121 @@
+"""
+Snapshot des statistiques globales Super Admin (/internal/admin/stats).
+
+Les compteurs globaux (guilds, utilisateurs, tickets du jour, commandes,
+revenus, abonnements) etaient recalcules a chaque affichage du panel. Ils sont
+maintenant calcules en une requete (GlobalStatsModel.snapshot) et gardes en
+memoire :
+
+- une tache de fond (lifespan de l'API) les rafraichit toutes les
+  ADMIN_STATS_REFRESH_SECONDS ;
+- si le snapshot est plus vieux que cette fraicheur (tache arretee, DB
+  indisponible), la requete suivante le recalcule ; un seul recalcul a la
+  fois, les autres requetes servent l'ancienne valeur pendant ce temps ;
+- en cas d'erreur DB, l'ancienne valeur reste servie (son age l'indique).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+from loguru import logger
+
+from bot.config import ADMIN_STATS_REFRESH_SECONDS
+from bot.db.models import GlobalStatsModel
+
+
+def _refresh_seconds() -> float:
+    try:
+        return max(5.0, float(os.getenv("ADMIN_STATS_REFRESH_SECONDS", ADMIN_STATS_REFRESH_SECONDS)))
+    except ValueError:
+        return float(ADMIN_STATS_REFRESH_SECONDS)
+
+
+class GlobalStatsSnapshot:
+    def __init__(self, max_age: float | None = None):
+        self.max_age = max_age if max_age is not None else _refresh_seconds()
+        self._lock = threading.Lock()
+        self._data: dict | None = None
+        self._computed_at = 0.0           # time.monotonic()
+        self._generated_at: str | None = None
+        self._duration_ms = 0.0
+        self._task: asyncio.Task | None = None
+
+    def _is_fresh(self) -> bool:
+        return self._data is not None and time.monotonic() - self._computed_at < self.max_age
+
+    def refresh(self, wait: bool = True) -> bool:
+        """
+        Recalcule le snapshot. Avec wait=False, ne fait rien si un recalcul est
+        deja en cours. Leve l'exception DB si aucun snapshot n'existe encore.
+        """
+        if not self._lock.acquire(blocking=wait):
+            return False
+        try:
+            started = time.monotonic()
+            try:
+                data = GlobalStatsModel.snapshot()
+            except Exception as e:
+                if self._data is None:
+                    raise
+                logger.warning(f"⚠ Stats globales non rafraichies: {e}")
+                return False
+            self._data = data
+            self._computed_at = time.monotonic()
+            self._generated_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+            self._duration_ms = round((self._computed_at - started) * 1000, 1)
+            return True
+        finally:
+            self._lock.release()
+
+    def get(self, force: bool = False) -> dict:
+        """Snapshot en memoire + metadonnees (generated_at, age_sec, refresh_sec)."""
+        if force:
+            self.refresh()
+        elif self._data is None:
+            # Premier appel : on attend le calcul en cours s'il y en a un.
+            with self._lock:
+                pass
+            if self._data is None:
+                self.refresh()
+        elif not self._is_fresh():
+            self.refresh(wait=False)
+
+        return {
+            **self._data,
+            "generated_at": self._generated_at,
+            "age_sec": round(time.monotonic() - self._computed_at, 1),
+            "refresh_sec": self.max_age,
+            "compute_ms": self._duration_ms,
+        }
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self.refresh, False)
+            except Exception as e:
+                logger.warning(f"⚠ Stats globales: {e}")
+            # Un peu avant l'echeance : les requetes ne tombent pas sur un snapshot perime
+            await asyncio.sleep(self.max_age * 0.9)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"✓ Stats globales rafraichies toutes les {self.max_age:g}s")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+global_stats = GlobalStatsSnapshot()
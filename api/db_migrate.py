@@ -152,7 +152,7 @@ def _column_info(table_name: str, column_name: str) -> dict | None:
         cursor = conn.cursor(dictionary=True)
         cursor.execute(
             """
-            SELECT column_name, data_type, character_maximum_length
+            SELECT column_name, data_type, character_maximum_length, column_type AS column_type
             FROM information_schema.columns
             WHERE table_schema = DATABASE()
               AND table_name = %s
@@ -179,6 +179,37 @@ def _table_exists(table_name: str) -> bool:
         return cursor.fetchone() is not None
 
 
+def _index_exists(table_name: str, index_name: str) -> bool:
+    with get_db_context() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            """
+            SELECT 1
+            FROM information_schema.statistics
+            WHERE table_schema = DATABASE()
+              AND table_name = %s
+              AND index_name = %s
+            LIMIT 1
+            """,
+            (table_name, index_name),
+        )
+        return cursor.fetchone() is not None
+
+
+def _ensure_index(table_name: str, index_name: str, columns: str) -> None:
+    """Cree l'index s'il manque (best-effort)."""
+    if _index_exists(table_name, index_name):
+        return
+    with get_db_context() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"ALTER TABLE {table_name} ADD KEY {index_name} ({columns})")
+            logger.info(f"[db] Index {index_name} ajoute a {table_name}")
+        except Exception as e:
+            if "duplicate key name" not in str(e).lower():
+                logger.warning(f"[db] ALTER {table_name} ADD KEY {index_name}: {e}")
+
+
 def _ensure_dashboard_sessions_migrations() -> None:
     table = f"{DB_TABLE_PREFIX}dashboard_sessions"
     if not _table_exists(table):
@@ -202,6 +233,31 @@ def _ensure_dashboard_sessions_migrations() -> None:
                 f"COMMENT 'Liste des guild_ids autorises (owner/admin) au login'"
             )
 
+    # Indexed SHA-256 of the JWT: session lookups no longer scan the TEXT column.
+    if _column_info(table, "jwt_token_hash") is None:
+        with get_db_context() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(
+                    f"ALTER TABLE {table} "
+                    f"ADD COLUMN jwt_token_hash CHAR(64) NULL "
+                    f"COMMENT 'SHA-256 hex du JWT (recherche indexee)'"
+                )
+                logger.info(f"[db] Colonne jwt_token_hash ajoutee a {table}")
+            except Exception as e:
+                if "duplicate column" not in str(e).lower():
+                    logger.warning(f"[db] ALTER {table}.jwt_token_hash: {e}")
+    if _column_info(table, "jwt_token_hash") is not None:
+        with get_db_context() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"UPDATE {table} SET jwt_token_hash = SHA2(jwt_token, 256) "
+                f"WHERE jwt_token_hash IS NULL AND jwt_token IS NOT NULL"
+            )
+            if cursor.rowcount:
+                logger.info(f"[db] {cursor.rowcount} session(s) : jwt_token_hash calcule")
+        _ensure_index(table, "idx_jwt_hash", "jwt_token_hash")
+
     # Ensure jwt_token is TEXT (older init.sql used VARCHAR(500)).
     info = _column_info(table, "jwt_token")
     if info and (info.get("data_type") or "").lower() in {"varchar", "char"}:
@@ -318,6 +374,39 @@ def _ensure_ticket_migrations() -> None:
                     if "duplicate column" not in str(e).lower():
                         logger.warning(f"[db] ALTER {tickets_table}.priority: {e}")
 
+        # Sujet du ticket (select d'ouverture), utilise par le triage local.
+        if _column_info(tickets_table, "topic") is None:
+            with get_db_context() as conn:
+                cursor = conn.cursor()
+                try:
+                    cursor.execute(
+                        f"ALTER TABLE {tickets_table} "
+                        f"ADD COLUMN topic VARCHAR(100) NULL "
+                        f"COMMENT 'Sujet choisi a louverture (TicketOpenSelect)'"
+                    )
+                    logger.info(f"[db] Colonne topic ajoutee a {tickets_table}")
+                except Exception as e:
+                    if "duplicate column" not in str(e).lower():
+                        logger.warning(f"[db] ALTER {tickets_table}.topic: {e}")
+
+        # Résumé glissant maintenu pendant que le ticket est ouvert.
+        rolling_columns = {
+            "rolling_summary":            "TEXT NULL COMMENT 'Resume IA glissant (ticket ouvert)'",
+            "rolling_summary_language":   "VARCHAR(10) NULL",
+            "rolling_summary_message_id": "INT NULL COMMENT 'Dernier vai_ticket_messages.id couvert'",
+            "rolling_summary_at":         "TIMESTAMP NULL",
+        }
+        for col_name, col_def in rolling_columns.items():
+            if _column_info(tickets_table, col_name) is None:
+                with get_db_context() as conn:
+                    cursor = conn.cursor()
+                    try:
+                        cursor.execute(f"ALTER TABLE {tickets_table} ADD COLUMN {col_name} {col_def}")
+                        logger.info(f"[db] Colonne {col_name} ajoutee a {tickets_table}")
+                    except Exception as e:
+                        if "duplicate column" not in str(e).lower():
+                            logger.warning(f"[db] ALTER {tickets_table}.{col_name}: {e}")
+
     msgs_table = f"{DB_TABLE_PREFIX}ticket_messages"
     if _table_exists(msgs_table):
         if _column_info(msgs_table, "author_username") is None:
@@ -397,6 +486,9 @@ def _ensure_guild_v04_migrations() -> None:
         "ticket_open_needs_deploy":    "TINYINT(1) DEFAULT 0 COMMENT '1 = bot doit (re)deployer le message ouverture'",
         "ticket_open_last_deploy_error": "TEXT NULL COMMENT 'Derniere erreur de deploiement (debug)'",
         "ticket_open_delete_requested":  "TINYINT(1) DEFAULT 0 COMMENT '1 = bot doit supprimer le message ouverture'",
+        # Cache de config du bot
+        "config_version":              "BIGINT UNSIGNED NOT NULL DEFAULT 0 COMMENT 'Timestamp ms de la derniere ecriture (cache config du bot)'",
+        "kb_version":                  "BIGINT UNSIGNED NOT NULL DEFAULT 0 COMMENT 'Timestamp ms de la derniere ecriture KB (index KB du bot)'",
     }
 
     for col_name, col_def in new_columns.items():
@@ -410,6 +502,10 @@ def _ensure_guild_v04_migrations() -> None:
                     if "duplicate column" not in str(e).lower():
                         logger.warning(f"[db] ALTER {table}.{col_name}: {e}")
 
+    _ensure_index(table, "idx_config_version", "config_version")
+    _ensure_index(table, "idx_ticket_open_deploy", "ticket_open_needs_deploy")
+    _ensure_index(table, "idx_ticket_open_delete", "ticket_open_delete_requested")
+
 
 def _ensure_knowledge_base_migrations() -> None:
     """Ajoute les colonnes KB manquantes (schema drift)."""
@@ -431,6 +527,116 @@ def _ensure_knowledge_base_migrations() -> None:
                     logger.warning(f"[db] ALTER {table}.is_active: {e}")
 
 
+def _ensure_jobs_migrations() -> None:
+    """File de taches : priorites, dedupe, dead-letter et horodatage a la milliseconde."""
+    table = f"{DB_TABLE_PREFIX}jobs"
+    if not _table_exists(table):
+        return
+
+    new_columns = {
+        "priority":   "SMALLINT NOT NULL DEFAULT 0 COMMENT 'Plus grand = reclamee en premier'",
+        "dedupe_key": "VARCHAR(191) NULL COMMENT 'Une seule tache en attente par cle (videe au claim)'",
+        "heartbeat_at": "TIMESTAMP(3) NULL COMMENT 'Dernier signe de vie du worker (verrou)'",
+    }
+    for col_name, col_def in new_columns.items():
+        if _column_info(table, col_name) is None:
+            with get_db_context() as conn:
+                cursor = conn.cursor()
+                try:
+                    cursor.execute(f"ALTER TABLE {table} ADD COLUMN {col_name} {col_def}")
+                    logger.info(f"[db] Colonne {col_name} ajoutee a {table}")
+                except Exception as e:
+                    if "duplicate column" not in str(e).lower():
+                        logger.warning(f"[db] ALTER {table}.{col_name}: {e}")
+
+    # 'failed' -> 'dead' : elargir l'ENUM, migrer les lignes, puis retirer 'failed'.
+    info = _column_info(table, "status")
+    if info and "'dead'" not in (info.get("column_type") or ""):
+        with get_db_context() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(
+                    f"ALTER TABLE {table} MODIFY COLUMN status "
+                    f"ENUM('pending','running','done','failed','dead') NOT NULL DEFAULT 'pending'"
+                )
+                cursor.execute(f"UPDATE {table} SET status = 'dead' WHERE status = 'failed'")
+                cursor.execute(
+                    f"ALTER TABLE {table} MODIFY COLUMN status "
+                    f"ENUM('pending','running','done','dead') NOT NULL DEFAULT 'pending'"
+                )
+                logger.info(f"[db] Statut 'dead' ajoute a {table}")
+            except Exception as e:
+                logger.warning(f"[db] ALTER {table}.status: {e}")
+
+    # Millisecondes : les latences d'attente/execution se mesurent sur ces colonnes.
+    precise_columns = {
+        "run_at":      "TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3)",
+        "locked_at":   "TIMESTAMP(3) NULL",
+        "finished_at": "TIMESTAMP(3) NULL",
+    }
+    for col_name, col_def in precise_columns.items():
+        info = _column_info(table, col_name)
+        if info and "(3)" not in (info.get("column_type") or ""):
+            with get_db_context() as conn:
+                cursor = conn.cursor()
+                try:
+                    cursor.execute(f"ALTER TABLE {table} MODIFY COLUMN {col_name} {col_def}")
+                except Exception as e:
+                    logger.warning(f"[db] ALTER {table}.{col_name}: {e}")
+
+    if not _index_exists(table, "uq_dedupe"):
+        with get_db_context() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(f"ALTER TABLE {table} ADD UNIQUE KEY uq_dedupe (dedupe_key)")
+            except Exception as e:
+                if "duplicate key name" not in str(e).lower():
+                    logger.warning(f"[db] ALTER {table} ADD UNIQUE uq_dedupe: {e}")
+    _ensure_index(table, "idx_claim_priority", "status, priority, run_at")
+    _ensure_index(table, "idx_finished", "status, finished_at")
+
+
+def _ensure_pagination_indexes() -> None:
+    """Index composites de la pagination par curseur (tri horodatage DESC, id DESC)."""
+    indexes = {
+        "tickets": {
+            "idx_guild_opened":        "guild_id, opened_at, id",
+            "idx_guild_status_opened": "guild_id, status, opened_at, id",
+        },
+        "orders": {
+            "idx_created_id":          "created_at, id",
+            "idx_status_created_id":   "status, created_at, id",
+        },
+        "audit_log": {
+            "idx_created_id":          "created_at, id",
+            "idx_guild_created_id":    "guild_id, created_at, id",
+        },
+    }
+    for name, table_indexes in indexes.items():
+        table = f"{DB_TABLE_PREFIX}{name}"
+        if not _table_exists(table):
+            continue
+        for index_name, columns in table_indexes.items():
+            _ensure_index(table, index_name, columns)
+
+
+def _ensure_guild_stats_backfill() -> None:
+    """Premier deploiement des stats pre-agregees : planifie leur calcul (file vai_jobs)."""
+    if not _table_exists(f"{DB_TABLE_PREFIX}guild_ticket_stats"):
+        return
+    try:
+        from bot.config import JOB_TICKET_STATS_REBUILD
+        from bot.db.models import GuildStatsModel, JobModel
+        if GuildStatsModel.needs_backfill():
+            JobModel.enqueue(
+                JOB_TICKET_STATS_REBUILD, {}, None, 0, 5,
+                priority=-5, dedupe_key=JOB_TICKET_STATS_REBUILD,
+            )
+            logger.info("[db] Calcul initial des stats tickets planifie")
+    except Exception as e:
+        logger.warning(f"[db] Backfill stats tickets: {e}")
+
+
 def ensure_database_schema() -> None:
     """
     Creates/migrates the MySQL schema at API startup using the `database/` folder.
@@ -461,6 +667,9 @@ def ensure_database_schema() -> None:
     _ensure_ticket_migrations()
     _ensure_knowledge_base_migrations()
     _ensure_guild_v04_migrations()
+    _ensure_jobs_migrations()
+    _ensure_pagination_indexes()
+    _ensure_guild_stats_backfill()
 
     # Re-apply views after ALTERs (best-effort).
     try:
@@ -63,7 +63,13 @@ async def lifespan(app: FastAPI):
         if is_production():
             raise
 
-    yield
+    # Stats globales Super Admin : snapshot rafraichi en tache de fond.
+    from api.admin_stats import global_stats
+    global_stats.start()
+    try:
+        yield
+    finally:
+        await global_stats.stop()
 
 app = FastAPI(
     title=f"Veridian AI {VERSION} - API Interne",
@@ -193,10 +199,10 @@ class SendDMRequest(BaseModel):
 async def health_check():
     """Vérifie la santé de l'API."""
     try:
-        from bot.db.connection import get_connection
+        from bot.db.connection import get_db_context, get_pool_stats
         try:
-            conn = get_connection()
-            conn.close()
+            with get_db_context():
+                pass
             db_status = "healthy"
         except Exception:
             db_status = "unhealthy"
@@ -206,6 +212,7 @@ async def health_check():
             "version": VERSION,
             "environment": ENVIRONMENT,
             "database": db_status,
+            "db_pool": get_pool_stats(),
             "timestamp": datetime.utcnow().isoformat(),
             "api_domain": API_DOMAIN
         }
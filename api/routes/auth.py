@@ -23,6 +23,7 @@ from bot.db.models import DashboardSessionModel, DashboardUserModel, TempCodeMod
 from bot.config import DB_TABLE_PREFIX, BOT_OWNER_DISCORD_ID
 
 from api.security import get_jwt_secret, is_production
+from api.session_cache import session_cache
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
@@ -349,6 +350,7 @@ async def exchange_temp_code(request: Request):
                 guild_ids_json=json.dumps(guild_ids),
                 expires_at=datetime.utcnow() + timedelta(days=7),
             )
+            session_cache.invalidate(data["jwt"])
     except Exception as e:
         logger.warning(f"Dashboard session ensure failed: {e}")
 
@@ -368,13 +370,14 @@ async def get_current_user(request: Request):
     if not token:
         raise HTTPException(status_code=401, detail="Header Authorization manquant")
     try:
-        # Enforce server-side revocation/expiry via DB session.
+        # Enforce server-side revocation/expiry via DB session (cached, see api/session_cache.py).
+        session = {"status": "missing", "guild_ids": None}
         try:
             try:
-                status = DashboardSessionModel.token_status(token)
+                session = session_cache.get(token)
             except Exception as e:
                 logger.warning(f"Session status check error: {e}")
-                status = "missing"
+            status = session["status"]
 
             if status in {"revoked", "expired"}:
                 raise HTTPException(status_code=401, detail="Session invalide ou revoquee")
@@ -394,12 +397,8 @@ async def get_current_user(request: Request):
         )
         # Guild allowlist is stored server-side in DB (dashboard session).
         guild_ids = payload.get("guild_ids", [])
-        try:
-            allowed = DashboardSessionModel.allowed_guild_ids(token)
-            if allowed is not None:
-                guild_ids = allowed
-        except Exception:
-            pass
+        if session["status"] == "valid" and session["guild_ids"] is not None:
+            guild_ids = session["guild_ids"]
         return {
             "user_id":        payload.get("sub"),
             "username":       payload.get("username"),
@@ -475,7 +474,7 @@ async def logout(request: Request):
             pass
     if token:
         try:
-            DashboardSessionModel.revoke_token(token)
+            session_cache.revoke(token)
         except Exception as e:
             logger.warning(f"Logout DB error: {e}")
     return JSONResponse(content={"status": "success"})
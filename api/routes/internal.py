@@ -3,16 +3,21 @@ API Interne - Routes dashboard <-> bot
 Toute la configuration passe par ici, plus de commandes bot admin.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Header, Request
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, List
+from collections import Counter
 from bot.db.connection import get_db_context
 from bot.db.models import (
     GuildModel, TicketModel, UserModel, SubscriptionModel,
     OrderModel, PaymentModel, KnowledgeBaseModel, AuditLogModel,
-    BotStatusModel, TicketMessageModel
+    BotStatusModel, BotShardStatusModel, TicketMessageModel, JobModel, GuildStatsModel
+)
+from bot.config import (
+    PLAN_LIMITS, JOB_MAX_ATTEMPTS, JOB_METRICS_WINDOW_SECONDS, JOB_TICKET_OPEN_SYNC,
+    JOB_TICKET_STATS_REBUILD, PAGE_MAX_LIMIT,
 )
-from bot.config import PLAN_LIMITS, DB_TABLE_PREFIX
 from loguru import logger
 import os
 import jwt as pyjwt
@@ -21,6 +26,9 @@ router = APIRouter(prefix="/internal", tags=["internal"])
 
 from api.security import get_jwt_secret
 from api.security import is_production
+from api.session_cache import session_cache
+from api.admin_stats import global_stats
+from api.transcript_export import FORMATS as TRANSCRIPT_FORMATS, accepts_gzip, stream_transcript
 
 
 # ============================================================================
@@ -84,15 +92,17 @@ def verify_internal_auth(request: Request, x_api_secret: str = Header(None)) ->
         token = alt_header.strip()
 
     if token:
+        # Signature/expiry first: a forged token never reaches the DB or the session cache.
+        payload = _decode_jwt(token)
 
-        # Enforce server-side revocation/expiry via DB.
+        # Enforce server-side revocation/expiry via DB (session cached a few seconds, see api/session_cache.py).
+        session = {"status": "missing", "guild_ids": None}
         try:
-            from bot.db.models import DashboardSessionModel
             try:
-                status = DashboardSessionModel.token_status(token)
+                session = session_cache.get(token)
             except Exception as e:
                 logger.warning(f"Session status check error: {e}")
-                status = "missing"
+            status = session["status"]
 
             if status in {"revoked", "expired"}:
                 raise HTTPException(status_code=401, detail="Session invalide ou revoquee")
@@ -108,19 +118,13 @@ def verify_internal_auth(request: Request, x_api_secret: str = Header(None)) ->
             # Keep JWT auth working even if the session table/schema is drifting.
             # Revocation won't be enforced in that case.
 
-        payload = _decode_jwt(token)
         try:
             user_id = int(payload.get("sub", 0) or 0)
         except Exception:
             user_id = 0
 
         # Prefer server-side guild allowlist stored in the dashboard session row.
-        guild_ids = None
-        try:
-            from bot.db.models import DashboardSessionModel
-            guild_ids = DashboardSessionModel.allowed_guild_ids(token)
-        except Exception:
-            guild_ids = None
+        guild_ids = session["guild_ids"] if session["status"] == "valid" else None
 
         if guild_ids is None:
             guild_ids = payload.get("guild_ids", [])
@@ -342,17 +346,25 @@ def update_guild_config(guild_id: int, body: GuildConfigBody, request: Request):
 # Tickets
 # ============================================================================
 
+def _enqueue_ticket_open_sync(guild_id: int) -> None:
+    """Notifie le bot via la file vai_jobs (une seule tâche en attente par guild)."""
+    job_id = JobModel.enqueue(
+        JOB_TICKET_OPEN_SYNC, {"guild_id": guild_id}, guild_id, 0, JOB_MAX_ATTEMPTS,
+        priority=10, dedupe_key=f"ticket_open:{guild_id}",
+    )
+    if not job_id:
+        # Le flag est en DB : le rattrapage au démarrage du bot le reprendra.
+        logger.warning(f"Tache {JOB_TICKET_OPEN_SYNC} non enregistree pour la guild {guild_id}")
+
+
 @router.post("/guild/{guild_id}/tickets/open-message/deploy", dependencies=[Depends(verify_guild_access)])
 def deploy_ticket_open_message(guild_id: int, body: GuildConfigBody, request: Request):
     """Déploie le message d'ouverture de tickets dans un channel.
 
     Le dashboard envoie les champs ticket_open_* (message/bouton/sélecteur).
-    Le bot consommera cet endpoint via un internal route (bot-side) ou l'API
-    enverra un ordre au bot (selon votre infra). Ici on persiste d'abord en DB
-    puis on émet un événement best-effort via une table/queue si dispo.
-
-    NOTE: pour l'instant, on persiste seulement. Le bot peut avoir un /sync
-    ou un poll, ou vous pouvez implémenter un webhook/WS plus tard.
+    On persiste en DB (flag ticket_open_needs_deploy) puis on pose une tâche
+    ticket_open.sync dans vai_jobs : le worker du bot la réclame à son
+    prochain poll (~1s) et applique l'état demandé.
     """
     # Persist config first
     updates = dict(body.dict(exclude_unset=True).items())
@@ -375,7 +387,8 @@ def deploy_ticket_open_message(guild_id: int, body: GuildConfigBody, request: Re
         ip_address=request.client.host if request.client else None
     )
 
-    # Best-effort: mark a 'needs_deploy' flag in DB if you later add it.
+    if updates:
+        _enqueue_ticket_open_sync(guild_id)
     return {"status": "queued", "guild_id": guild_id}
 
 
@@ -394,25 +407,66 @@ def request_delete_ticket_open_message(guild_id: int, request: Request):
         ip_address=request.client.host if request.client else None
     )
 
+    _enqueue_ticket_open_sync(guild_id)
     return {"status": "queued", "guild_id": guild_id}
 
 
+def _enqueue_ticket_stats_rebuild(guild_id: int) -> None:
+    try:
+        JobModel.enqueue(
+            JOB_TICKET_STATS_REBUILD, {"guild_id": guild_id}, guild_id, 0, JOB_MAX_ATTEMPTS,
+            priority=-5, dedupe_key=f"{JOB_TICKET_STATS_REBUILD}:{guild_id}",
+        )
+    except Exception:
+        pass
+
+
+def _page_limit(limit: int) -> int:
+    return max(1, min(limit, PAGE_MAX_LIMIT))
+
+
 @router.get("/guild/{guild_id}/tickets", dependencies=[Depends(verify_guild_access)])
 def get_guild_tickets(guild_id: int, status: Optional[str] = None,
-                      page: int = 1, limit: int = 50):
-    tickets = TicketModel.get_by_guild(guild_id, status=status, page=page, limit=limit)
-    total   = TicketModel.count_by_guild(guild_id, status=status)
+                      page: int = 1, limit: int = 50, cursor: Optional[str] = None,
+                      with_total: bool = True):
+    """
+    Pagination par curseur : repasser `next_cursor` (null = derniere page).
+    `page` > 1 sans curseur reste accepte (OFFSET) pour les anciens clients.
+    Le total vient des compteurs pre-agreges, pas d'un COUNT(*) par page.
+    """
+    limit = _page_limit(limit)
+    next_cursor = None
+    try:
+        if cursor or page <= 1:
+            result = TicketModel.page_by_guild(guild_id, status=status, limit=limit, cursor=cursor)
+            tickets, next_cursor = result["rows"], result["next_cursor"]
+        else:
+            tickets = TicketModel.get_by_guild(guild_id, status=status, page=page, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    total = None
+    if with_total:
+        try:
+            total = GuildStatsModel.ticket_count(guild_id, status=status)
+        except Exception as e:
+            logger.warning(f"Stats pre-agregees guild {guild_id}: {e}")
+        if total is None:
+            total = TicketModel.count_by_guild(guild_id, status=status)
+            _enqueue_ticket_stats_rebuild(guild_id)
+
     return {
-        "guild_id": guild_id,
-        "total":    total,
-        "page":     page,
-        "limit":    limit,
-        "tickets":  tickets
+        "guild_id":    guild_id,
+        "total":       total,
+        "page":        page,
+        "limit":       limit,
+        "next_cursor": next_cursor,
+        "tickets":     tickets
     }
 
 
-@router.get("/ticket/{ticket_id}", dependencies=[Depends(verify_internal_auth)])
-def get_ticket(ticket_id: int, request: Request):
+def _get_ticket_checked(ticket_id: int, request: Request) -> dict:
+    """Ticket existant et accessible a l'utilisateur (404 / 403 sinon)."""
     ticket = TicketModel.get(ticket_id)
     if not ticket:
         raise HTTPException(status_code=404, detail="Ticket not found")
@@ -431,22 +485,14 @@ def get_ticket(ticket_id: int, request: Request):
     return ticket
 
 
+@router.get("/ticket/{ticket_id}", dependencies=[Depends(verify_internal_auth)])
+def get_ticket(ticket_id: int, request: Request):
+    return _get_ticket_checked(ticket_id, request)
+
+
 @router.get("/ticket/{ticket_id}/transcript", dependencies=[Depends(verify_internal_auth)])
 def get_ticket_transcript(ticket_id: int, request: Request):
-    ticket = TicketModel.get(ticket_id)
-    if not ticket:
-        raise HTTPException(status_code=404, detail="Ticket not found")
-    if not getattr(request.state, "is_super_admin", False):
-        allowed = getattr(request.state, "guild_ids", None)
-        if allowed is not None:
-            norm_allowed = set()
-            for x in (allowed or []):
-                try:
-                    norm_allowed.add(int(x))
-                except Exception:
-                    pass
-            if int(ticket.get("guild_id", 0)) not in norm_allowed:
-                raise HTTPException(status_code=403, detail="Acces refuse a ce ticket")
+    ticket = _get_ticket_checked(ticket_id, request)
     messages = TicketMessageModel.get_by_ticket(ticket_id)
     return {
         "ticket_id":  ticket_id,
@@ -454,12 +500,51 @@ def get_ticket_transcript(ticket_id: int, request: Request):
         "user_id":    ticket.get("user_id"),
         "status":     ticket.get("status"),
         "transcript": ticket.get("transcript"),
+        # Résumé glissant tenu par le bot pendant que le ticket est ouvert.
+        "rolling_summary":    ticket.get("rolling_summary"),
+        "rolling_summary_at": str(ticket.get("rolling_summary_at")) if ticket.get("rolling_summary_at") else None,
         "messages":   messages,
         "opened_at":  str(ticket.get("opened_at")) if ticket.get("opened_at") else None,
         "closed_at":  str(ticket.get("closed_at")) if ticket.get("closed_at") else None
     }
 
 
+@router.get("/ticket/{ticket_id}/transcript/export", dependencies=[Depends(verify_internal_auth)])
+def export_ticket_transcript(ticket_id: int, request: Request, format: str = "ndjson",
+                             compress: Optional[bool] = Query(None, alias="gzip")):
+    """
+    Export streame du transcript (ndjson | html | txt), messages lus par lots.
+
+    - sans ?gzip : Content-Encoding gzip si Accept-Encoding l'accepte ;
+    - ?gzip=1 : telechargement d'un fichier .gz (application/gzip) ;
+    - ?gzip=0 : jamais compresse.
+    """
+    fmt = (format or "").lower()
+    if fmt not in TRANSCRIPT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Format invalide (attendu : {', '.join(TRANSCRIPT_FORMATS)})")
+    ticket = _get_ticket_checked(ticket_id, request)
+
+    media_type, ext = TRANSCRIPT_FORMATS[fmt]
+    filename = f"ticket-{ticket_id}.{ext}"
+    headers = {
+        "Cache-Control": "no-store",
+        # Pas de mise en tampon par un reverse proxy (nginx) : premiers octets immediats
+        "X-Accel-Buffering": "no",
+    }
+    if compress:
+        # Fichier compresse demande : le contenu EST le .gz, pas un encodage de transfert.
+        media_type, filename = "application/gzip", filename + ".gz"
+    elif compress is None:
+        headers["Vary"] = "Accept-Encoding"
+        if accepts_gzip(request.headers.get("Accept-Encoding")):
+            headers["Content-Encoding"] = "gzip"
+            compress = True
+    headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return StreamingResponse(
+        stream_transcript(ticket, fmt, compress=bool(compress)), media_type=media_type, headers=headers
+    )
+
+
 @router.post("/ticket/{ticket_id}/close", dependencies=[Depends(verify_internal_auth)])
 def close_ticket_dashboard(ticket_id: int, request: Request):
     ticket = TicketModel.get(ticket_id)
@@ -547,6 +632,43 @@ def update_ticket_priority(ticket_id: int, body: TicketPriorityBody, request: Re
 
 @router.get("/guild/{guild_id}/stats", dependencies=[Depends(verify_guild_access)])
 def get_guild_stats(guild_id: int):
+    # Compteurs pre-agreges (vai_guild_ticket_stats / vai_guild_ticket_daily).
+    stats = None
+    try:
+        stats = GuildStatsModel.get_dashboard_stats(guild_id, days=7)
+    except Exception as e:
+        logger.warning(f"Stats pre-agregees guild {guild_id}: {e}")
+    if stats is None:
+        stats = _legacy_ticket_stats(guild_id)
+        # Guild pas encore calculee : on planifie son calcul, la lecture directe sert en attendant.
+        _enqueue_ticket_stats_rebuild(guild_id)
+
+    # Best-effort stats: avoid returning 500 on schema drift.
+    try:
+        subscription = SubscriptionModel.get(guild_id)
+    except Exception:
+        subscription = None
+    try:
+        kb_count = KnowledgeBaseModel.count(guild_id)
+    except Exception:
+        kb_count = 0
+
+    return {
+        "guild_id":           guild_id,
+        "open_tickets":       stats["open_tickets"],
+        "in_progress_tickets": stats["in_progress_tickets"],
+        "total_tickets":      stats["total_tickets"],
+        "tickets_month":      stats["tickets_month"],
+        "languages":          stats["languages"],
+        "daily_counts":       stats["daily_counts"],
+        "current_plan":       subscription["plan"] if subscription else "free",
+        "is_subscribed":      bool(subscription),
+        "kb_entries":         kb_count
+    }
+
+
+def _legacy_ticket_stats(guild_id: int) -> dict:
+    """Lecture directe de vai_tickets (guild dont les stats ne sont pas encore calculees)."""
     # Best-effort stats: avoid returning 500 on schema drift.
     try:
         open_tickets = TicketModel.count_by_guild(guild_id, status="open")
@@ -572,29 +694,29 @@ def get_guild_stats(guild_id: int):
         daily_counts = TicketModel.get_daily_counts(guild_id, days=7)
     except Exception:
         daily_counts = []
-    try:
-        subscription = SubscriptionModel.get(guild_id)
-    except Exception:
-        subscription = None
-    try:
-        kb_count = KnowledgeBaseModel.count(guild_id)
-    except Exception:
-        kb_count = 0
-
     return {
-        "guild_id":           guild_id,
-        "open_tickets":       open_tickets,
+        "open_tickets":        open_tickets,
         "in_progress_tickets": inprog_tickets,
-        "total_tickets":      total_tickets,
-        "tickets_month":      tickets_month,
-        "languages":          languages,
-        "daily_counts":       daily_counts,
-        "current_plan":       subscription["plan"] if subscription else "free",
-        "is_subscribed":      bool(subscription),
-        "kb_entries":         kb_count
+        "total_tickets":       total_tickets,
+        "tickets_month":       tickets_month,
+        "languages":           languages,
+        "daily_counts":        daily_counts,
     }
 
 
+@router.post("/admin/stats/rebuild", dependencies=[Depends(verify_super_admin)])
+def rebuild_ticket_stats(guild_id: Optional[int] = None):
+    """Planifie le recalcul des stats tickets pre-agregees (une guild ou toutes)."""
+    dedupe = f"{JOB_TICKET_STATS_REBUILD}:{guild_id}" if guild_id else JOB_TICKET_STATS_REBUILD
+    job_id = JobModel.enqueue(
+        JOB_TICKET_STATS_REBUILD, {"guild_id": guild_id} if guild_id else {}, guild_id, 0, JOB_MAX_ATTEMPTS,
+        priority=-5, dedupe_key=dedupe,
+    )
+    if not job_id:
+        raise HTTPException(status_code=500, detail="Impossible de planifier le recalcul")
+    return {"status": "queued", "job_id": job_id}
+
+
 # ============================================================================
 # Orders
 # ============================================================================
@@ -606,9 +728,25 @@ def get_pending_orders():
 
 
 @router.get("/orders", dependencies=[Depends(verify_super_admin)])
-def get_orders(page: int = 1, limit: int = 50, status: Optional[str] = None):
-    orders = OrderModel.list_all(page=page, limit=limit, status=status)
-    return {"orders": orders, "page": page, "limit": limit}
+def get_orders(page: int = 1, limit: int = 50, status: Optional[str] = None,
+               cursor: Optional[str] = None, with_total: bool = False):
+    """Pagination par curseur (`next_cursor`) ; `page` > 1 sans curseur = OFFSET."""
+    limit = _page_limit(limit)
+    next_cursor = None
+    try:
+        if cursor or page <= 1:
+            result = OrderModel.page(status=status, limit=limit, cursor=cursor)
+            orders, next_cursor = result["rows"], result["next_cursor"]
+        else:
+            orders = OrderModel.list_all(page=page, limit=limit, status=status)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    response = {"orders": orders, "page": page, "limit": limit, "next_cursor": next_cursor}
+    if with_total:
+        counted = OrderModel.count(status=status)
+        response["total"] = counted["total"]
+        response["total_approximate"] = counted["approximate"]
+    return response
 
 
 @router.put("/orders/{order_id}/status", dependencies=[Depends(verify_super_admin)])
@@ -775,80 +913,31 @@ def delete_kb_entry(guild_id: int, kb_id: int, request: Request):
 # ============================================================================
 
 @router.get("/admin/stats", dependencies=[Depends(verify_super_admin)])
-def get_global_stats():
+def get_global_stats(refresh: bool = False):
+    """
+    Compteurs globaux servis depuis le snapshot en memoire (api/admin_stats.py),
+    rafraichi en tache de fond ; ?refresh=1 force un recalcul immediat.
+    """
     try:
-        from bot.db.connection import get_db_context
-        with get_db_context() as conn:
-            cursor = conn.cursor()
-
-            def scalar(query: str, params: tuple = ()) -> float | int:
-                cursor.execute(query, params)
-                row = cursor.fetchone()
-                return 0 if not row else row[0]
-
-            total_guilds = int(scalar(f"SELECT COUNT(*) FROM {DB_TABLE_PREFIX}guilds"))
-
-            # "Utilisateurs" = comptes dashboard (OAuth) — fallback sur sessions/anciens schemas.
-            dashboard_users_count = None
-            session_users_count = None
-            try:
-                dashboard_users_count = int(scalar(f"SELECT COUNT(*) FROM {DB_TABLE_PREFIX}dashboard_users"))
-            except Exception:
-                pass
-
-            try:
-                session_users_count = int(scalar(
-                    f"SELECT COUNT(DISTINCT discord_user_id) FROM {DB_TABLE_PREFIX}dashboard_sessions"
-                ))
-            except Exception:
-                pass
-
-            if dashboard_users_count is not None:
-                total_users = max(dashboard_users_count, session_users_count or 0)
-            elif session_users_count is not None:
-                total_users = session_users_count
-            else:
-                total_users = int(scalar(f"SELECT COUNT(*) FROM {DB_TABLE_PREFIX}users"))
-
-            tickets_today = int(scalar(
-                f"SELECT COUNT(*) FROM {DB_TABLE_PREFIX}tickets WHERE DATE(opened_at) = CURDATE()"
-            ))
-            orders_pending = int(scalar(
-                f"SELECT COUNT(*) FROM {DB_TABLE_PREFIX}orders WHERE status = 'pending'"
-            ))
-            revenue_month = float(scalar(
-                f"SELECT COALESCE(SUM(amount), 0) FROM {DB_TABLE_PREFIX}payments "
-                f"WHERE status = 'completed' "
-                f"AND YEAR(paid_at) = YEAR(CURDATE()) "
-                f"AND MONTH(paid_at) = MONTH(CURDATE())"
-            ))
-            active_subs = int(scalar(
-                f"SELECT COUNT(*) FROM {DB_TABLE_PREFIX}subscriptions WHERE is_active = 1"
-            ))
-
-        bot_st = BotStatusModel.get() or {}
-
-        return {
-            "total_guilds":     total_guilds,
-            "total_users":      total_users,
-            "tickets_today":    tickets_today,
-            "orders_pending":   orders_pending,
-            "revenue_month":    revenue_month,
-            "active_subs":      active_subs,
-            "bot_is_online":    bot_st.get("is_online", False),
-            "bot_guild_count":  bot_st.get("guild_count", 0),
-            "bot_user_count":   bot_st.get("user_count", 0),
-            "bot_channel_count": bot_st.get("channel_count", 0),
-            "bot_uptime_sec":   bot_st.get("uptime_sec", 0),
-            "bot_latency_ms":   round(float(bot_st.get("latency_ms", 0) or 0), 1),
-            "bot_shard_count":  bot_st.get("shard_count", 1),
-            "bot_version":      bot_st.get("version", "?"),
-            "bot_started_at":   str(bot_st["started_at"]) if bot_st.get("started_at") else None,
-        }
+        stats = global_stats.get(force=refresh)
     except Exception as e:
         logger.error(f"Erreur admin stats: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+    bot_st = _bot_status_raw() or {}
+    return {
+        **stats,
+        "bot_is_online":    bot_st.get("is_online", False),
+        "bot_guild_count":  bot_st.get("guild_count", 0),
+        "bot_user_count":   bot_st.get("user_count", 0),
+        "bot_channel_count": bot_st.get("channel_count", 0),
+        "bot_uptime_sec":   bot_st.get("uptime_sec", 0),
+        "bot_latency_ms":   round(float(bot_st.get("latency_ms", 0) or 0), 1),
+        "bot_shard_count":  bot_st.get("shard_count", 1),
+        "bot_version":      bot_st.get("version", "?"),
+        "bot_started_at":   str(bot_st["started_at"]) if bot_st.get("started_at") else None,
+    }
+
 
 @router.get("/admin/guilds", dependencies=[Depends(verify_super_admin)])
 def get_all_guilds():
@@ -857,9 +946,37 @@ def get_all_guilds():
 
 
 @router.get("/admin/audit", dependencies=[Depends(verify_super_admin)])
-def get_audit_log(guild_id: Optional[int] = None, limit: int = 100):
-    logs = AuditLogModel.get_recent(guild_id=guild_id, limit=limit)
-    return {"logs": logs}
+def get_audit_log(guild_id: Optional[int] = None, limit: int = 100,
+                  cursor: Optional[str] = None, with_total: bool = False):
+    """Pagination par curseur : repasser `next_cursor` (null = derniere page)."""
+    try:
+        result = AuditLogModel.page(guild_id=guild_id, limit=_page_limit(limit), cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    response = {"logs": result["rows"], "next_cursor": result["next_cursor"]}
+    if with_total:
+        counted = AuditLogModel.count(guild_id=guild_id)
+        response["total"] = counted["total"]
+        response["total_approximate"] = counted["approximate"]
+    return response
+
+
+@router.get("/admin/jobs", dependencies=[Depends(verify_super_admin)])
+def get_jobs_stats(job_type: Optional[str] = None, dead_limit: int = 20):
+    """Etat de la file vai_jobs : volumes, debit, latences par type et dernieres dead-letters."""
+    return {
+        "window_seconds": JOB_METRICS_WINDOW_SECONDS,
+        "by_status": JobModel.count_by_status(),
+        "types": JobModel.metrics(JOB_METRICS_WINDOW_SECONDS),
+        "dead": JobModel.list_dead(limit=max(1, min(dead_limit, 200)), job_type=job_type),
+    }
+
+
+@router.post("/admin/jobs/{job_id}/retry", dependencies=[Depends(verify_super_admin)])
+def retry_dead_job(job_id: int):
+    if not JobModel.retry_dead(job_id):
+        raise HTTPException(status_code=404, detail="Tache introuvable ou pas en dead-letter")
+    return {"status": "ok", "job_id": job_id}
 
 
 # ============================================================================
@@ -883,13 +1000,68 @@ def bot_heartbeat(guild_count: int = 0, user_count: int = 0,
     return {"status": "ok"}
 
 
+def _aggregate_shard_status(rows: list) -> Optional[dict]:
+    """
+    Agrege les heartbeats par shard (un process du bot = une plage de shards).
+    Les lignes d'un ancien decoupage (shard_count different) sont ignorees.
+    """
+    online = [r for r in rows if r.get("is_online")]
+    if not online:
+        return None
+    shard_count = max(int(r.get("shard_count") or 1) for r in online)
+    current = [r for r in rows if int(r.get("shard_count") or 1) == shard_count
+               and int(r.get("shard_id") or 0) < shard_count]
+    online = [r for r in current if r.get("is_online")]
+    latencies = [float(r.get("latency_ms") or 0) for r in online if r.get("latency_ms")]
+    started = [r["started_at"] for r in online if r.get("started_at")]
+    return {
+        "is_online":     True,
+        "guild_count":   sum(int(r.get("guild_count") or 0) for r in online),
+        "user_count":    sum(int(r.get("user_count") or 0) for r in online),
+        "channel_count": sum(int(r.get("channel_count") or 0) for r in online),
+        # Uptime du process le plus recemment redemarre
+        "uptime_sec":    min(int(r.get("uptime_sec") or 0) for r in online),
+        "latency_ms":    sum(latencies) / len(latencies) if latencies else 0,
+        "shard_count":   shard_count,
+        "shards_online": len(online),
+        # Version majoritaire (deploiement progressif possible)
+        "version":       Counter(r.get("version") or "?" for r in online).most_common(1)[0][0],
+        "started_at":    max(started) if started else None,
+        "updated_at":    max(r["updated_at"] for r in online if r.get("updated_at")) if online else None,
+        "shards": [
+            {
+                "shard_id":    int(r.get("shard_id") or 0),
+                "cluster_id":  r.get("cluster_id"),
+                "is_online":   bool(r.get("is_online")),
+                "guild_count": int(r.get("guild_count") or 0),
+                "latency_ms":  round(float(r.get("latency_ms") or 0), 1),
+                "updated_at":  str(r["updated_at"]) if r.get("updated_at") else None,
+            }
+            for r in current
+        ],
+    }
+
+
+def _bot_status_raw() -> Optional[dict]:
+    """Statut agrege des shards, repli sur la ligne unique vai_bot_status."""
+    raw = None
+    try:
+        raw = _aggregate_shard_status(BotShardStatusModel.get_all())
+    except Exception as e:
+        # Table absente (schema pas encore migre) : repli sur vai_bot_status
+        logger.debug(f"bot_shard_status: {e}")
+    if raw is None:
+        raw = BotStatusModel.get()
+    return raw
+
+
 @router.get("/bot/status", dependencies=[Depends(verify_internal_auth)])
 def bot_status():
     """Retourne le statut complet du bot.
     Accessible a tous les utilisateurs authentifies (dashboard).
     Les donnees sensibles (tokens, secrets) ne sont jamais exposees.
     """
-    raw = BotStatusModel.get()
+    raw = _bot_status_raw()
     if not raw:
         return {"status": "unknown", "is_online": False}
 
@@ -912,6 +1084,8 @@ def bot_status():
         "uptime_text":   uptime_text.strip(),
         "latency_ms":    round(float(raw.get("latency_ms", 0) or 0), 1),
         "shard_count":   raw.get("shard_count", 1),
+        "shards_online": raw.get("shards_online", raw.get("shard_count", 1) if raw.get("is_online") else 0),
+        "shards":        raw.get("shards", []),
         "version":       raw.get("version", "?"),
         "started_at":    str(raw["started_at"]) if raw.get("started_at") else None,
         "updated_at":    str(raw["updated_at"]) if raw.get("updated_at") else None,
@@ -0,0 +1,61 @@
+"""
+Cache des sessions dashboard (validation JWT cote serveur).
+
+Chaque requete authentifiee lisait vai_dashboard_sessions plusieurs fois
+(statut, puis liste des guilds autorisees). On garde ici, par SHA-256 du JWT
+(jamais le token lui-meme), le statut de la session, son expiration et la
+liste des guilds, pendant SESSION_CACHE_TTL_SECONDS.
+
+- `revoke()` / `invalidate()` retirent l'entree immediatement dans ce
+  process ; les autres process API voient la revocation au plus tard apres
+  le TTL.
+- Une session valide n'est jamais servie au-dela de son expiration en DB.
+- Les erreurs DB ne sont pas mises en cache.
+"""
+
+from __future__ import annotations
+
+import time
+
+from bot.config import SESSION_CACHE_SIZE, SESSION_CACHE_TTL_SECONDS
+from bot.db.models import DashboardSessionModel
+from bot.services.cache import TTLCache
+
+
+class SessionCache:
+    def __init__(self, ttl: float = SESSION_CACHE_TTL_SECONDS, maxsize: int = SESSION_CACHE_SIZE):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, jwt_token: str) -> dict:
+        """
+        {"status": valid|revoked|expired|missing, "guild_ids": list[int] | None}
+        Leve l'exception DB si la session n'est pas en cache et que la lecture echoue.
+        """
+        key = DashboardSessionModel.token_hash(jwt_token)
+        entry = self._cache.get(key)
+        if entry is None:
+            info = DashboardSessionModel.lookup(jwt_token)
+            valid_until = None
+            if info["status"] == "valid" and info.get("expires_in") is not None:
+                valid_until = time.monotonic() + max(0, info["expires_in"])
+            entry = {"status": info["status"], "guild_ids": info.get("guild_ids"), "valid_until": valid_until}
+            self._cache.set(key, entry)
+        if entry["status"] == "valid" and entry["valid_until"] is not None and time.monotonic() >= entry["valid_until"]:
+            return {"status": "expired", "guild_ids": None}
+        return {"status": entry["status"], "guild_ids": entry["guild_ids"]}
+
+    def invalidate(self, jwt_token: str) -> None:
+        self._cache.pop(DashboardSessionModel.token_hash(jwt_token))
+
+    def revoke(self, jwt_token: str) -> bool:
+        """Revoque la session en DB et l'oublie immediatement."""
+        try:
+            return DashboardSessionModel.revoke_token(jwt_token)
+        finally:
+            self.invalidate(jwt_token)
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+
+session_cache = SessionCache()
@@ -0,0 +1,258 @@
+"""
+Export streame des transcripts de tickets (NDJSON, HTML, texte).
+
+/internal/ticket/{id}/transcript charge tous les messages et construit un seul
+document JSON : sur un gros ticket, la memoire et le temps avant le premier
+octet grandissent avec le ticket. Ici :
+
+- les messages sont lus par lots (TicketMessageModel.iter_by_ticket) et
+  ecrits au fil de l'eau dans une reponse chunked ;
+- l'en-tete (infos du ticket) part avant la premiere lecture des messages ;
+- la compression gzip (zlib) est incrementale, videe a chaque bloc envoye :
+  Content-Encoding negocie via Accept-Encoding, ou fichier .gz
+  (application/gzip) quand le client le demande explicitement ;
+- une erreur en cours d'export termine le flux par un marqueur explicite
+  (le code HTTP est deja parti).
+"""
+
+from __future__ import annotations
+
+import html
+import json
+import zlib
+from typing import Iterator
+
+from loguru import logger
+
+from bot.config import TRANSCRIPT_EXPORT_BATCH
+from bot.db.models import TicketMessageModel
+
+# format -> (media type, extension)
+FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "html":   ("text/html; charset=utf-8", "html"),
+    "txt":    ("text/plain; charset=utf-8", "txt"),
+}
+
+# Taille min. d'un bloc envoye (hors en-tete, envoye tout de suite)
+_FLUSH_BYTES = 32 * 1024
+
+
+def _ts(value) -> str | None:
+    return str(value) if value else None
+
+
+def _attachments(raw) -> list:
+    if not raw:
+        return []
+    if isinstance(raw, (bytes, bytearray)):
+        raw = raw.decode("utf-8", "replace")
+    if isinstance(raw, str):
+        try:
+            raw = json.loads(raw)
+        except ValueError:
+            return []
+    return raw if isinstance(raw, list) else []
+
+
+def _attachment_url(att) -> str:
+    if isinstance(att, dict):
+        return str(att.get("url") or att.get("proxy_url") or att.get("filename") or "")
+    return str(att)
+
+
+def _ticket_header(ticket: dict) -> dict:
+    return {
+        "ticket_id":  ticket.get("id"),
+        "guild_id":   ticket.get("guild_id"),
+        "user_id":    ticket.get("user_id"),
+        "status":     ticket.get("status"),
+        "opened_at":  _ts(ticket.get("opened_at")),
+        "closed_at":  _ts(ticket.get("closed_at")),
+        "transcript": ticket.get("transcript"),
+    }
+
+
+def _message(row: dict) -> dict:
+    return {
+        "id":                 row.get("id"),
+        "author_id":          row.get("author_id"),
+        "author_username":    row.get("author_username"),
+        "sent_at":            _ts(row.get("sent_at")),
+        "original_content":   row.get("original_content"),
+        "translated_content": row.get("translated_content"),
+        "original_language":  row.get("original_language"),
+        "target_language":    row.get("target_language"),
+        "attachments":        _attachments(row.get("attachments_json")),
+    }
+
+
+# ── Formats ─────────────────────────────────────────────────────────────────
+
+def _ndjson_header(ticket: dict) -> str:
+    return json.dumps({"type": "ticket", **_ticket_header(ticket)}, ensure_ascii=False, default=str) + "\n"
+
+
+def _ndjson_message(msg: dict) -> str:
+    return json.dumps({"type": "message", **msg}, ensure_ascii=False, default=str) + "\n"
+
+
+def _ndjson_footer(count: int, error: bool) -> str:
+    return json.dumps({"type": "error" if error else "end", "messages": count}) + "\n"
+
+
+def _html_header(ticket: dict) -> str:
+    head = _ticket_header(ticket)
+    summary = (head["transcript"] or "").strip()
+    parts = [
+        "<!DOCTYPE html>\n<html lang=\"fr\"><head><meta charset=\"utf-8\">",
+        f"<title>Ticket #{head['ticket_id']}</title>",
+        "<style>body{font-family:sans-serif;max-width:900px;margin:2em auto;color:#222}"
+        ".msg{border-bottom:1px solid #eee;padding:.5em 0}.meta{color:#888;font-size:.85em}"
+        ".tr{color:#555;font-style:italic;margin-top:.25em}pre{white-space:pre-wrap;margin:0;font:inherit}</style>",
+        "</head><body>",
+        f"<h1>Ticket #{head['ticket_id']}</h1>",
+        f"<p class=\"meta\">Statut : {html.escape(str(head['status'] or '?'))} — "
+        f"ouvert le {html.escape(head['opened_at'] or '?')}"
+        + (f" — ferme le {html.escape(head['closed_at'])}" if head["closed_at"] else "") + "</p>",
+    ]
+    if summary:
+        parts.append(f"<h2>Resume</h2><pre>{html.escape(summary)}</pre>")
+    parts.append("<h2>Messages</h2>\n")
+    return "\n".join(parts)
+
+
+def _html_message(msg: dict) -> str:
+    author = html.escape(str(msg["author_username"] or msg["author_id"] or "?"))
+    out = [
+        f"<div class=\"msg\"><div class=\"meta\"><b>{author}</b> — {html.escape(msg['sent_at'] or '')}</div>",
+        f"<pre>{html.escape(msg['original_content'] or '')}</pre>",
+    ]
+    if msg["translated_content"]:
+        lang = html.escape(msg["target_language"] or "")
+        out.append(f"<pre class=\"tr\">[{lang}] {html.escape(msg['translated_content'])}</pre>")
+    for att in msg["attachments"]:
+        url = _attachment_url(att)
+        if url.startswith(("https://", "http://")):
+            url = html.escape(url)
+            out.append(f"<div class=\"meta\">📎 <a href=\"{url}\" rel=\"noopener noreferrer\">{url}</a></div>")
+        elif url:
+            out.append(f"<div class=\"meta\">📎 {html.escape(url)}</div>")
+    out.append("</div>\n")
+    return "".join(out)
+
+
+def _html_footer(count: int, error: bool) -> str:
+    note = "Export interrompu" if error else f"{count} message(s)"
+    return f"<p class=\"meta\">{note}</p>\n</body></html>\n"
+
+
+def _txt_header(ticket: dict) -> str:
+    head = _ticket_header(ticket)
+    lines = [
+        f"Ticket #{head['ticket_id']} — statut {head['status'] or '?'}",
+        f"Ouvert le {head['opened_at'] or '?'}" + (f", ferme le {head['closed_at']}" if head["closed_at"] else ""),
+        "",
+    ]
+    summary = (head["transcript"] or "").strip()
+    if summary:
+        lines += ["Resume", "------", summary, ""]
+    lines += ["Messages", "--------", ""]
+    return "\n".join(lines)
+
+
+def _txt_message(msg: dict) -> str:
+    author = msg["author_username"] or msg["author_id"] or "?"
+    lines = [f"[{msg['sent_at'] or ''}] {author}: {msg['original_content'] or ''}"]
+    if msg["translated_content"]:
+        lines.append(f"    [{msg['target_language'] or ''}] {msg['translated_content']}")
+    for att in msg["attachments"]:
+        url = _attachment_url(att)
+        if url:
+            lines.append(f"    [piece jointe] {url}")
+    return "\n".join(lines) + "\n"
+
+
+def _txt_footer(count: int, error: bool) -> str:
+    return "\n[Export interrompu]\n" if error else f"\n-- {count} message(s)\n"
+
+
+_WRITERS = {
+    "ndjson": (_ndjson_header, _ndjson_message, _ndjson_footer),
+    "html":   (_html_header, _html_message, _html_footer),
+    "txt":    (_txt_header, _txt_message, _txt_footer),
+}
+
+
+# ── Flux ────────────────────────────────────────────────────────────────────
+
+def _render(ticket: dict, fmt: str) -> Iterator[str]:
+    header, message, footer = _WRITERS[fmt]
+    yield header(ticket)
+    count = 0
+    error = False
+    try:
+        for row in TicketMessageModel.iter_by_ticket(ticket["id"], TRANSCRIPT_EXPORT_BATCH):
+            yield message(_message(row))
+            count += 1
+    except Exception as e:
+        logger.error(f"✗ Export transcript ticket #{ticket.get('id')} interrompu apres {count} message(s): {e}")
+        error = True
+    yield footer(count, error)
+
+
+def _blocks(chunks: Iterator[str]) -> Iterator[bytes]:
+    """Regroupe en blocs de ~_FLUSH_BYTES ; le premier (en-tete) part immediatement."""
+    buffer: list[bytes] = []
+    size = 0
+    first = True
+    for chunk in chunks:
+        data = chunk.encode("utf-8")
+        buffer.append(data)
+        size += len(data)
+        if first or size >= _FLUSH_BYTES:
+            yield b"".join(buffer)
+            buffer, size, first = [], 0, False
+    if buffer:
+        yield b"".join(buffer)
+
+
+def _gzip(blocks: Iterator[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for block in blocks:
+        # Z_SYNC_FLUSH : le client peut decompresser chaque bloc des sa reception
+        yield compressor.compress(block) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+def accepts_gzip(accept_encoding: str | None) -> bool:
+    """
+    True si l'en-tete Accept-Encoding accepte gzip (q > 0) : "gzip" explicite,
+    sinon "*" ; "gzip;q=0" le refuse.
+    """
+    explicit = wildcard = None
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value.strip())
+                except ValueError:
+                    q = 0.0
+        if coding in ("gzip", "x-gzip"):
+            explicit = max(explicit or 0.0, q)
+        elif coding == "*":
+            wildcard = q
+    if explicit is not None:
+        return explicit > 0
+    return bool(wildcard and wildcard > 0)
+
+
+def stream_transcript(ticket: dict, fmt: str, compress: bool = False) -> Iterator[bytes]:
+    blocks = _blocks(_render(ticket, fmt))
+    return _gzip(blocks) if compress else blocks
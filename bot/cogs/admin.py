@@ -9,8 +9,7 @@ du bot lui-meme et non realisables autrement.
 import discord
 from discord.ext import commands
 from loguru import logger
-from bot.config import BOT_OWNER_DISCORD_ID, VERSION
-from bot.db.models import BotStatusModel
+from bot.config import BOT_OWNER_DISCORD_ID
 import time
 
 _start_time = time.time()
@@ -80,28 +79,6 @@ class AdminCog(commands.Cog):
         except Exception as e:
             await interaction.followup.send(f"Erreur sync: {e}", ephemeral=True)
 
-    # ------------------------------------------------------------------
-    # Heartbeat : le bot met a jour son etat en DB toutes les 5 min
-    # ------------------------------------------------------------------
-
-    @commands.Cog.listener()
-    async def on_ready(self):
-        """Demarre la tache de heartbeat vers la DB."""
-        self.bot.loop.create_task(self._heartbeat_loop())
-
-    async def _heartbeat_loop(self):
-        import asyncio
-        await self.bot.wait_until_ready()
-        while not self.bot.is_closed():
-            try:
-                guild_count = len(self.bot.guilds)
-                user_count  = sum(g.member_count or 0 for g in self.bot.guilds)
-                uptime_sec  = int(time.time() - _start_time)
-                BotStatusModel.update(guild_count, user_count, uptime_sec, VERSION)
-            except Exception as e:
-                logger.error(f"Heartbeat erreur: {e}")
-            await asyncio.sleep(300)  # toutes les 5 minutes
-
 
 async def setup(bot):
     await bot.add_cog(AdminCog(bot))
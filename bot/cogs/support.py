@@ -3,13 +3,29 @@ Cog: Support Public IA - Repond automatiquement dans les channels designes.
 Les commandes de configuration sont gerees via le dashboard.
 """
 
+import re
+import time
+
 import discord
 from discord.ext import commands
 from loguru import logger
-from bot.db.models import GuildModel, SubscriptionModel
-from bot.services.groq_client import GroqClient
+from bot.db.models import SubscriptionModel
+from bot.db.async_models import run_db
+from bot.services.answer_cache import answer_cache
+from bot.services.groq_client import GroqClient, SUPPORT_ERROR_RESPONSES
+from bot.services.guild_cache import guild_config_cache
+from bot.services.knowledge import knowledge_service
 from bot.services.translator import TranslatorService
-from bot.config import MIN_MESSAGE_LENGTH, PLAN_LIMITS, DASHBOARD_URL
+from bot.config import (
+    MIN_MESSAGE_LENGTH, PLAN_LIMITS, DASHBOARD_URL,
+    SUPPORT_STREAMING, SUPPORT_STREAM_EDIT_INTERVAL,
+    SUPPORT_STREAM_FIRST_MIN_CHARS, SUPPORT_STREAM_FIRST_MAX_CHARS,
+)
+
+
+_SENTENCE_END = re.compile(r"[.!?…](?:\s|$)|\n")
+_MAX_MESSAGE_CHARS = 2000
+_STREAM_ERROR_NOTE = "\n\n*(Réponse interrompue suite à une erreur. Si besoin, ouvrez un ticket.)*"
 
 
 class SupportCog(commands.Cog):
@@ -26,7 +42,7 @@ class SupportCog(commands.Cog):
         if message.author.bot or not message.guild:
             return
 
-        guild_config = GuildModel.get(message.guild.id)
+        guild_config = await guild_config_cache.get(message.guild.id)
         if (not guild_config
                 or not guild_config.get("support_channel_id")
                 or not guild_config.get("public_support", 1)
@@ -43,15 +59,53 @@ class SupportCog(commands.Cog):
                 custom_prompt = None
                 if guild_config.get("ai_prompt_enabled") and guild_config.get("ai_custom_prompt"):
                     custom_prompt = guild_config["ai_custom_prompt"]
-                response = self.groq_client.generate_support_response(
-                    message.content,
-                    guild_name=message.guild.name,
-                    language=language,
-                    custom_prompt=custom_prompt
+
+                # Question déjà posée (ou quasi identique) : réponse en cache,
+                # invalidée si le prompt ou la KB de la guild changent.
+                cached = answer_cache.get(message.guild.id, guild_config, language, message.content)
+                if cached is not None:
+                    await message.reply(cached[:_MAX_MESSAGE_CHARS], mention_author=False,
+                                        suppress_embeds=True)
+                    logger.info(f"Reponse support envoyee sur {message.guild.id} (cache)")
+                    return
+
+                # Base de connaissances : réponse directe si la question y figure,
+                # sinon les entrées pertinentes sont données au LLM.
+                kb = await knowledge_service.lookup(
+                    message.guild.id, guild_config.get("kb_version") or 0, message.content
                 )
-                await message.reply(response[:2000], mention_author=False,
-                                    suppress_embeds=True)
-                logger.info(f"Reponse support envoyee sur {message.guild.id}")
+                streamed = False
+                if kb["direct"] is not None:
+                    response = kb["direct"].get("answer") or ""
+                    source = "kb"
+                elif SUPPORT_STREAMING:
+                    # Le message est posté dès la première phrase puis complété.
+                    streamed = True
+                    response = await self._stream_reply(message, self.groq_client.stream_support_response(
+                        message.content,
+                        guild_name=message.guild.name,
+                        language=language,
+                        custom_prompt=custom_prompt,
+                        context=kb["context"],
+                    ))
+                    source = f"llm streamé, {len(kb['context'])} entrée(s) KB"
+                else:
+                    response = await self.groq_client.generate_support_response(
+                        message.content,
+                        guild_name=message.guild.name,
+                        language=language,
+                        custom_prompt=custom_prompt,
+                        context=kb["context"],
+                    )
+                    source = f"llm, {len(kb['context'])} entrée(s) KB"
+
+                if kb["direct"] is None and response and response not in SUPPORT_ERROR_RESPONSES:
+                    answer_cache.put(message.guild.id, guild_config, language,
+                                     message.content, response)
+                if not streamed:
+                    await message.reply(response[:_MAX_MESSAGE_CHARS], mention_author=False,
+                                        suppress_embeds=True)
+                logger.info(f"Reponse support envoyee sur {message.guild.id} ({source})")
 
             except Exception as e:
                 logger.error(f"Erreur support IA: {e}")
@@ -63,6 +117,71 @@ class SupportCog(commands.Cog):
                 except Exception:
                     pass
 
+    async def _stream_reply(self, message: discord.Message, chunks) -> str:
+        """
+        Envoie la réponse au fil du streaming : un premier message dès la
+        première phrase complète, puis des éditions espacées d'au moins
+        SUPPORT_STREAM_EDIT_INTERVAL secondes. Retourne le texte complet.
+
+        Une erreur en cours de génération, une fois du texte reçu, complète le
+        message existant d'une note d'erreur et retourne "" (rien à mettre en cache).
+        """
+        started = time.perf_counter()
+        text = ""
+        reply = None
+        sent = ""
+        last_edit = 0.0
+        edits = 0
+
+        try:
+            async for delta in chunks:
+                text += delta
+                visible = text[:_MAX_MESSAGE_CHARS]
+                if reply is None:
+                    if len(text) < SUPPORT_STREAM_FIRST_MIN_CHARS:
+                        continue
+                    if len(text) < SUPPORT_STREAM_FIRST_MAX_CHARS and not _SENTENCE_END.search(text):
+                        continue
+                    reply = await message.reply(visible, mention_author=False, suppress_embeds=True)
+                    sent, last_edit = visible, time.monotonic()
+                    logger.debug(
+                        f"Support streamé: premier message après {(time.perf_counter() - started) * 1000:.0f}ms"
+                    )
+                elif visible != sent and time.monotonic() - last_edit >= SUPPORT_STREAM_EDIT_INTERVAL:
+                    await reply.edit(content=visible)
+                    sent, last_edit = visible, time.monotonic()
+                    edits += 1
+        except Exception as e:
+            if not text:
+                # Rien d'affiché : l'appelant poste le message d'erreur habituel.
+                raise
+            logger.error(f"Erreur support IA (streaming interrompu après {len(text)} chars): {e}")
+            # Un seul message : le texte partiel, complété d'une note d'erreur.
+            partial = text[:_MAX_MESSAGE_CHARS - len(_STREAM_ERROR_NOTE)].rstrip() + _STREAM_ERROR_NOTE
+            try:
+                if reply is None:
+                    await message.reply(partial, mention_author=False, suppress_embeds=True)
+                else:
+                    await reply.edit(content=partial)
+            except Exception as send_error:
+                logger.warning(f"⚠ Support streamé: note d'erreur non envoyée ({send_error})")
+            # Réponse incomplète : ni mise en cache, ni nouveau message côté appelant.
+            return ""
+
+        visible = text[:_MAX_MESSAGE_CHARS]
+        if reply is None:
+            if visible:
+                await message.reply(visible, mention_author=False, suppress_embeds=True)
+        elif visible != sent:
+            await reply.edit(content=visible)
+            edits += 1
+
+        logger.debug(
+            f"Support streamé: réponse complète en {(time.perf_counter() - started) * 1000:.0f}ms "
+            f"({len(text)} chars, {edits} édition(s))"
+        )
+        return text
+
     # ------------------------------------------------------------------
     # /premium
     # ------------------------------------------------------------------
@@ -103,7 +222,7 @@ class SupportCog(commands.Cog):
     async def subscription_status(self, interaction: discord.Interaction):
         await interaction.response.defer(ephemeral=True)
         try:
-            sub = SubscriptionModel.get(interaction.guild.id)
+            sub = await run_db(SubscriptionModel.get, interaction.guild.id)
             if not sub:
                 embed = discord.Embed(
                     title="Abonnement",
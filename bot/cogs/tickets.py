@@ -8,9 +8,16 @@ from discord.ext import commands
 from loguru import logger
 import json
 
-from bot.db.models import TicketModel, GuildModel, UserModel, TicketMessageModel
+from bot.db.async_models import (
+    AsyncTicketModel, AsyncUserModel, AsyncTicketMessageModel,
+)
 from bot.services.translator import TranslatorService
-from bot.services.groq_client import GroqClient
+from bot.services.groq_client import GroqClient, SUMMARY_ERROR_RESPONSES
+from bot.services.jobs import PermanentJobError, job_worker
+from bot.services.summarizer import RollingSummaryEngine, TicketSummarizer
+from bot.services.guild_cache import guild_config_cache
+from bot.services.priority import PriorityEngine
+from bot.services.ticket_index import open_ticket_index
 from bot.config import TICKET_CHANNEL_PREFIX, BOT_OWNER_DISCORD_ID
 
 
@@ -61,17 +68,34 @@ def _embed_color(raw: str | None) -> discord.Color:
     }.get(n, discord.Color.blue())
 
 
+# Etapes de la fermeture (tâches vai_jobs enchaînées), affichées dans le
+# message de progression.
+_CLOSE_STEPS = {
+    "ticket.close.summary":   "⏳ Génération du résumé… (1/4)",
+    "ticket.close.translate": "⏳ Traduction du résumé… (2/4)",
+    "ticket.close.store":     "⏳ Enregistrement de la transcription… (3/4)",
+    "ticket.close.dm":        "⏳ Envoi du résumé en DM… (4/4)",
+}
+
+_PRIORITY_LABELS = {
+    "low": "Bas",
+    "medium": "Moyen",
+    "high": "Haut",
+    "urgent": "Prioritaire",
+}
+
+
 class TicketsCog(commands.Cog):
     """Tickets de support avec traduction en temps reel."""
 
     @staticmethod
-    def _dominant_language_from_history(ticket_id: int, author_id: int | None = None) -> str | None:
+    async def _dominant_language_from_history(ticket_id: int, author_id: int | None = None) -> str | None:
         """
         Essaie de déduire une langue stable à partir de l'historique
         des messages du ticket pour limiter les faux positifs de détection.
         """
         try:
-            msgs = TicketMessageModel.get_by_ticket(ticket_id)
+            msgs = await AsyncTicketMessageModel.get_by_ticket(ticket_id)
         except Exception:
             return None
 
@@ -113,8 +137,27 @@ class TicketsCog(commands.Cog):
         self.bot         = bot
         self.translator  = TranslatorService()
         self.groq_client = GroqClient()
+        self.priority_engine = PriorityEngine(self.groq_client, self._apply_priority)
+        self.summarizer  = TicketSummarizer(self.groq_client)
+        self.rolling_summaries = RollingSummaryEngine(self.groq_client, self.summarizer)
+        job_worker.register("ticket.close.summary", self._job_close_summary,
+                            on_give_up=self._close_summary_given_up)
+        job_worker.register("ticket.close.translate", self._job_close_translate,
+                            on_give_up=self._close_translate_given_up)
+        job_worker.register("ticket.close.store", self._job_close_store)
+        job_worker.register("ticket.close.dm", self._job_close_dm,
+                            on_give_up=self._close_dm_given_up)
         logger.info("Cog Tickets charge")
 
+    def cog_unload(self):
+        self.priority_engine.shutdown()
+        self.rolling_summaries.shutdown()
+
+    async def _apply_priority(self, ticket_id: int, priority: str) -> None:
+        """Callback du PriorityEngine quand la priorité d'un ticket change."""
+        await AsyncTicketModel.update(ticket_id, priority=priority)
+        logger.debug(f"Priorite ticket {ticket_id} -> {priority}")
+
     def _build_ticket_welcome_embed(self, *, ticket_id: int,
                                    user_language: str | None,
                                    staff_language: str | None,
@@ -147,18 +190,13 @@ class TicketsCog(commands.Cog):
         embed.add_field(name="Langue staff", value=f"`{sl}`", inline=True)
         # Priorité du ticket (bas / moyen / haut / prioritaire)
         pr_raw = (priority or "medium").strip().lower()
-        pr_label = {
-            "low": "Bas",
-            "medium": "Moyen",
-            "high": "Haut",
-            "urgent": "Prioritaire",
-        }.get(pr_raw, pr_raw or "Moyen")
+        pr_label = _PRIORITY_LABELS.get(pr_raw, pr_raw or "Moyen")
         embed.add_field(name="Priorité", value=f"`{pr_label}`", inline=True)
         return embed
 
     async def _try_update_welcome_embed(self, channel: discord.TextChannel, ticket_id: int):
         try:
-            ticket = TicketModel.get(ticket_id)
+            ticket = await AsyncTicketModel.get(ticket_id)
             if not ticket:
                 return
             msg_id = ticket.get("initial_message_id")
@@ -169,7 +207,7 @@ class TicketsCog(commands.Cog):
             except Exception:
                 return
 
-            guild_config = GuildModel.get(int(ticket.get("guild_id") or 0)) or {}
+            guild_config = await guild_config_cache.get(int(ticket.get("guild_id") or 0)) or {}
             embed = self._build_ticket_welcome_embed(
                 ticket_id=ticket_id,
                 user_language=ticket.get("user_language"),
@@ -186,14 +224,23 @@ class TicketsCog(commands.Cog):
         if message.author.bot or not message.guild:
             return
 
-        ticket = TicketModel.get_by_channel(message.channel.id)
+        # Rejet sans DB des channels qui ne sont pas des tickets ouverts.
+        if not open_ticket_index.may_be_ticket(message.channel.id):
+            return
+
+        ticket = await AsyncTicketModel.get_by_channel(message.channel.id)
         if not ticket or ticket["status"] == "closed":
+            # Ticket fermé ailleurs (dashboard) ou channel inconnu : on l'oublie.
+            open_ticket_index.discard(message.channel.id)
+            if ticket:
+                self.priority_engine.forget(ticket["id"])
+                self.rolling_summaries.forget(ticket["id"])
             return
         text = (message.content or "").strip()
         if not text and not message.attachments:
             return
 
-        guild_config = GuildModel.get(message.guild.id) or {}
+        guild_config = await guild_config_cache.get(message.guild.id) or {}
         auto_translate = bool(guild_config.get("auto_translate", 1))
 
         is_ticket_user = message.author.id == ticket["user_id"]
@@ -209,18 +256,18 @@ class TicketsCog(commands.Cog):
             if not ticket_user_lang or ticket_user_lang == "auto":
                 # Si la détection échoue, on tente de se baser sur l'historique du ticket.
                 if not detected_lang:
-                    detected_lang = self._dominant_language_from_history(ticket["id"], message.author.id)
+                    detected_lang = await self._dominant_language_from_history(ticket["id"], message.author.id)
 
                 if detected_lang:
-                    TicketModel.update(ticket["id"], user_language=detected_lang)
+                    await AsyncTicketModel.update(ticket["id"], user_language=detected_lang)
                     ticket["user_language"] = detected_lang
 
                     # Upsert user: keep 'auto' if explicitly set otherwise store detected.
-                    user_db = UserModel.get(message.author.id)
+                    user_db = await AsyncUserModel.get(message.author.id)
                     if not user_db or (user_db.get("preferred_language") in (None, "", "auto")):
-                        UserModel.upsert(message.author.id, message.author.name, detected_lang)
+                        await AsyncUserModel.upsert(message.author.id, message.author.name, detected_lang)
                     else:
-                        UserModel.upsert(message.author.id, message.author.name, user_db.get("preferred_language"))
+                        await AsyncUserModel.upsert(message.author.id, message.author.name, user_db.get("preferred_language"))
 
                     await self._try_update_welcome_embed(message.channel, ticket["id"])
 
@@ -233,7 +280,7 @@ class TicketsCog(commands.Cog):
 
             if auto_translate and user_lang and staff_lang and user_lang != staff_lang:
                 try:
-                    translated_text, from_cache = self.translator.translate_message_for_staff(
+                    translated_text, from_cache = await self.translator.translate_message_for_staff(
                         message.content, user_lang, staff_lang
                     )
                     target_language = staff_lang
@@ -260,7 +307,7 @@ class TicketsCog(commands.Cog):
                         "size": a.size,
                         "content_type": a.content_type,
                     })
-                TicketMessageModel.create(
+                await AsyncTicketMessageModel.create(
                     ticket_id=ticket["id"],
                     author_id=message.author.id,
                     author_username=message.author.name,
@@ -275,31 +322,23 @@ class TicketsCog(commands.Cog):
             except Exception as e:
                 logger.warning(f"DB store ticket message failed (ticket {ticket['id']}): {e}")
 
-            # Priorisation automatique du ticket en fonction de la gravité (côté IA).
-            try:
-                msgs = TicketMessageModel.get_by_ticket(ticket["id"])
-                last = msgs[-40:] if msgs else []
-                conversation = [
-                    {
-                        "author": m.get("author_username") or str(m.get("author_id")),
-                        "content": m.get("original_content") or "",
-                    }
-                    for m in last
-                    if (m.get("original_content") or "").strip()
-                ]
-                if conversation:
-                    lang_for_priority = (
-                        ticket.get("user_language")
-                        or detected_lang
-                        or guild_config.get("default_language")
-                        or "en"
-                    )
-                    new_priority = self.groq_client.classify_ticket_priority(conversation, lang_for_priority)
-                    if new_priority and new_priority != ticket.get("priority"):
-                        TicketModel.update(ticket["id"], priority=new_priority)
-                        ticket["priority"] = new_priority
-            except Exception as e:
-                logger.debug(f"Auto-priorite ticket {ticket['id']} ignoree: {e}")
+            self.rolling_summaries.observe(ticket["id"], staff_lang)
+
+            # Priorisation automatique (côté IA), regroupée et exécutée en arrière-plan.
+            self.priority_engine.observe(
+                ticket["id"],
+                author=message.author.name,
+                content=message.content,
+                message_id=message.id,
+                priority=ticket.get("priority"),
+                language=(
+                    ticket.get("user_language")
+                    or detected_lang
+                    or guild_config.get("default_language")
+                    or "en"
+                ),
+                topic=ticket.get("topic"),
+            )
 
             return
 
@@ -308,7 +347,7 @@ class TicketsCog(commands.Cog):
         if not staff_lang or staff_lang == "auto":
             if detected_lang:
                 staff_lang = detected_lang
-                TicketModel.update(ticket["id"], staff_language=staff_lang)
+                await AsyncTicketModel.update(ticket["id"], staff_language=staff_lang)
                 ticket["staff_language"] = staff_lang
                 await self._try_update_welcome_embed(message.channel, ticket["id"])
             else:
@@ -317,7 +356,7 @@ class TicketsCog(commands.Cog):
         # User language might still be pending if the user hasn't typed yet.
         user_lang = ticket.get("user_language") if ticket.get("user_language") not in (None, "", "auto") else None
         if not user_lang:
-            user_db = UserModel.get(ticket["user_id"])
+            user_db = await AsyncUserModel.get(ticket["user_id"])
             if user_db and user_db.get("preferred_language") not in (None, "", "auto"):
                 user_lang = user_db.get("preferred_language")
 
@@ -326,7 +365,7 @@ class TicketsCog(commands.Cog):
 
         if auto_translate and staff_src_lang and user_lang and staff_src_lang != user_lang:
             try:
-                translated_text, from_cache = self.translator.translate_response_for_user(
+                translated_text, from_cache = await self.translator.translate_response_for_user(
                     message.content, staff_src_lang, user_lang
                 )
                 target_language = user_lang
@@ -353,7 +392,7 @@ class TicketsCog(commands.Cog):
                     "size": a.size,
                     "content_type": a.content_type,
                 })
-            TicketMessageModel.create(
+            await AsyncTicketMessageModel.create(
                 ticket_id=ticket["id"],
                 author_id=message.author.id,
                 author_username=message.author.name,
@@ -368,6 +407,8 @@ class TicketsCog(commands.Cog):
         except Exception as e:
             logger.warning(f"DB store ticket message failed (ticket {ticket['id']}): {e}")
 
+        self.rolling_summaries.observe(ticket["id"], staff_lang)
+
     # ------------------------------------------------------------------
     # /ticket - ouvrir un ticket
     # ------------------------------------------------------------------
@@ -381,7 +422,7 @@ class TicketsCog(commands.Cog):
         except Exception:
             pass
 
-        guild_config = GuildModel.get(interaction.guild.id)
+        guild_config = await guild_config_cache.get(interaction.guild.id)
         if not guild_config:
             await interaction.followup.send(
                 "Le bot n'est pas encore configure sur ce serveur. "
@@ -399,7 +440,7 @@ class TicketsCog(commands.Cog):
             max_open = 1
         if max_open and max_open > 0:
             try:
-                open_count = TicketModel.count_open_by_user(interaction.guild.id, interaction.user.id)
+                open_count = await AsyncTicketModel.count_open_by_user(interaction.guild.id, interaction.user.id)
             except Exception:
                 open_count = 0
             if open_count >= max_open:
@@ -451,7 +492,7 @@ class TicketsCog(commands.Cog):
 
         # Langue: on attend le premier message de l'utilisateur pour detecter.
         # (Ne pas detecter depuis le pseudo: trop peu fiable)
-        user_db = UserModel.get(interaction.user.id)
+        user_db = await AsyncUserModel.get(interaction.user.id)
         if user_db and user_db.get("preferred_language") not in (None, "", "auto"):
             user_language = user_db.get("preferred_language")
         else:
@@ -467,13 +508,14 @@ class TicketsCog(commands.Cog):
         staff_language = guild_config.get("default_language") or "en"
 
         # Creer en DB avec username
-        ticket_id = TicketModel.create(
+        ticket_id = await AsyncTicketModel.create(
             guild_id=interaction.guild.id,
             user_id=interaction.user.id,
             user_username=interaction.user.name,
             channel_id=ticket_channel.id,
             user_language=user_language,
-            staff_language=staff_language
+            staff_language=staff_language,
+            topic=(topic or "").strip()[:100] or None,
         )
         if not ticket_id:
             try:
@@ -486,8 +528,10 @@ class TicketsCog(commands.Cog):
             )
             return
 
+        open_ticket_index.add(ticket_channel.id)
+
         # Upsert utilisateur
-        UserModel.upsert(interaction.user.id, interaction.user.name, user_language)
+        await AsyncUserModel.upsert(interaction.user.id, interaction.user.name, user_language)
 
         # Message de bienvenue
         embed = self._build_ticket_welcome_embed(
@@ -509,7 +553,7 @@ class TicketsCog(commands.Cog):
         except Exception:
             pass
         try:
-            TicketModel.update(ticket_id, initial_message_id=welcome_msg.id)
+            await AsyncTicketModel.update(ticket_id, initial_message_id=welcome_msg.id)
         except Exception:
             pass
 
@@ -527,7 +571,7 @@ class TicketsCog(commands.Cog):
     async def close_ticket(self, interaction: discord.Interaction, reason: str = "Non specifiee"):
         await interaction.response.defer(ephemeral=True)
 
-        ticket = TicketModel.get_by_channel(interaction.channel.id)
+        ticket = await AsyncTicketModel.get_by_channel(interaction.channel.id)
         if not ticket:
             await interaction.followup.send(
                 "Cette commande est reservee aux channels de tickets.", ephemeral=True
@@ -543,98 +587,218 @@ class TicketsCog(commands.Cog):
         if not (is_user or is_staff):
             await interaction.followup.send("Permission refusee.", ephemeral=True)
             return
+        if ticket.get("status") == "closed":
+            await interaction.followup.send("Ce ticket est deja ferme.", ephemeral=True)
+            return
 
-        # Generer le resume IA si disponible + double embed (staff + client)
-        transcript_staff = f"Ticket ferme. Raison : {reason}"
-        transcript_user = None
-        user_lang = None
-        staff_lang = None
-        try:
-            guild_config = GuildModel.get(int(ticket.get("guild_id") or 0)) or {}
-            auto_translate = bool(guild_config.get("auto_translate", 1))
+        # Réponse immédiate : le résumé, la traduction et le DM sont faits par
+        # des tâches en arrière-plan qui mettent à jour ce message.
+        progress = await interaction.channel.send(
+            f"🔒 Ticket fermé par {interaction.user.mention}. {_CLOSE_STEPS['ticket.close.summary']}"
+        )
+        started = await self.begin_close(
+            ticket, reason=reason, closed_by=interaction.user.id,
+            progress_channel_id=interaction.channel.id, progress_message_id=progress.id,
+        )
+        if started is None:
+            await interaction.followup.send("Ce ticket est deja ferme ou n'a pas pu etre ferme.", ephemeral=True)
+            return
+        await interaction.followup.send(
+            "Ticket ferme. Le resume sera publie ici et envoye en DM."
+            if started else "Ticket ferme, mais le resume n'a pas pu etre planifie.",
+            ephemeral=True,
+        )
+        logger.info(f"Ticket {ticket['id']} ferme par {interaction.user.id}")
 
-            # Langues
-            user_lang = ticket.get("user_language") if ticket.get("user_language") not in (None, "", "auto") else None
-            if not user_lang:
-                user_db = UserModel.get(ticket["user_id"])
-                if user_db and user_db.get("preferred_language") not in (None, "", "auto"):
-                    user_lang = user_db.get("preferred_language")
+    # ------------------------------------------------------------------
+    # Fermeture : pipeline de tâches (résumé -> traduction -> stockage -> DM)
+    # ------------------------------------------------------------------
 
-            staff_lang = ticket.get("staff_language") or guild_config.get("default_language") or "en"
-            if staff_lang == "auto":
-                staff_lang = guild_config.get("default_language") or "en"
+    async def begin_close(self, ticket: dict, *, reason: str, closed_by: int,
+                          progress_channel_id: int | None, progress_message_id: int | None) -> bool | None:
+        """
+        Ferme le ticket tout de suite puis planifie la suite. Seul l'appel qui
+        ferme réellement lance le pipeline (/close et bouton simultanés).
+        Retourne None si ce n'est pas cet appel qui a fermé le ticket (déjà
+        fermé ou erreur DB), False si la première tâche n'a pas pu être
+        enregistrée.
+        """
+        if not await AsyncTicketModel.close(ticket["id"], transcript="", close_reason=reason):
+            current = await AsyncTicketModel.get(ticket["id"])
+            if current and current.get("status") == "closed":
+                text = "🔒 Ticket déjà fermé."
+            else:
+                text = "⚠ Fermeture impossible, réessayez."
+            await self._close_progress(
+                {"ticket_id": ticket["id"], "progress_channel_id": progress_channel_id,
+                 "progress_message_id": progress_message_id},
+                text,
+            )
+            return None
+        open_ticket_index.discard(ticket["channel_id"])
+        self.priority_engine.forget(ticket["id"])
+        self.rolling_summaries.forget(ticket["id"])
+
+        payload = {
+            "ticket_id": ticket["id"],
+            "channel_id": ticket["channel_id"],
+            "user_id": ticket["user_id"],
+            "reason": reason,
+            "closed_by": closed_by,
+            "progress_channel_id": progress_channel_id,
+            "progress_message_id": progress_message_id,
+        }
+        job_id = await job_worker.enqueue(
+            "ticket.close.summary", payload, guild_id=ticket.get("guild_id"),
+            dedupe_key=f"ticket.close:{ticket['id']}",
+        )
+        if job_id is None:
+            await self._close_progress(payload, "🔒 Ticket fermé. ⚠ Résumé indisponible.")
+            return False
+        return True
+
+    async def _ticket_languages(self, ticket: dict) -> tuple[str | None, str, bool]:
+        """(langue user, langue staff, traduction auto activée) pour un ticket."""
+        guild_config = await guild_config_cache.get(int(ticket.get("guild_id") or 0)) or {}
+        auto_translate = bool(guild_config.get("auto_translate", 1))
 
-            msgs = TicketMessageModel.get_by_ticket(ticket["id"])
-            # Limiter pour eviter un prompt trop long.
-            last = msgs[-60:] if msgs else []
-            conversation = [
-                {"author": m.get("author_username") or str(m.get("author_id")), "content": m.get("original_content") or ""}
-                for m in last
-            ]
-            lang_for_summary = staff_lang or user_lang or "en"
-            transcript_staff = self.groq_client.generate_ticket_summary(conversation, lang_for_summary)
-
-            if auto_translate and user_lang and lang_for_summary and user_lang != lang_for_summary:
-                try:
-                    transcript_user, _ = self.translator.translate_response_for_user(
-                        transcript_staff, lang_for_summary, user_lang
-                    )
-                except Exception:
-                    transcript_user = None
-        except Exception as e:
-            logger.warning(f"Resume IA non genere: {e}")
+        user_lang = ticket.get("user_language") if ticket.get("user_language") not in (None, "", "auto") else None
+        if not user_lang:
+            user_db = await AsyncUserModel.get(ticket["user_id"])
+            if user_db and user_db.get("preferred_language") not in (None, "", "auto"):
+                user_lang = user_db.get("preferred_language")
 
-        TicketModel.close(ticket["id"], transcript=transcript_staff, close_reason=reason)
+        staff_lang = ticket.get("staff_language") or guild_config.get("default_language") or "en"
+        if staff_lang == "auto":
+            staff_lang = guild_config.get("default_language") or "en"
+        return user_lang, staff_lang, auto_translate
 
-        # Envoyer un resume dans le channel (staff + éventuellement client)
+    async def _close_progress(self, payload: dict, text: str) -> None:
+        """Met à jour le message de progression de la fermeture (best-effort)."""
+        channel_id = payload.get("progress_channel_id")
+        message_id = payload.get("progress_message_id")
+        if not channel_id or not message_id:
+            return
         try:
-            pr_raw = (ticket.get("priority") or "medium").strip().lower()
-            pr_label = {
-                "low": "Bas",
-                "medium": "Moyen",
-                "high": "Haut",
-                "urgent": "Prioritaire",
-            }.get(pr_raw, pr_raw or "Moyen")
-
-            base_embed = discord.Embed(
-                title="Résumé du ticket (staff)",
-                description=transcript_staff or "Aucun résumé généré.",
-                color=discord.Color.greyple(),
-            )
-            base_embed.add_field(name="Priorité", value=f"`{pr_label}`", inline=True)
-            base_embed.add_field(
-                name="Langues",
-                value=f"User: `{(user_lang or 'auto').upper()}` · Staff: `{(staff_lang or 'en').upper()}`",
-                inline=True,
+            channel = self.bot.get_channel(int(channel_id)) or await self.bot.fetch_channel(int(channel_id))
+            await channel.get_partial_message(int(message_id)).edit(content=text)
+        except Exception as e:
+            logger.debug(f"Progression fermeture ticket {payload.get('ticket_id')} ignoree: {e}")
+
+    async def _next_close_step(self, job: dict, job_type: str, **updates) -> None:
+        payload = {**job["payload"], **updates}
+        await self._close_progress(payload, f"🔒 Ticket fermé. {_CLOSE_STEPS[job_type]}")
+        # Une seule étape en attente par ticket, même si la tâche courante est rejouée
+        job_id = await job_worker.enqueue(
+            job_type, payload, guild_id=job.get("guild_id"),
+            dedupe_key=f"{job_type}:{payload['ticket_id']}",
+        )
+        if job_id is None:
+            raise RuntimeError(f"enqueue {job_type} impossible")
+
+    async def _job_close_summary(self, job: dict) -> None:
+        payload = job["payload"]
+        ticket = await AsyncTicketModel.get(payload["ticket_id"])
+        if not ticket:
+            raise PermanentJobError("ticket introuvable")
+
+        user_lang, staff_lang, auto_translate = await self._ticket_languages(ticket)
+        lang_for_summary = staff_lang or user_lang or "en"
+        msgs = await AsyncTicketMessageModel.get_by_ticket(ticket["id"])
+        # Résumé glissant + derniers messages (résumé complet en map-reduce à défaut).
+        summary = await self.rolling_summaries.finalize(ticket, msgs or [], lang_for_summary)
+        if not summary or summary in SUMMARY_ERROR_RESPONSES:
+            raise RuntimeError("résumé IA indisponible")
+
+        await self._next_close_step(
+            job, "ticket.close.translate",
+            summary_staff=summary, summary_language=lang_for_summary,
+            user_lang=user_lang, staff_lang=staff_lang, auto_translate=auto_translate,
+            priority=ticket.get("priority"),
+        )
+
+    async def _close_summary_given_up(self, job: dict, error: str) -> None:
+        # On continue sans résumé IA : transcription minimale, DM quand même.
+        payload = job["payload"]
+        ticket = await AsyncTicketModel.get(payload["ticket_id"]) or {}
+        user_lang, staff_lang, auto_translate = await self._ticket_languages(ticket) if ticket else (None, "en", False)
+        await self._next_close_step(
+            job, "ticket.close.store",
+            summary_staff=f"Ticket ferme. Raison : {payload.get('reason') or 'Non specifiee'}",
+            summary_language=staff_lang, summary_user=None,
+            user_lang=user_lang, staff_lang=staff_lang, auto_translate=False,
+            priority=ticket.get("priority"),
+        )
+
+    async def _job_close_translate(self, job: dict) -> None:
+        payload = job["payload"]
+        user_lang = payload.get("user_lang")
+        source_lang = payload.get("summary_language")
+        summary_user = None
+        if payload.get("auto_translate") and user_lang and source_lang and user_lang != source_lang:
+            summary_user, _ = await self.translator.translate_response_for_user(
+                payload["summary_staff"], source_lang, user_lang
             )
-            await interaction.channel.send(embed=base_embed)
+        await self._next_close_step(job, "ticket.close.store", summary_user=summary_user)
 
-            if transcript_user and user_lang and user_lang != staff_lang:
-                user_embed = discord.Embed(
-                    title="Résumé du ticket (client)",
-                    description=transcript_user,
-                    color=discord.Color.blurple(),
+    async def _close_translate_given_up(self, job: dict, error: str) -> None:
+        await self._next_close_step(job, "ticket.close.store", summary_user=None)
+
+    async def _job_close_store(self, job: dict) -> None:
+        payload = job["payload"]
+        summary_staff = payload.get("summary_staff") or ""
+        if not await AsyncTicketModel.update(payload["ticket_id"], transcript=summary_staff):
+            raise RuntimeError("transcription non enregistrée")
+
+        # Résumé dans le channel du ticket (staff + éventuellement client).
+        try:
+            channel = self.bot.get_channel(int(payload["channel_id"]))
+            if isinstance(channel, discord.TextChannel):
+                pr_raw = (payload.get("priority") or "medium").strip().lower()
+                user_lang = payload.get("user_lang")
+                staff_lang = payload.get("staff_lang")
+                base_embed = discord.Embed(
+                    title="Résumé du ticket (staff)",
+                    description=summary_staff or "Aucun résumé généré.",
+                    color=discord.Color.greyple(),
+                )
+                base_embed.add_field(
+                    name="Priorité", value=f"`{_PRIORITY_LABELS.get(pr_raw, pr_raw or 'Moyen')}`", inline=True
+                )
+                base_embed.add_field(
+                    name="Langues",
+                    value=f"User: `{(user_lang or 'auto').upper()}` · Staff: `{(staff_lang or 'en').upper()}`",
+                    inline=True,
                 )
-                await interaction.channel.send(embed=user_embed)
+                await channel.send(embed=base_embed)
+
+                if payload.get("summary_user") and user_lang and user_lang != staff_lang:
+                    await channel.send(embed=discord.Embed(
+                        title="Résumé du ticket (client)",
+                        description=payload["summary_user"],
+                        color=discord.Color.blurple(),
+                    ))
         except Exception as e:
-            logger.debug(f"Envoi resume fermeture commande ignore: {e}")
+            logger.debug(f"Envoi resume fermeture ticket {payload['ticket_id']} ignore: {e}")
+
+        await self._next_close_step(job, "ticket.close.dm")
 
-        # Envoyer la transcription en DM
+    async def _job_close_dm(self, job: dict) -> None:
+        payload = job["payload"]
         try:
-            user  = await self.bot.fetch_user(ticket["user_id"])
-            embed = discord.Embed(
+            user = await self.bot.fetch_user(int(payload["user_id"]))
+            await user.send(embed=discord.Embed(
                 title="Resume du ticket",
-                description=transcript_user or transcript_staff,
-                color=discord.Color.greyple()
-            )
-            await user.send(embed=embed)
-        except Exception:
-            pass
+                description=payload.get("summary_user") or payload.get("summary_staff") or "Ticket ferme.",
+                color=discord.Color.greyple(),
+            ))
+        except (discord.Forbidden, discord.NotFound) as e:
+            raise PermanentJobError(f"DM impossible: {e}") from e
+        await self._close_progress(payload, "🔒 Ticket fermé. ✅ Résumé publié et envoyé en DM.")
+        logger.info(f"Fermeture ticket {payload['ticket_id']} terminee")
 
-        await interaction.followup.send(
-            "Ticket ferme. Resume envoye en DM.", ephemeral=True
-        )
-        logger.info(f"Ticket {ticket['id']} ferme par {interaction.user.id}")
+    async def _close_dm_given_up(self, job: dict, error: str) -> None:
+        await self._close_progress(job["payload"], "🔒 Ticket fermé. ✅ Résumé publié (⚠ DM impossible).")
 
 
 # ============================================================================
@@ -736,12 +900,10 @@ class TicketCloseView(discord.ui.View):
         super().__init__(timeout=None)
         self.ticket_id = ticket_id
         self.bot       = bot
-        self.translator = TranslatorService()
-        self.groq_client = GroqClient()
 
     @discord.ui.button(label="Fermer le ticket", style=discord.ButtonStyle.danger)
     async def close_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        ticket = TicketModel.get(self.ticket_id)
+        ticket = await AsyncTicketModel.get(self.ticket_id)
         if not ticket:
             await interaction.response.send_message("Ticket introuvable.", ephemeral=True)
             return
@@ -751,89 +913,28 @@ class TicketCloseView(discord.ui.View):
         if not (is_user or is_staff):
             await interaction.response.send_message("Permission refusee.", ephemeral=True)
             return
+        if ticket.get("status") == "closed":
+            await interaction.response.send_message("Ce ticket est deja ferme.", ephemeral=True)
+            return
 
-        # Résumé IA + priorite + double embed (staff + client) best-effort
-        summary_staff = ""
-        summary_user = None
-        user_lang = None
-        staff_lang = None
-        try:
-            guild_config = GuildModel.get(int(ticket.get("guild_id") or 0)) or {}
-            auto_translate = bool(guild_config.get("auto_translate", 1))
-
-            # Langues
-            user_lang = ticket.get("user_language") if ticket.get("user_language") not in (None, "", "auto") else None
-            if not user_lang:
-                user_db = UserModel.get(ticket.get("user_id"))
-                if user_db and user_db.get("preferred_language") not in (None, "", "auto"):
-                    user_lang = user_db.get("preferred_language")
-
-            staff_lang = ticket.get("staff_language") or guild_config.get("default_language") or "en"
-            if staff_lang == "auto":
-                staff_lang = guild_config.get("default_language") or "en"
-
-            msgs = TicketMessageModel.get_by_ticket(self.ticket_id)
-            last = msgs[-60:] if msgs else []
-            conversation = [
-                {"author": m.get("author_username") or str(m.get("author_id")), "content": m.get("original_content") or ""}
-                for m in last
-                if (m.get("original_content") or "").strip()
-            ]
-            lang_for_summary = staff_lang or user_lang or "en"
-            summary_staff = self.groq_client.generate_ticket_summary(conversation, lang_for_summary)
-
-            if auto_translate and user_lang and lang_for_summary and user_lang != lang_for_summary:
-                try:
-                    summary_user, _ = self.translator.translate_response_for_user(
-                        summary_staff, lang_for_summary, user_lang
-                    )
-                except Exception:
-                    summary_user = None
-        except Exception as e:
-            logger.warning(f"Resume IA bouton non genere: {e}")
-            summary_staff = ""
-            summary_user = None
-
-        TicketModel.close(self.ticket_id, transcript=summary_staff, close_reason="Ferme via bouton")
-
-        # Envoyer les embeds de resume dans le channel
-        try:
-            pr_raw = (ticket.get("priority") or "medium").strip().lower()
-            pr_label = {
-                "low": "Bas",
-                "medium": "Moyen",
-                "high": "Haut",
-                "urgent": "Prioritaire",
-            }.get(pr_raw, pr_raw or "Moyen")
-
-            base_embed = discord.Embed(
-                title="Résumé du ticket (staff)",
-                description=summary_staff or "Aucun résumé généré.",
-                color=discord.Color.greyple(),
-            )
-            base_embed.add_field(name="Priorité", value=f"`{pr_label}`", inline=True)
-            base_embed.add_field(
-                name="Langues",
-                value=f"User: `{(user_lang or 'auto').upper()}` · Staff: `{(staff_lang or 'en').upper()}`",
-                inline=True,
-            )
-            channel = interaction.channel
-            if isinstance(channel, discord.TextChannel):
-                await channel.send(embed=base_embed)
+        cog = self.bot.get_cog("TicketsCog")
+        if cog is None:
+            await interaction.response.send_message("Module tickets indisponible.", ephemeral=True)
+            return
 
-                if summary_user and user_lang and user_lang != staff_lang:
-                    user_embed = discord.Embed(
-                        title="Résumé du ticket (client)",
-                        description=summary_user,
-                        color=discord.Color.blurple(),
-                    )
-                    await channel.send(embed=user_embed)
-        except Exception as e:
-            logger.debug(f"Envoi resume fermeture bouton ignore: {e}")
+        # Acquittement immédiat (délai de 3s des interactions) : le message du
+        # bouton sert ensuite de suivi de progression.
         button.disabled = True
         await interaction.response.edit_message(
-            content="Ticket ferme.", view=self
+            content=f"🔒 Ticket fermé. {_CLOSE_STEPS['ticket.close.summary']}", view=self
+        )
+        started = await cog.begin_close(
+            ticket, reason="Ferme via bouton", closed_by=interaction.user.id,
+            progress_channel_id=interaction.channel_id,
+            progress_message_id=interaction.message.id if interaction.message else None,
         )
+        if started is None:
+            return
         logger.info(f"Ticket {self.ticket_id} ferme via bouton par {interaction.user.id}")
 
 
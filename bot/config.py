@@ -58,6 +58,19 @@ GROQ_MODEL_FAST    = "llama-3.1-8b-instant"
 GROQ_MODEL_QUALITY = "llama-3.3-70b-versatile"
 GROQ_DEFAULT_MODEL = GROQ_MODEL_FAST
 
+# Groq - client HTTP partage (un par cle API)
+GROQ_MAX_CONCURRENCY = 16    # appels LLM simultanes max (tous cogs confondus)
+GROQ_TIMEOUT_SECONDS = 30
+
+# Groq - budget par modele et par cle (valeurs de depart, corrigees ensuite par
+# les en-tetes x-ratelimit-* renvoyes par l'API)
+GROQ_MODEL_BUDGETS = {
+    GROQ_MODEL_FAST:    {"requests_per_day": 14400, "tokens_per_minute": 6000},
+    GROQ_MODEL_QUALITY: {"requests_per_day": 1000,  "tokens_per_minute": 12000},
+    "default":          {"requests_per_day": 1000,  "tokens_per_minute": 6000},
+}
+GROQ_RATE_LIMIT_COOLDOWN_SECONDS = 20  # cooldown apres un 429 sans Retry-After
+
 # System Prompts
 SYSTEM_PROMPT_SUPPORT = (
     "Tu es Veridian AI, l'assistant IA du serveur Discord '{guild_name}'.\n"
@@ -76,6 +89,33 @@ SYSTEM_PROMPT_TICKET_SUMMARY = (
     "Reponds dans la langue : {ticket_language}"
 )
 
+# Resume des longs tickets (map-reduce, voir bot/services/summarizer.py)
+SYSTEM_PROMPT_TICKET_CHUNK_SUMMARY = (
+    "Tu resumes un extrait d'un ticket de support Discord (une partie de la conversation).\n"
+    "Donne en 3 a 6 puces les faits importants : demande, informations donnees, "
+    "actions du staff, decisions. Pas d'introduction ni de conclusion.\n"
+    "Reponds dans la langue : {ticket_language}"
+)
+SYSTEM_PROMPT_TICKET_SUMMARY_MERGE = (
+    "Tu es un assistant de support. Voici, dans l'ordre chronologique, les resumes "
+    "successifs des parties d'un long ticket de support Discord.\n"
+    "Genere un resume structure de l'ensemble du ticket :\n"
+    "1. PROBLEME : Ce que l'utilisateur demandait (1-2 phrases)\n"
+    "2. RESOLUTION : Comment le probleme a ete resolu (1-2 phrases)\n"
+    "3. STATUT : Resolu / Non resolu / Partiel\n"
+    "Reponds dans la langue : {ticket_language}"
+)
+
+SYSTEM_PROMPT_TICKET_SUMMARY_UPDATE = (
+    "Tu es un assistant de support. Voici le resume actuel d'un ticket de support Discord "
+    "(peut etre vide) suivi des nouveaux messages.\n"
+    "Mets a jour le resume pour qu'il couvre toute la conversation, au format :\n"
+    "1. PROBLEME : Ce que l'utilisateur demandait (1-2 phrases)\n"
+    "2. RESOLUTION : Comment le probleme a ete resolu (1-2 phrases)\n"
+    "3. STATUT : Resolu / Non resolu / Partiel\n"
+    "Reponds uniquement avec le resume, dans la langue : {ticket_language}"
+)
+
 # OxaPay
 OXAPAY_BASE_URL                      = "https://api.oxapay.com"
 OXAPAY_MERCHANTS_REQUEST_ENDPOINT    = "/merchants/request"
@@ -84,9 +124,88 @@ OXAPAY_MERCHANTS_REQUEST_ENDPOINT    = "/merchants/request"
 TICKET_ARCHIVE_DELAY_HOURS = 24
 TICKET_CHANNEL_PREFIX      = "ticket"
 MIN_MESSAGE_LENGTH         = 3
+TICKET_INDEX_RESYNC_SECONDS = 60  # resynchronisation de l'index des tickets ouverts
+
+# Priorisation automatique des tickets (voir bot/services/priority.py)
+PRIORITY_RECLASSIFY_EVERY   = 5      # reclasser au plus tard tous les N messages utilisateur
+PRIORITY_QUIET_SECONDS      = 20     # ... ou apres N secondes sans nouveau message
+PRIORITY_CONTEXT_MESSAGES   = 12     # messages deja vus gardes comme contexte glissant
+PRIORITY_STATE_IDLE_SECONDS = 21600  # etat oublie apres 6h d'inactivite
+TRIAGE_LOCAL_ENABLED        = False  # triage local avant le LLM (voir bot/services/triage.py)
+# ^ desactive : sur le jeu de validation, aucun seuil n'atteint 90% de precision locale
+#   (20% au mieux) ; a reactiver quand `python -m bot.services.triage` suggere un seuil
+TRIAGE_CONFIDENCE_THRESHOLD = 0.8    # en dessous, le triage local passe la main au LLM
+
+# Cache config guilds (voir bot/services/guild_cache.py)
+GUILD_CONFIG_POLL_SECONDS    = 3      # detection des modifications faites depuis le dashboard
+GUILD_CONFIG_POLL_OVERLAP_MS = 10000  # fenetre relue a chaque poll (commits concurrents)
+GUILD_CONFIG_CACHE_TTL       = 300    # TTL de securite si le poll echoue
+
+# Base de connaissances (support public, voir bot/services/knowledge.py)
+KB_CONTEXT_TOP_K            = 3     # entrees KB injectees dans le prompt
+KB_MIN_CONTEXT_SCORE        = 1.0   # score BM25 minimum pour etre injecte
+KB_DIRECT_ANSWER_SIMILARITY = 0.85  # similarite (Jaccard) question -> reponse KB directe sans LLM
+
+# Support public en streaming : premier message des la premiere phrase, puis
+# editions espacees (Discord limite a ~5 editions / 5s par channel)
+SUPPORT_STREAMING               = True
+SUPPORT_STREAM_EDIT_INTERVAL    = 1.5   # secondes min entre deux editions
+SUPPORT_STREAM_FIRST_MIN_CHARS  = 40    # pas de premier message plus court
+SUPPORT_STREAM_FIRST_MAX_CHARS  = 250   # envoi force si aucune fin de phrase avant
+
+# Cache des reponses du support public (voir bot/services/answer_cache.py)
+ANSWER_CACHE_TTL            = 6 * 3600  # secondes
+ANSWER_CACHE_SIMILARITY     = 0.75      # similarite MinHash minimale pour un quasi-doublon
+ANSWER_CACHE_MAX_PER_GUILD  = 500
+
+# Resume des tickets (map-reduce)
+SUMMARY_DIRECT_MAX_TOKENS       = 3000   # en dessous : un seul appel au modele qualite
+SUMMARY_CHUNK_TOKENS            = 1500   # taille d'une fenetre de messages
+SUMMARY_CHUNK_OUTPUT_TOKENS     = 250    # max_tokens d'un resume partiel
+SUMMARY_PARALLEL_CHUNKS         = 4      # resumes partiels calcules en parallele par ticket
+SUMMARY_MAX_CHUNKS              = 40     # au-dela : premiere fenetre + les plus recentes
+SUMMARY_MERGE_INPUT_TOKENS      = 6000   # au-dela : reduction intermediaire (modele rapide)
+SUMMARY_MESSAGE_MAX_CHARS       = 1500   # un message tres long est tronque
+SUMMARY_CHUNK_CACHE_SIZE        = 2000   # resumes partiels gardes en memoire
+SUMMARY_ROLLING_EVERY           = 10     # rafraichissement du resume glissant apres N messages...
+SUMMARY_ROLLING_QUIET_SECONDS   = 90     # ...ou apres N secondes sans activite
+
+# Cache des sessions dashboard cote API (api/session_cache.py)
+SESSION_CACHE_TTL_SECONDS   = 30     # delai max de prise en compte d'une revocation faite par un autre process API
+SESSION_CACHE_SIZE          = 5000
+
+# Pagination des listes API (tickets, commandes, audit)
+PAGE_MAX_LIMIT              = 200    # taille de page max acceptee par l'API
+
+# Export des transcripts (api/transcript_export.py)
+TRANSCRIPT_EXPORT_BATCH     = 500    # messages lus par requete SQL pendant l'export
+
+# Statistiques globales Super Admin (api/admin_stats.py)
+ADMIN_STATS_REFRESH_SECONDS = 60     # fraicheur max du snapshot servi par /internal/admin/stats (surcharge : env)
+
+# File de taches (vai_jobs, voir bot/services/jobs.py)
+JOB_POLL_SECONDS            = 1      # intervalle de claim quand rien n'a reveille le worker (taches posees par l'API)
+JOB_CONCURRENCY             = 4      # taches executees en parallele par worker
+JOB_MAX_ATTEMPTS            = 5
+JOB_RETRY_BASE_SECONDS      = 5      # backoff : base * 2^(tentative-1), plafonne
+JOB_RETRY_MAX_SECONDS       = 600
+JOB_LOCK_TIMEOUT_SECONDS    = 300    # tache 'running' sans nouvelle -> remise en attente
+JOB_HEARTBEAT_SECONDS       = 60     # prolongation du verrou des taches en cours (bien < JOB_LOCK_TIMEOUT_SECONDS)
+JOB_LATENCY_WINDOW          = 200    # dernieres executions gardees par type pour avg/p95
+JOB_METRICS_WINDOW_SECONDS  = 3600   # fenetre des metriques calculees en DB (/internal/jobs/stats)
+JOB_DONE_RETENTION_DAYS     = 7      # taches 'done' supprimees apres N jours
+JOB_DEAD_RETENTION_DAYS     = 30     # dead-letters supprimees apres N jours
+JOB_PRUNE_EVERY_SECONDS     = 3600
+TEMP_CODE_CLEANUP_SECONDS   = 900    # purge des codes OAuth temporaires (vai_temp_codes)
+JOB_TICKET_OPEN_SYNC        = "ticket_open.sync"  # (re)deploiement / suppression du message d'ouverture (API -> bot)
+JOB_TICKET_STATS_REBUILD    = "stats.tickets.rebuild"  # recalcul des stats tickets pre-agregees (une guild ou toutes)
 
 # Cache traductions
 TRANSLATION_CACHE_HIT_THRESHOLD = 10
+TRANSLATION_MEMORY_CACHE_SIZE = 5000     # entrees gardees en memoire (LRU)
+TRANSLATION_MEMORY_CACHE_TTL  = 3600     # secondes
+TRANSLATION_HOT_CACHE_TTL     = 86400    # TTL memoire des traductions >= TRANSLATION_CACHE_HIT_THRESHOLD hits
+TRANSLATION_HIT_FLUSH_SECONDS = 30       # ecriture groupee des hit_count
 
 # Logging
 LOG_LEVEL = "INFO"
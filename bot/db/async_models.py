@@ -0,0 +1,85 @@
+"""
+Couche d'acces DB asynchrone pour les cogs (discord.py).
+
+Les modeles de `bot.db.models` sont synchrones (mysql.connector). Les appeler
+directement depuis une coroutine bloque l'event loop : heartbeats gateway
+retardes, evenements des autres serveurs en attente...
+
+Ce module execute les appels dans un ThreadPoolExecutor borne (meme taille que
+le pool MySQL, voir DB_POOL_SIZE) et expose des versions awaitables des modeles :
+
+    guild_config = await AsyncGuildModel.get(guild_id)
+    await AsyncTicketModel.update(ticket_id, priority="high")
+"""
+
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from bot.db.models import GuildModel, TicketModel, TicketMessageModel, UserModel
+
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                # Pas plus de threads que de connexions poolees : au-dela, ils
+                # attendraient de toute facon une connexion libre.
+                workers = max(1, int(os.getenv("DB_POOL_SIZE", 10)))
+                _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="vai-db")
+    return _executor
+
+
+async def run_db(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Execute un appel DB synchrone hors de l'event loop et attend son resultat."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), functools.partial(func, *args, **kwargs))
+
+
+def shutdown_db_executor() -> None:
+    """Arrete l'executor (a appeler a l'arret du bot)."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
+
+
+class _AsyncModel:
+    """
+    Proxy awaitable d'un modele synchrone : chaque methode statique du modele
+    devient une coroutine executee via `run_db`.
+    """
+
+    def __init__(self, model_cls):
+        self._model_cls = model_cls
+
+    def __getattr__(self, name: str):
+        func = getattr(self._model_cls, name)
+        if not callable(func):
+            return func
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            return await run_db(func, *args, **kwargs)
+
+        # Cache pour ne pas recreer le wrapper a chaque appel.
+        setattr(self, name, wrapper)
+        return wrapper
+
+    def __repr__(self) -> str:
+        return f"<Async{self._model_cls.__name__}>"
+
+
+AsyncGuildModel         = _AsyncModel(GuildModel)
+AsyncTicketModel        = _AsyncModel(TicketModel)
+AsyncTicketMessageModel = _AsyncModel(TicketMessageModel)
+AsyncUserModel          = _AsyncModel(UserModel)
@@ -1,9 +1,16 @@
 """
 Gestionnaire de connexion MySQL pour Veridian AI
 Pattern standard à utiliser dans tout le projet
+
+Les connexions sont réutilisées via un pool (voir ConnectionPool) : chaque
+`get_db_context()` emprunte une connexion déjà authentifiée au lieu de refaire
+un handshake TCP + auth MySQL à chaque requête.
 """
 
 import os
+import threading
+import time
+from collections import deque
 import mysql.connector
 from mysql.connector import Error
 from loguru import logger
@@ -14,10 +21,10 @@ def get_connection():
     """
     Crée et retourne une connexion MySQL.
     Utilise les variables d'environnement pour la configuration.
-    
+
     Returns:
         mysql.connector.MySQLConnection: Connexion MySQL
-        
+
     Raises:
         Error: Si la connexion échoue
     """
@@ -38,26 +45,260 @@ def get_connection():
         raise
 
 
+class _PooledConnection:
+    """Connexion empruntée au pool + métadonnées de cycle de vie."""
+
+    __slots__ = ("conn", "created_at", "last_used_at", "pooled")
+
+    def __init__(self, conn, pooled: bool = True):
+        now = time.monotonic()
+        self.conn = conn
+        self.created_at = now
+        self.last_used_at = now
+        # False = connexion "overflow" ouverte quand le pool est epuise (fermee au retour).
+        self.pooled = pooled
+
+
+class ConnectionPool:
+    """
+    Pool de connexions MySQL thread-safe.
+
+    - `size` connexions maximum gardees ouvertes et reutilisees (LIFO).
+    - Health check a l'emprunt : ping si la connexion est restee inactive
+      plus de `ping_after` secondes, reconnexion transparente sinon.
+    - Recyclage : une connexion plus vieille que `max_lifetime` est fermee
+      et remplacee (evite les coupures wait_timeout / failover MySQL).
+    - Epuisement : on attend jusqu'a `timeout` secondes, puis on ouvre une
+      connexion hors pool (jamais de blocage infini) et on le comptabilise.
+    """
+
+    def __init__(self, size: int = 10, max_lifetime: float = 1800.0,
+                 timeout: float = 5.0, ping_after: float = 10.0):
+        self.size = max(1, int(size))
+        self.max_lifetime = float(max_lifetime)
+        self.timeout = float(timeout)
+        self.ping_after = float(ping_after)
+
+        self._idle: deque[_PooledConnection] = deque()
+        self._open = 0
+        self._cond = threading.Condition()
+
+        self._stats = {
+            "checkouts": 0,
+            "created": 0,
+            "recycled": 0,
+            "health_failures": 0,
+            "waits": 0,
+            "exhausted": 0,
+            "overflow_opened": 0,
+            "wait_time_total_ms": 0.0,
+        }
+
+    # ------------------------------------------------------------------
+    # Emprunt / restitution
+    # ------------------------------------------------------------------
+
+    def acquire(self) -> _PooledConnection:
+        started = time.monotonic()
+        deadline = started + self.timeout
+        create = False
+        overflow = False
+        item = None
+
+        with self._cond:
+            self._stats["checkouts"] += 1
+            waited = False
+            while True:
+                if self._idle:
+                    item = self._idle.pop()
+                    break
+                if self._open < self.size:
+                    self._open += 1
+                    create = True
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats["exhausted"] += 1
+                    self._stats["overflow_opened"] += 1
+                    overflow = True
+                    break
+                if not waited:
+                    self._stats["waits"] += 1
+                    waited = True
+                self._cond.wait(remaining)
+            self._stats["wait_time_total_ms"] += (time.monotonic() - started) * 1000
+
+        if overflow:
+            logger.warning(
+                f"⚠ Pool MySQL epuise ({self.size} connexions occupees depuis {self.timeout:.1f}s) "
+                f"-> connexion hors pool"
+            )
+            return _PooledConnection(get_connection(), pooled=False)
+
+        if create:
+            return self._create_pooled()
+
+        return self._validate(item)
+
+    def release(self, item: _PooledConnection, *, broken: bool = False) -> None:
+        if not item.pooled:
+            self._close_quietly(item.conn)
+            return
+
+        if not broken and self._is_expired(item):
+            with self._cond:
+                self._stats["recycled"] += 1
+            broken = True
+
+        if broken:
+            self._close_quietly(item.conn)
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            return
+
+        item.last_used_at = time.monotonic()
+        with self._cond:
+            self._idle.append(item)
+            self._cond.notify()
+
+    # ------------------------------------------------------------------
+    # Internes
+    # ------------------------------------------------------------------
+
+    def _create_pooled(self) -> _PooledConnection:
+        try:
+            conn = get_connection()
+        except Exception:
+            # Libere la place reservee pour ne pas "perdre" un slot du pool.
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._stats["created"] += 1
+        return _PooledConnection(conn)
+
+    def _is_expired(self, item: _PooledConnection) -> bool:
+        return self.max_lifetime > 0 and (time.monotonic() - item.created_at) >= self.max_lifetime
+
+    def _validate(self, item: _PooledConnection) -> _PooledConnection:
+        """Health check a l'emprunt : recycle si trop vieille, ping si inactive."""
+        if self._is_expired(item):
+            with self._cond:
+                self._stats["recycled"] += 1
+            self._close_quietly(item.conn)
+            return self._replace()
+
+        if (time.monotonic() - item.last_used_at) >= self.ping_after:
+            try:
+                healthy = item.conn.is_connected()
+            except Exception:
+                healthy = False
+            if not healthy:
+                with self._cond:
+                    self._stats["health_failures"] += 1
+                logger.debug("Connexion MySQL du pool invalide -> remplacement")
+                self._close_quietly(item.conn)
+                return self._replace()
+
+        return item
+
+    def _replace(self) -> _PooledConnection:
+        # Le slot reste reserve (self._open inchange) : on recree simplement la connexion.
+        try:
+            conn = get_connection()
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._stats["created"] += 1
+        return _PooledConnection(conn)
+
+    @staticmethod
+    def _close_quietly(conn) -> None:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def stats(self) -> dict:
+        with self._cond:
+            out = dict(self._stats)
+            out["size"] = self.size
+            out["open"] = self._open
+            out["idle"] = len(self._idle)
+            out["in_use"] = self._open - len(self._idle)
+        checkouts = out["checkouts"] or 1
+        out["avg_wait_ms"] = round(out.pop("wait_time_total_ms") / checkouts, 3)
+        return out
+
+    def close_all(self) -> None:
+        with self._cond:
+            items = list(self._idle)
+            self._idle.clear()
+            self._open -= len(items)
+            self._cond.notify_all()
+        for item in items:
+            self._close_quietly(item.conn)
+
+
+_pool: ConnectionPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """Retourne le pool global (cree a la premiere utilisation, apres load_dotenv)."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    size=int(os.getenv("DB_POOL_SIZE", 10)),
+                    max_lifetime=float(os.getenv("DB_POOL_MAX_LIFETIME", 1800)),
+                    timeout=float(os.getenv("DB_POOL_TIMEOUT", 5)),
+                    ping_after=float(os.getenv("DB_POOL_PING_AFTER", 10)),
+                )
+                logger.info(f"✓ Pool MySQL initialise (taille: {_pool.size})")
+    return _pool
+
+
+def get_pool_stats() -> dict:
+    """Metriques du pool (emprunts, attentes, epuisements, recyclages...)."""
+    if _pool is None:
+        return {}
+    return _pool.stats()
+
+
 @contextmanager
 def get_db_context():
     """
     Context manager pour gérer automatiquement les connexions MySQL.
-    Assure la fermeture correcte de la connexion même en cas d'erreur.
-    
+    Emprunte une connexion au pool et la restitue (commit/rollback fait)
+    même en cas d'erreur.
+
     Usage:
         with get_db_context() as conn:
             cursor = conn.cursor(dictionary=True)
             cursor.execute("SELECT * FROM vai_guilds")
             results = cursor.fetchall()
     """
-    connection = get_connection()
+    pool = get_pool()
+    item = pool.acquire()
+    connection = item.conn
+    broken = False
     try:
         yield connection
         connection.commit()
     except Exception as e:
         logger.error(f"✗ Erreur DB: {e}")
-        connection.rollback()
+        try:
+            connection.rollback()
+        except Exception:
+            # Connexion probablement coupee : ne pas la remettre dans le pool.
+            broken = True
         raise
     finally:
-        connection.close()
-        logger.debug("✓ Connexion MySQL fermée")
+        pool.release(item, broken=broken)
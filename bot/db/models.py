@@ -2,17 +2,84 @@
 Modeles et fonctions CRUD pour toutes les tables Veridian AI v0.2
 """
 
+import base64
+import json
 from datetime import datetime, timedelta
 from bot.db.connection import get_db_context
 from bot.config import DB_TABLE_PREFIX
 from loguru import logger
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterator
 
 
 # ============================================================================
 # VAI_GUILDS
 # ============================================================================
 
+# Version de config = timestamp MySQL en millisecondes (horloge commune API / bot).
+_CONFIG_VERSION_NOW = "CAST(UNIX_TIMESTAMP(NOW(3)) * 1000 AS UNSIGNED)"
+
+# Bornes en plage (et non DATE()/YEAR()/MONTH() sur la colonne) : MySQL peut
+# utiliser idx_opened / idx_paid au lieu de parcourir toute la table.
+_TODAY_START = "CURDATE()"
+_TOMORROW_START = "CURDATE() + INTERVAL 1 DAY"
+_MONTH_START = "CURDATE() - INTERVAL (DAYOFMONTH(CURDATE()) - 1) DAY"
+_NEXT_MONTH_START = f"({_MONTH_START}) + INTERVAL 1 MONTH"
+
+
+# Pagination par curseur (keyset) : le curseur, opaque pour le client, encode la
+# cle de tri (horodatage, id) de la derniere ligne renvoyee. La page suivante
+# reprend juste apres via l'index (..., horodatage, id), quelle que soit sa
+# profondeur, la ou OFFSET relit toutes les lignes precedentes.
+def _encode_cursor(ts, row_id: int) -> str:
+    raw = json.dumps({"t": str(ts), "i": int(row_id)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple:
+    """(datetime, id) ; ValueError si le curseur est invalide."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        return datetime.fromisoformat(data["t"]), int(data["i"])
+    except Exception:
+        raise ValueError("Curseur de pagination invalide")
+
+
+def _keyset_page(cursor, table: str, ts_col: str, where: List[str], params: List,
+                 limit: int, after: str = None) -> Dict[str, Any]:
+    """
+    Page triee par (ts_col DESC, id DESC) :
+    {"rows": [...], "next_cursor": str | None (None = derniere page)}.
+    """
+    clauses, args = list(where), list(params)
+    if after:
+        ts, last_id = _decode_cursor(after)
+        clauses.append(f"({ts_col} < %s OR ({ts_col} = %s AND id < %s))")
+        args += [ts, ts, last_id]
+    query = f"SELECT * FROM {table}"
+    if clauses:
+        query += " WHERE " + " AND ".join(clauses)
+    query += f" ORDER BY {ts_col} DESC, id DESC LIMIT %s"
+    cursor.execute(query, (*args, limit + 1))
+    rows = cursor.fetchall()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_cursor(rows[-1][ts_col], rows[-1]["id"])
+    return {"rows": rows, "next_cursor": next_cursor}
+
+
+def _estimated_rows(cursor, table: str) -> int:
+    """Nombre de lignes estime par InnoDB (information_schema), sans COUNT(*)."""
+    cursor.execute(
+        "SELECT table_rows AS table_rows FROM information_schema.tables "
+        "WHERE table_schema = DATABASE() AND table_name = %s",
+        (table,),
+    )
+    row = cursor.fetchone()
+    return int(row["table_rows"] or 0) if row else 0
+
+
 class GuildModel:
 
     @staticmethod
@@ -21,9 +88,9 @@ class GuildModel:
             cursor = conn.cursor()
             try:
                 query = f"""
-                    INSERT INTO {DB_TABLE_PREFIX}guilds (id, name, tier)
-                    VALUES (%s, %s, %s)
-                    ON DUPLICATE KEY UPDATE name = VALUES(name)
+                    INSERT INTO {DB_TABLE_PREFIX}guilds (id, name, tier, config_version)
+                    VALUES (%s, %s, %s, {_CONFIG_VERSION_NOW})
+                    ON DUPLICATE KEY UPDATE name = VALUES(name), config_version = {_CONFIG_VERSION_NOW}
                 """
                 cursor.execute(query, (guild_id, name, tier))
                 logger.info(f"Guild {guild_id} cree/mis a jour")
@@ -54,7 +121,11 @@ class GuildModel:
             cursor = conn.cursor()
             set_clause = ", ".join([f"{k} = %s" for k in kwargs.keys()])
             values = list(kwargs.values()) + [guild_id]
-            query = f"UPDATE {DB_TABLE_PREFIX}guilds SET {set_clause} WHERE id = %s"
+            # Toute écriture change la version : les caches du bot la détectent (voir guild_cache.py).
+            query = (
+                f"UPDATE {DB_TABLE_PREFIX}guilds SET {set_clause}, "
+                f"config_version = {_CONFIG_VERSION_NOW} WHERE id = %s"
+            )
             try:
                 cursor.execute(query, values)
                 logger.info(f"Guild {guild_id} mis a jour: {list(kwargs.keys())}")
@@ -63,6 +134,24 @@ class GuildModel:
                 logger.error(f"Erreur mise a jour guild: {e}")
                 return False
 
+    @staticmethod
+    def get_changed_since(config_version: int) -> List[Dict]:
+        """Guilds modifiées depuis une version donnée (poll du cache de config du bot)."""
+        with get_db_context() as conn:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(
+                f"SELECT * FROM {DB_TABLE_PREFIX}guilds WHERE config_version > %s",
+                (int(config_version),)
+            )
+            return cursor.fetchall()
+
+    @staticmethod
+    def get_max_config_version() -> int:
+        with get_db_context() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT COALESCE(MAX(config_version), 0) FROM {DB_TABLE_PREFIX}guilds")
+            return int(cursor.fetchone()[0] or 0)
+
     @staticmethod
     def get_ids() -> List[int]:
         """Retourne tous les IDs de guilds enregistrees."""
@@ -72,16 +161,19 @@ class GuildModel:
             return [int(row[0]) for row in cursor.fetchall()]
 
     @staticmethod
-    def get_needing_ticket_open_deploy(limit: int = 25) -> List[Dict]:
-        """Retourne les guilds qui ont un déploiement du message d'ouverture en attente."""
+    def get_pending_ticket_open_ids() -> List[int]:
+        """
+        Guilds avec un déploiement ou une suppression du message d'ouverture en
+        attente. Sert au rattrapage au démarrage du bot (les demandes passent
+        sinon par la file vai_jobs).
+        """
         with get_db_context() as conn:
-            cursor = conn.cursor(dictionary=True)
-            # Some deployments may not have updated_at column; keep it portable.
+            cursor = conn.cursor()
             cursor.execute(
-                f"SELECT * FROM {DB_TABLE_PREFIX}guilds WHERE ticket_open_needs_deploy = 1 ORDER BY created_at DESC LIMIT %s",
-                (int(limit),)
+                f"SELECT id FROM {DB_TABLE_PREFIX}guilds WHERE ticket_open_needs_deploy = 1 "
+                f"UNION SELECT id FROM {DB_TABLE_PREFIX}guilds WHERE ticket_open_delete_requested = 1"
             )
-            return cursor.fetchall()
+            return [int(row[0]) for row in cursor.fetchall()]
 
     @staticmethod
     def ack_ticket_open_deploy(guild_id: int, *, message_id: int | None) -> bool:
@@ -192,31 +284,40 @@ class TicketModel:
     @staticmethod
     def create(guild_id: int, user_id: int, channel_id: int,
                user_language: str | None, staff_language: str = 'en',
-               user_username: str = None) -> Optional[int]:
+               user_username: str = None, topic: str = None) -> Optional[int]:
         with get_db_context() as conn:
             cursor = conn.cursor()
             try:
-                try:
-                    query = f"""
-                        INSERT INTO {DB_TABLE_PREFIX}tickets
-                        (guild_id, user_id, user_username, channel_id, user_language, staff_language, status)
-                        VALUES (%s, %s, %s, %s, %s, %s, 'open')
-                    """
-                    cursor.execute(query, (guild_id, user_id, user_username,
-                                           channel_id, user_language, staff_language))
-                except Exception as e:
-                    # Backward compatible with older schemas missing `user_username`.
-                    msg = str(e).lower()
-                    if "unknown column" in msg and "user_username" in msg:
+                columns = {
+                    "guild_id": guild_id,
+                    "user_id": user_id,
+                    "user_username": user_username,
+                    "channel_id": channel_id,
+                    "user_language": user_language,
+                    "staff_language": staff_language,
+                    "topic": topic,
+                }
+                while True:
+                    try:
                         query = f"""
                             INSERT INTO {DB_TABLE_PREFIX}tickets
-                            (guild_id, user_id, channel_id, user_language, staff_language, status)
-                            VALUES (%s, %s, %s, %s, %s, 'open')
+                            ({", ".join(columns)}, status)
+                            VALUES ({", ".join(["%s"] * len(columns))}, 'open')
                         """
-                        cursor.execute(query, (guild_id, user_id, channel_id, user_language, staff_language))
-                    else:
-                        raise
+                        cursor.execute(query, tuple(columns.values()))
+                        break
+                    except Exception as e:
+                        # Backward compatible with older schemas missing optional columns.
+                        msg = str(e).lower()
+                        missing = next(
+                            (c for c in ("user_username", "topic") if c in columns and c in msg),
+                            None,
+                        )
+                        if "unknown column" not in msg or missing is None:
+                            raise
+                        columns.pop(missing)
                 ticket_id = cursor.lastrowid
+                GuildStatsModel.on_ticket_created(cursor, guild_id, user_language)
                 logger.info(f"Ticket {ticket_id} cree pour guild {guild_id}")
                 return ticket_id
             except Exception as e:
@@ -240,6 +341,17 @@ class TicketModel:
             )
             return cursor.fetchone()
 
+    @staticmethod
+    def get_open_channel_ids() -> List[int]:
+        """channel_id de tous les tickets non fermés (index mémoire du bot)."""
+        with get_db_context() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"SELECT channel_id FROM {DB_TABLE_PREFIX}tickets "
+                f"WHERE status IN ('open','in_progress') AND channel_id IS NOT NULL"
+            )
+            return [row[0] for row in cursor.fetchall()]
+
     @staticmethod
     def get_by_guild(guild_id: int, status: str = None,
                      page: int = 1, limit: int = 50) -> List[Dict]:
@@ -250,18 +362,32 @@ class TicketModel:
                 cursor.execute(
                     f"SELECT * FROM {DB_TABLE_PREFIX}tickets "
                     f"WHERE guild_id = %s AND status = %s "
-                    f"ORDER BY opened_at DESC LIMIT %s OFFSET %s",
+                    f"ORDER BY opened_at DESC, id DESC LIMIT %s OFFSET %s",
                     (guild_id, status, limit, offset)
                 )
             else:
                 cursor.execute(
                     f"SELECT * FROM {DB_TABLE_PREFIX}tickets "
                     f"WHERE guild_id = %s "
-                    f"ORDER BY opened_at DESC LIMIT %s OFFSET %s",
+                    f"ORDER BY opened_at DESC, id DESC LIMIT %s OFFSET %s",
                     (guild_id, limit, offset)
                 )
             return cursor.fetchall()
 
+    @staticmethod
+    def page_by_guild(guild_id: int, status: str = None, limit: int = 50,
+                      cursor: str = None) -> Dict[str, Any]:
+        """Tickets du plus recent au plus ancien, pagines par curseur (idx_guild_opened / idx_guild_status_opened)."""
+        where, params = ["guild_id = %s"], [guild_id]
+        if status:
+            where.append("status = %s")
+            params.append(status)
+        with get_db_context() as conn:
+            return _keyset_page(
+                conn.cursor(dictionary=True), f"{DB_TABLE_PREFIX}tickets", "opened_at",
+                where, params, limit, cursor,
+            )
+
     @staticmethod
     def count_by_guild(guild_id: int, status: str = None) -> int:
         with get_db_context() as conn:
@@ -285,8 +411,7 @@ class TicketModel:
             cursor.execute(
                 f"SELECT COUNT(*) FROM {DB_TABLE_PREFIX}tickets "
                 f"WHERE guild_id = %s "
-                f"AND YEAR(opened_at) = YEAR(CURDATE()) "
-                f"AND MONTH(opened_at) = MONTH(CURDATE())",
+                f"AND opened_at >= {_MONTH_START} AND opened_at < {_NEXT_MONTH_START}",
                 (guild_id,),
             )
             return cursor.fetchone()[0]
@@ -296,21 +421,31 @@ class TicketModel:
         with get_db_context() as conn:
             cursor = conn.cursor()
             cursor.execute(
-                f"SELECT COUNT(*) FROM {DB_TABLE_PREFIX}tickets WHERE DATE(opened_at) = CURDATE()"
+                f"SELECT COUNT(*) FROM {DB_TABLE_PREFIX}tickets "
+                f"WHERE opened_at >= {_TODAY_START} AND opened_at < {_TOMORROW_START}"
             )
             return cursor.fetchone()[0]
 
     @staticmethod
     def close(ticket_id: int, transcript: str = "", close_reason: str = "") -> bool:
+        """
+        Ferme le ticket s'il ne l'est pas deja. False si un autre appel l'a
+        ferme avant (ou erreur DB) : seul l'appelant qui ferme reellement
+        doit lancer la suite (resume, DM, stats).
+        """
         with get_db_context() as conn:
             cursor = conn.cursor()
             query = f"""
                 UPDATE {DB_TABLE_PREFIX}tickets
                 SET status = 'closed', transcript = %s, close_reason = %s, closed_at = NOW()
-                WHERE id = %s
+                WHERE id = %s AND status <> 'closed'
             """
             try:
+                before = GuildStatsModel.lock_ticket(cursor, ticket_id)
                 cursor.execute(query, (transcript, close_reason, ticket_id))
+                if cursor.rowcount <= 0:
+                    return False
+                GuildStatsModel.on_ticket_changed(cursor, before, {"status": "closed"})
                 logger.info(f"Ticket {ticket_id} ferme")
                 return True
             except Exception as e:
@@ -327,12 +462,40 @@ class TicketModel:
             values = list(kwargs.values()) + [ticket_id]
             query = f"UPDATE {DB_TABLE_PREFIX}tickets SET {set_clause} WHERE id = %s"
             try:
+                before = None
+                if GuildStatsModel.TRACKED_COLUMNS & kwargs.keys():
+                    before = GuildStatsModel.lock_ticket(cursor, ticket_id)
                 cursor.execute(query, values)
+                if before:
+                    GuildStatsModel.on_ticket_changed(cursor, before, kwargs)
                 return True
             except Exception as e:
                 logger.error(f"Erreur update ticket: {e}")
                 return False
 
+    @staticmethod
+    def set_rolling_summary(ticket_id: int, summary: str, language: str, last_message_id: int) -> bool:
+        """
+        Enregistre le résumé glissant. Ignoré si un résumé couvrant des messages
+        plus récents a déjà été écrit (rafraîchissements concurrents).
+        """
+        with get_db_context() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(
+                    f"""
+                    UPDATE {DB_TABLE_PREFIX}tickets
+                    SET rolling_summary = %s, rolling_summary_language = %s,
+                        rolling_summary_message_id = %s, rolling_summary_at = NOW()
+                    WHERE id = %s AND COALESCE(rolling_summary_message_id, 0) <= %s
+                    """,
+                    (summary, language, last_message_id, ticket_id, last_message_id)
+                )
+                return cursor.rowcount > 0
+            except Exception as e:
+                logger.error(f"Erreur resume glissant ticket {ticket_id}: {e}")
+                return False
+
     @staticmethod
     def get_language_stats(guild_id: int) -> List[Dict]:
         with get_db_context() as conn:
@@ -359,6 +522,247 @@ class TicketModel:
             return cursor.fetchall()
 
 
+# ============================================================================
+# VAI_GUILD_TICKET_STATS / VAI_GUILD_TICKET_DAILY - Statistiques pre-agregees
+# ============================================================================
+
+class GuildStatsModel:
+    """
+    Compteurs de tickets par guild, tenus à jour dans la même transaction que
+    l'écriture du ticket (TicketModel.create / close / update) :
+
+    - vai_guild_ticket_stats : tickets par statut + total ;
+    - vai_guild_ticket_daily : par jour, tickets ouverts ('opened'), fermés
+      ('closed'), et ouverts par langue ('language') et priorité ('priority').
+
+    Les langue/priorité sont comptées au jour d'ouverture du ticket : un
+    changement déplace le ticket d'un compteur à l'autre. Une erreur sur les
+    compteurs (tables absentes...) n'empêche jamais l'écriture du ticket ;
+    `rebuild()` recalcule une guild depuis vai_tickets (job de rattrapage).
+    """
+
+    TRACKED_COLUMNS = frozenset({"status", "user_language", "priority"})
+    _STATUS_COLUMNS = {"open": "open_count", "in_progress": "in_progress_count", "closed": "closed_count"}
+
+    @staticmethod
+    def lock_ticket(cursor, ticket_id: int) -> Optional[Dict]:
+        """Etat du ticket avant modification (verrouillé jusqu'à la fin de la transaction)."""
+        try:
+            cursor.execute(
+                f"SELECT guild_id, status, user_language, priority, DATE(opened_at) AS opened_day "
+                f"FROM {DB_TABLE_PREFIX}tickets WHERE id = %s FOR UPDATE",
+                (ticket_id,)
+            )
+            row = cursor.fetchone()
+        except Exception as e:
+            logger.warning(f"Stats tickets: lecture ticket {ticket_id}: {e}")
+            return None
+        if not row:
+            return None
+        if not isinstance(row, dict):
+            keys = ("guild_id", "status", "user_language", "priority", "opened_day")
+            row = dict(zip(keys, row))
+        return row
+
+    @staticmethod
+    def _bump(cursor, guild_id: int, totals: Dict[str, int], daily: List[tuple]) -> None:
+        """
+        totals : {colonne: delta} ; daily : [(jour | None=aujourd'hui, dimension, valeur, delta)].
+        """
+        if totals:
+            columns = list(totals)
+            cursor.execute(
+                f"INSERT INTO {DB_TABLE_PREFIX}guild_ticket_stats (guild_id, {', '.join(columns)}) "
+                f"VALUES (%s, {', '.join(['GREATEST(0, %s)'] * len(columns))}) "
+                f"ON DUPLICATE KEY UPDATE "
+                + ", ".join(f"{c} = GREATEST(0, CAST({c} AS SIGNED) + %s)" for c in columns),
+                (guild_id, *totals.values(), *totals.values())
+            )
+        for day, dimension, value, delta in daily:
+            cursor.execute(
+                f"INSERT INTO {DB_TABLE_PREFIX}guild_ticket_daily (guild_id, day, dimension, dim_value, ticket_count) "
+                f"VALUES (%s, COALESCE(%s, CURDATE()), %s, %s, GREATEST(0, %s)) "
+                f"ON DUPLICATE KEY UPDATE ticket_count = GREATEST(0, CAST(ticket_count AS SIGNED) + %s)",
+                (guild_id, day, dimension, (value or "")[:32], delta, delta)
+            )
+
+    @staticmethod
+    def on_ticket_created(cursor, guild_id: int, user_language: str | None, priority: str = "medium") -> None:
+        try:
+            GuildStatsModel._bump(
+                cursor, guild_id,
+                {"open_count": 1, "total_count": 1},
+                [(None, "opened", "", 1), (None, "language", user_language, 1), (None, "priority", priority, 1)],
+            )
+        except Exception as e:
+            logger.warning(f"Stats tickets (creation) guild {guild_id}: {e}")
+
+    @staticmethod
+    def on_ticket_changed(cursor, before: Optional[Dict], changes: Dict) -> None:
+        if not before:
+            return
+        guild_id = before["guild_id"]
+        totals: Dict[str, int] = {}
+        daily: List[tuple] = []
+
+        old_status, new_status = before.get("status"), changes.get("status", before.get("status"))
+        if new_status != old_status:
+            old_col = GuildStatsModel._STATUS_COLUMNS.get(old_status)
+            new_col = GuildStatsModel._STATUS_COLUMNS.get(new_status)
+            if old_col:
+                totals[old_col] = totals.get(old_col, 0) - 1
+            if new_col:
+                totals[new_col] = totals.get(new_col, 0) + 1
+            if new_status == "closed":
+                daily.append((None, "closed", "", 1))
+
+        for column, dimension in (("user_language", "language"), ("priority", "priority")):
+            if column in changes and (changes[column] or "") != (before.get(column) or ""):
+                daily.append((before.get("opened_day"), dimension, before.get(column), -1))
+                daily.append((before.get("opened_day"), dimension, changes[column], 1))
+
+        if not (totals or daily):
+            return
+        try:
+            GuildStatsModel._bump(cursor, guild_id, totals, daily)
+        except Exception as e:
+            logger.warning(f"Stats tickets (mise a jour) guild {guild_id}: {e}")
+
+    @staticmethod
+    def rebuild(guild_id: int) -> bool:
+        """Recalcule les compteurs d'une guild depuis vai_tickets (idempotent)."""
+        with get_db_context() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(f"DELETE FROM {DB_TABLE_PREFIX}guild_ticket_stats WHERE guild_id = %s", (guild_id,))
+                cursor.execute(f"DELETE FROM {DB_TABLE_PREFIX}guild_ticket_daily WHERE guild_id = %s", (guild_id,))
+                cursor.execute(
+                    f"INSERT INTO {DB_TABLE_PREFIX}guild_ticket_stats "
+                    f"(guild_id, open_count, in_progress_count, closed_count, total_count) "
+                    f"SELECT guild_id, SUM(status = 'open'), SUM(status = 'in_progress'), "
+                    f"SUM(status = 'closed'), COUNT(*) "
+                    f"FROM {DB_TABLE_PREFIX}tickets WHERE guild_id = %s GROUP BY guild_id",
+                    (guild_id,)
+                )
+                daily_selects = {
+                    "opened":   ("DATE(opened_at)", "''", ""),
+                    "closed":   ("DATE(closed_at)", "''", "AND closed_at IS NOT NULL"),
+                    "language": ("DATE(opened_at)", "LEFT(COALESCE(user_language, ''), 32)", ""),
+                    "priority": ("DATE(opened_at)", "COALESCE(priority, '')", ""),
+                }
+                for dimension, (day_expr, value_expr, extra) in daily_selects.items():
+                    cursor.execute(
+                        f"INSERT INTO {DB_TABLE_PREFIX}guild_ticket_daily "
+                        f"(guild_id, day, dimension, dim_value, ticket_count) "
+                        f"SELECT guild_id, {day_expr}, %s, {value_expr}, COUNT(*) "
+                        f"FROM {DB_TABLE_PREFIX}tickets WHERE guild_id = %s {extra} "
+                        f"GROUP BY guild_id, {day_expr}, {value_expr}",
+                        (dimension, guild_id)
+                    )
+                # Ligne à zéro pour une guild sans ticket : marque la guild comme calculée.
+                cursor.execute(
+                    f"INSERT IGNORE INTO {DB_TABLE_PREFIX}guild_ticket_stats (guild_id) VALUES (%s)",
+                    (guild_id,)
+                )
+                return True
+            except Exception as e:
+                logger.error(f"Erreur recalcul stats tickets guild {guild_id}: {e}")
+                raise
+
+    @staticmethod
+    def guild_ids_with_tickets() -> List[int]:
+        with get_db_context() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT DISTINCT guild_id FROM {DB_TABLE_PREFIX}tickets")
+            return [int(row[0]) for row in cursor.fetchall()]
+
+    @staticmethod
+    def needs_backfill() -> bool:
+        """Tables de stats vides alors qu'il existe des tickets (premier déploiement)."""
+        with get_db_context() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT 1 FROM {DB_TABLE_PREFIX}guild_ticket_stats LIMIT 1")
+            if cursor.fetchone():
+                return False
+            cursor.execute(f"SELECT 1 FROM {DB_TABLE_PREFIX}tickets LIMIT 1")
+            return cursor.fetchone() is not None
+
+    @staticmethod
+    def ticket_count(guild_id: int, status: str = None) -> Optional[int]:
+        """Nombre de tickets (par statut) depuis les compteurs ; None si jamais calcules."""
+        if status and status not in GuildStatsModel._STATUS_COLUMNS:
+            return 0
+        column = GuildStatsModel._STATUS_COLUMNS[status] if status else "total_count"
+        with get_db_context() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"SELECT {column} FROM {DB_TABLE_PREFIX}guild_ticket_stats WHERE guild_id = %s",
+                (guild_id,)
+            )
+            row = cursor.fetchone()
+            return int(row[0]) if row else None
+
+    @staticmethod
+    def get_dashboard_stats(guild_id: int, days: int = 7) -> Optional[Dict]:
+        """
+        Statistiques du dashboard en deux lectures indexées sur une seule
+        connexion : compteurs par statut + lignes journalières depuis le début
+        du mois (ou J-`days` si plus ancien). None si la guild n'a pas encore
+        été calculée (voir rebuild).
+
+        Les bornes (jour, début du mois) viennent de MySQL, comme les lignes
+        écrites par _bump (CURDATE()) : pas de décalage si l'hôte de l'API
+        n'est pas sur le même fuseau que la base.
+        """
+        from datetime import timedelta
+        with get_db_context() as conn:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(
+                f"SELECT open_count, in_progress_count, closed_count, total_count, "
+                f"{_TODAY_START} AS today, {_MONTH_START} AS month_start "
+                f"FROM {DB_TABLE_PREFIX}guild_ticket_stats WHERE guild_id = %s",
+                (guild_id,)
+            )
+            totals = cursor.fetchone()
+            if totals is None:
+                return None
+            cursor.execute(
+                f"SELECT day, dimension, dim_value, ticket_count FROM {DB_TABLE_PREFIX}guild_ticket_daily "
+                f"WHERE guild_id = %s AND day >= LEAST({_MONTH_START}, {_TODAY_START} - INTERVAL %s DAY) "
+                f"AND dimension IN ('opened', 'language')",
+                (guild_id, int(days))
+            )
+            rows = cursor.fetchall()
+
+        today, month_start = totals["today"], totals["month_start"]
+        tickets_month = 0
+        languages: Dict[str, int] = {}
+        daily: Dict[str, int] = {}
+        for row in rows:
+            day = row["day"]
+            count = int(row["ticket_count"] or 0)
+            if row["dimension"] == "opened":
+                if day >= month_start:
+                    tickets_month += count
+                if day >= today - timedelta(days=days):
+                    daily[str(day)] = daily.get(str(day), 0) + count
+            elif day >= month_start and count:
+                languages[row["dim_value"]] = languages.get(row["dim_value"], 0) + count
+
+        return {
+            "open_tickets": int(totals.get("open_count") or 0),
+            "in_progress_tickets": int(totals.get("in_progress_count") or 0),
+            "closed_tickets": int(totals.get("closed_count") or 0),
+            "total_tickets": int(totals.get("total_count") or 0),
+            "tickets_month": tickets_month,
+            "languages": [
+                {"user_language": lang or None, "count": count}
+                for lang, count in sorted(languages.items(), key=lambda item: -item[1])
+            ],
+            "daily_counts": [{"day": day, "count": count} for day, count in sorted(daily.items())],
+        }
+
+
 # ============================================================================
 # VAI_TICKET_MESSAGES
 # ============================================================================
@@ -410,6 +814,84 @@ class TicketMessageModel:
             return cursor.fetchall()
 
 
+    @staticmethod
+    def iter_by_ticket(ticket_id: int, batch_size: int = 500) -> Iterator[Dict]:
+        """
+        Messages du ticket dans l'ordre, lus par lots sur (ticket_id, id) via
+        idx_ticket (InnoDB y ajoute la cle primaire). Chaque lot emprunte puis
+        rend sa connexion : un export lent ne bloque pas une connexion du pool
+        et la memoire reste bornee a un lot, quelle que soit la taille du ticket.
+        """
+        after_id = 0
+        while True:
+            with get_db_context() as conn:
+                cursor = conn.cursor(dictionary=True)
+                cursor.execute(
+                    f"SELECT * FROM {DB_TABLE_PREFIX}ticket_messages "
+                    f"WHERE ticket_id = %s AND id > %s ORDER BY id ASC LIMIT %s",
+                    (ticket_id, after_id, batch_size)
+                )
+                rows = cursor.fetchall()
+            yield from rows
+            if len(rows) < batch_size:
+                return
+            after_id = rows[-1]["id"]
+
+    @staticmethod
+    def get_since(ticket_id: int, after_id: int = 0) -> List[Dict]:
+        """Messages du ticket postérieurs à `after_id` (vai_ticket_messages.id)."""
+        with get_db_context() as conn:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(
+                f"SELECT * FROM {DB_TABLE_PREFIX}ticket_messages "
+                f"WHERE ticket_id = %s AND id > %s ORDER BY id ASC",
+                (ticket_id, int(after_id or 0))
+            )
+            return cursor.fetchall()
+
+
+# ============================================================================
+# VAI_TICKET_SUMMARY_CHUNKS
+# ============================================================================
+
+class TicketSummaryChunkModel:
+
+    @staticmethod
+    def get_many(ticket_id: int, chunk_hashes: List[str]) -> Dict[str, str]:
+        """Résumés partiels déjà calculés : {chunk_hash: summary}."""
+        if not chunk_hashes:
+            return {}
+        placeholders = ", ".join(["%s"] * len(chunk_hashes))
+        with get_db_context() as conn:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(
+                f"SELECT chunk_hash, summary FROM {DB_TABLE_PREFIX}ticket_summary_chunks "
+                f"WHERE ticket_id = %s AND chunk_hash IN ({placeholders})",
+                [ticket_id, *chunk_hashes]
+            )
+            return {row["chunk_hash"]: row["summary"] for row in cursor.fetchall() if row.get("summary")}
+
+    @staticmethod
+    def store(ticket_id: int, chunk_hash: str, summary: str, language: str = None,
+              first_message_id: int = None, last_message_id: int = None) -> bool:
+        with get_db_context() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(
+                    f"""
+                    INSERT INTO {DB_TABLE_PREFIX}ticket_summary_chunks
+                    (ticket_id, chunk_hash, first_message_id, last_message_id, language, summary)
+                    VALUES (%s, %s, %s, %s, %s, %s)
+                    ON DUPLICATE KEY UPDATE summary = VALUES(summary)
+                    """,
+                    (ticket_id, chunk_hash, first_message_id, last_message_id, language, summary)
+                )
+                return True
+            except Exception as e:
+                logger.error(f"Erreur stockage resume partiel ticket {ticket_id}: {e}")
+                return False
+
+
 # ============================================================================
 # VAI_ORDERS
 # ============================================================================
@@ -466,17 +948,40 @@ class OrderModel:
             if status:
                 cursor.execute(
                     f"SELECT * FROM {DB_TABLE_PREFIX}orders "
-                    f"WHERE status = %s ORDER BY created_at DESC LIMIT %s OFFSET %s",
+                    f"WHERE status = %s ORDER BY created_at DESC, id DESC LIMIT %s OFFSET %s",
                     (status, limit, offset)
                 )
             else:
                 cursor.execute(
                     f"SELECT * FROM {DB_TABLE_PREFIX}orders "
-                    f"ORDER BY created_at DESC LIMIT %s OFFSET %s",
+                    f"ORDER BY created_at DESC, id DESC LIMIT %s OFFSET %s",
                     (limit, offset)
                 )
             return cursor.fetchall()
 
+    @staticmethod
+    def page(status: str = None, limit: int = 50, cursor: str = None) -> Dict[str, Any]:
+        """Commandes de la plus recente a la plus ancienne, paginees par curseur."""
+        where, params = (["status = %s"], [status]) if status else ([], [])
+        with get_db_context() as conn:
+            return _keyset_page(
+                conn.cursor(dictionary=True), f"{DB_TABLE_PREFIX}orders", "created_at",
+                where, params, limit, cursor,
+            )
+
+    @staticmethod
+    def count(status: str = None) -> Dict[str, Any]:
+        """{"total", "approximate"} : sans filtre, estimation InnoDB (pas de COUNT(*))."""
+        with get_db_context() as conn:
+            cursor = conn.cursor(dictionary=True)
+            if not status:
+                return {"total": _estimated_rows(cursor, f"{DB_TABLE_PREFIX}orders"), "approximate": True}
+            cursor.execute(
+                f"SELECT COUNT(*) AS total FROM {DB_TABLE_PREFIX}orders WHERE status = %s",
+                (status,)
+            )
+            return {"total": int(cursor.fetchone()["total"]), "approximate": False}
+
     @staticmethod
     def update_status(order_id: str, status: str, admin_note: str = None,
                       validated_by: int = None) -> bool:
@@ -655,8 +1160,30 @@ class SubscriptionModel:
 # VAI_KNOWLEDGE_BASE
 # ============================================================================
 
+# Empreinte du contenu d'une entrée (synchro incrémentale de l'index KB du bot).
+_KB_CHECKSUM = "CRC32(CONCAT_WS(CHAR(31), question, answer, category, priority))"
+
+
 class KnowledgeBaseModel:
 
+    @staticmethod
+    def _bump_guild_kb_version(cursor, *, guild_id: int = None, kb_id: int = None) -> None:
+        """Signale au bot que la KB de la guild a changé (vai_guilds.kb_version)."""
+        if guild_id is None:
+            cursor.execute(
+                f"SELECT guild_id FROM {DB_TABLE_PREFIX}knowledge_base WHERE id = %s", (kb_id,)
+            )
+            row = cursor.fetchone()
+            if not row:
+                return
+            guild_id = row[0]
+        cursor.execute(
+            f"UPDATE {DB_TABLE_PREFIX}guilds "
+            f"SET kb_version = {_CONFIG_VERSION_NOW}, config_version = {_CONFIG_VERSION_NOW} "
+            f"WHERE id = %s",
+            (guild_id,)
+        )
+
     @staticmethod
     def create(guild_id: int, question: str, answer: str,
                category: str = None, created_by: int = None) -> Optional[int]:
@@ -683,6 +1210,7 @@ class KnowledgeBaseModel:
                     else:
                         raise
                 kb_id = cursor.lastrowid
+                KnowledgeBaseModel._bump_guild_kb_version(cursor, guild_id=guild_id)
                 logger.info(f"Entree KB {kb_id} creee pour guild {guild_id}")
                 return kb_id
             except Exception as e:
@@ -718,6 +1246,32 @@ class KnowledgeBaseModel:
                 )
             return cursor.fetchall()
 
+    @staticmethod
+    def get_signatures(guild_id: int) -> List[Dict]:
+        """(id, checksum) des entrées actives : permet de ne recharger que ce qui a changé."""
+        with get_db_context() as conn:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(
+                f"SELECT id, {_KB_CHECKSUM} AS checksum FROM {DB_TABLE_PREFIX}knowledge_base "
+                f"WHERE guild_id = %s AND is_active = 1",
+                (guild_id,)
+            )
+            return cursor.fetchall()
+
+    @staticmethod
+    def get_many(kb_ids: List[int]) -> List[Dict]:
+        if not kb_ids:
+            return []
+        with get_db_context() as conn:
+            cursor = conn.cursor(dictionary=True)
+            placeholders = ", ".join(["%s"] * len(kb_ids))
+            cursor.execute(
+                f"SELECT *, {_KB_CHECKSUM} AS checksum FROM {DB_TABLE_PREFIX}knowledge_base "
+                f"WHERE id IN ({placeholders})",
+                tuple(kb_ids)
+            )
+            return cursor.fetchall()
+
     @staticmethod
     def get(kb_id: int) -> Optional[Dict]:
         with get_db_context() as conn:
@@ -741,6 +1295,7 @@ class KnowledgeBaseModel:
                     f"UPDATE {DB_TABLE_PREFIX}knowledge_base SET {set_clause} WHERE id = %s",
                     values
                 )
+                KnowledgeBaseModel._bump_guild_kb_version(cursor, kb_id=kb_id)
                 return True
             except Exception as e:
                 logger.error(f"Erreur update KB: {e}")
@@ -760,6 +1315,7 @@ class KnowledgeBaseModel:
         with get_db_context() as conn:
             cursor = conn.cursor()
             try:
+                KnowledgeBaseModel._bump_guild_kb_version(cursor, kb_id=kb_id)
                 cursor.execute(
                     f"DELETE FROM {DB_TABLE_PREFIX}knowledge_base WHERE id = %s",
                     (kb_id,)
@@ -805,14 +1361,36 @@ class TranslationCacheModel:
                 f"SELECT * FROM {DB_TABLE_PREFIX}translations_cache WHERE content_hash = %s",
                 (content_hash,)
             )
-            result = cursor.fetchone()
-            if result:
+            # Lecture pure : les hits sont comptés en mémoire puis appliqués
+            # par lots via increment_hits() (voir TranslatorService).
+            return cursor.fetchone()
+
+    @staticmethod
+    def increment_hits(counts: Dict[str, int], batch_size: int = 500) -> int:
+        """
+        Ajoute les hits accumulés en mémoire ({content_hash: n}) en une requête
+        groupée par lot : UPDATE ... SET hit_count = hit_count + CASE ... END.
+        Retourne le nombre de lignes mises à jour.
+        """
+        items = [(h, int(n)) for h, n in (counts or {}).items() if n > 0]
+        if not items:
+            return 0
+        updated = 0
+        with get_db_context() as conn:
+            cursor = conn.cursor()
+            for start in range(0, len(items), batch_size):
+                batch = items[start:start + batch_size]
+                cases = " ".join(["WHEN %s THEN %s"] * len(batch))
+                placeholders = ", ".join(["%s"] * len(batch))
+                params = [v for pair in batch for v in pair] + [h for h, _ in batch]
                 cursor.execute(
                     f"UPDATE {DB_TABLE_PREFIX}translations_cache "
-                    f"SET hit_count = hit_count + 1 WHERE content_hash = %s",
-                    (content_hash,)
+                    f"SET hit_count = hit_count + CASE content_hash {cases} ELSE 0 END "
+                    f"WHERE content_hash IN ({placeholders})",
+                    params
                 )
-            return result
+                updated += cursor.rowcount
+        return updated
 
     @staticmethod
     def store(content_hash: str, original_text: str, translated_text: str,
@@ -878,33 +1456,93 @@ class DashboardUserModel:
 
 
 class DashboardSessionModel:
+    """
+    Sessions dashboard. Les recherches passent par jwt_token_hash (SHA-256 du
+    JWT, indexé) ; repli sur jwt_token (TEXT, non indexé) si la colonne
+    n'existe pas encore (schéma pas migré).
+    """
+
+    @staticmethod
+    def token_hash(jwt_token: str) -> str:
+        import hashlib
+        return hashlib.sha256((jwt_token or "").encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _select_by_token(cursor, columns: str, jwt_token: str) -> Optional[Dict]:
+        try:
+            cursor.execute(
+                f"SELECT {columns} FROM {DB_TABLE_PREFIX}dashboard_sessions "
+                f"WHERE jwt_token_hash = %s LIMIT 1",
+                (DashboardSessionModel.token_hash(jwt_token),),
+            )
+        except Exception as e:
+            msg = str(e).lower()
+            if not ("unknown column" in msg and "jwt_token_hash" in msg):
+                raise
+            cursor.execute(
+                f"SELECT {columns} FROM {DB_TABLE_PREFIX}dashboard_sessions WHERE jwt_token = %s LIMIT 1",
+                (jwt_token,),
+            )
+        return cursor.fetchone()
+
+    @staticmethod
+    def _status(row: Optional[Dict]) -> str:
+        if not row:
+            return "missing"
+        # Backward compatible with schemas without `is_revoked` (row.get).
+        if int(row.get("is_revoked", 0) or 0) == 1:
+            return "revoked"
+        return "valid" if int(row.get("not_expired", 0) or 0) == 1 else "expired"
+
+    @staticmethod
+    def _parse_guild_ids(raw) -> list[int] | None:
+        import json
+        if raw is None:
+            return None
+        try:
+            data = raw
+            if isinstance(raw, (str, bytes, bytearray)):
+                data = json.loads(raw)
+            out: list[int] = []
+            for x in (data or []):
+                try:
+                    out.append(int(x))
+                except Exception:
+                    pass
+            return out
+        except Exception:
+            return None
 
     @staticmethod
     def create(discord_user_id: int, discord_username: str, access_token: str,
                jwt_token: str, expires_at, guild_ids_json: str | None = None) -> Optional[int]:
+        values = {
+            "discord_user_id": discord_user_id,
+            "discord_username": discord_username,
+            "access_token": access_token,
+            "jwt_token": jwt_token,
+            "jwt_token_hash": DashboardSessionModel.token_hash(jwt_token),
+            "guild_ids_json": guild_ids_json,
+            "expires_at": expires_at,
+        }
         with get_db_context() as conn:
             cursor = conn.cursor()
             try:
-                try:
-                    query = f"""
-                        INSERT INTO {DB_TABLE_PREFIX}dashboard_sessions
-                        (discord_user_id, discord_username, access_token, jwt_token, guild_ids_json, expires_at)
-                        VALUES (%s, %s, %s, %s, %s, %s)
-                    """
-                    cursor.execute(query, (discord_user_id, discord_username,
-                                           access_token, jwt_token, guild_ids_json, expires_at))
-                except Exception as e:
-                    # Backward compatible with older schemas without `guild_ids_json`.
-                    msg = str(e).lower()
-                    if "unknown column" in msg and "guild_ids_json" in msg:
-                        query = f"""
-                            INSERT INTO {DB_TABLE_PREFIX}dashboard_sessions
-                            (discord_user_id, discord_username, access_token, jwt_token, expires_at)
-                            VALUES (%s, %s, %s, %s, %s)
-                        """
-                        cursor.execute(query, (discord_user_id, discord_username,
-                                               access_token, jwt_token, expires_at))
-                    else:
+                while True:
+                    try:
+                        cursor.execute(
+                            f"INSERT INTO {DB_TABLE_PREFIX}dashboard_sessions ({', '.join(values)}) "
+                            f"VALUES ({', '.join(['%s'] * len(values))})",
+                            tuple(values.values()),
+                        )
+                        break
+                    except Exception as e:
+                        # Backward compatible with older schemas without `guild_ids_json` / `jwt_token_hash`.
+                        msg = str(e).lower()
+                        optional = [c for c in ("guild_ids_json", "jwt_token_hash") if c in values and c in msg]
+                        if "unknown column" in msg and optional:
+                            values.pop(optional[0])
+                            continue
                         raise
                 logger.debug(f"Session dashboard creee pour {discord_username}")
                 return cursor.lastrowid
@@ -913,104 +1551,76 @@ class DashboardSessionModel:
                 return None
 
     @staticmethod
-    def token_status(jwt_token: str) -> str:
+    def lookup(jwt_token: str) -> Dict:
         """
-        Returns one of: valid | revoked | expired | missing
+        Etat complet d'une session en une requête :
+        {"status": valid|revoked|expired|missing, "expires_in": secondes | None,
+         "guild_ids": list[int] | None}
 
         Notes:
         - Uses MySQL NOW() for expiry comparison (server time).
-        - Backward compatible with schemas without `is_revoked`.
         """
         with get_db_context() as conn:
             cursor = conn.cursor(dictionary=True)
-            try:
-                cursor.execute(
-                    f"SELECT expires_at, (expires_at > NOW()) AS not_expired, is_revoked "
-                    f"FROM {DB_TABLE_PREFIX}dashboard_sessions WHERE jwt_token = %s LIMIT 1",
-                    (jwt_token,),
-                )
-                row = cursor.fetchone()
-                if not row:
-                    return "missing"
-                if int(row.get("is_revoked", 0) or 0) == 1:
-                    return "revoked"
-                return "valid" if int(row.get("not_expired", 0) or 0) == 1 else "expired"
-            except Exception as e:
-                msg = str(e).lower()
-                if "unknown column" in msg and "is_revoked" in msg:
-                    cursor.execute(
-                        f"SELECT expires_at, (expires_at > NOW()) AS not_expired "
-                        f"FROM {DB_TABLE_PREFIX}dashboard_sessions WHERE jwt_token = %s LIMIT 1",
-                        (jwt_token,),
-                    )
-                    row = cursor.fetchone()
-                    if not row:
-                        return "missing"
-                    return "valid" if int(row.get("not_expired", 0) or 0) == 1 else "expired"
-                raise
+            row = DashboardSessionModel._select_by_token(
+                cursor,
+                "*, (expires_at > NOW()) AS not_expired, TIMESTAMPDIFF(SECOND, NOW(), expires_at) AS expires_in",
+                jwt_token,
+            )
+        return {
+            "status": DashboardSessionModel._status(row),
+            "expires_in": int(row["expires_in"]) if row and row.get("expires_in") is not None else None,
+            "guild_ids": DashboardSessionModel._parse_guild_ids(row.get("guild_ids_json")) if row else None,
+        }
+
+    @staticmethod
+    def token_status(jwt_token: str) -> str:
+        """Returns one of: valid | revoked | expired | missing"""
+        return DashboardSessionModel.lookup(jwt_token)["status"]
 
     @staticmethod
     def get_by_token(jwt_token: str) -> Optional[Dict]:
+        """Ligne de session si elle est valide (non révoquée, non expirée), sinon None."""
         with get_db_context() as conn:
             cursor = conn.cursor(dictionary=True)
-            try:
-                status = DashboardSessionModel.token_status(jwt_token)
-                if status != "valid":
-                    return None
-                cursor.execute(
-                    f"SELECT * FROM {DB_TABLE_PREFIX}dashboard_sessions WHERE jwt_token = %s LIMIT 1",
-                    (jwt_token,),
-                )
-                return cursor.fetchone()
-            except Exception as e:
-                # Backward compatibility: older schemas didn't have `is_revoked`.
-                # In that case, fall back to simple expiry validation.
-                msg = str(e).lower()
-                if "unknown column" in msg and "is_revoked" in msg:
-                    cursor.execute(
-                        f"SELECT * FROM {DB_TABLE_PREFIX}dashboard_sessions "
-                        f"WHERE jwt_token = %s AND expires_at > NOW()",
-                        (jwt_token,)
-                    )
-                    return cursor.fetchone()
-                raise
+            row = DashboardSessionModel._select_by_token(
+                cursor, "*, (expires_at > NOW()) AS not_expired", jwt_token
+            )
+        if DashboardSessionModel._status(row) != "valid":
+            return None
+        row.pop("not_expired", None)
+        return row
 
     @staticmethod
     def allowed_guild_ids(jwt_token: str) -> list[int] | None:
         """
         Returns the allowed guild IDs for this session (from DB), or None if unavailable.
         """
-        import json
-        row = DashboardSessionModel.get_by_token(jwt_token)
-        if not row:
-            return None
-        raw = row.get("guild_ids_json")
-        if raw is None:
-            return None
-        try:
-            data = raw
-            if isinstance(raw, (str, bytes, bytearray)):
-                data = json.loads(raw)
-            out: list[int] = []
-            for x in (data or []):
-                try:
-                    out.append(int(x))
-                except Exception:
-                    pass
-            return out
-        except Exception:
+        info = DashboardSessionModel.lookup(jwt_token)
+        if info["status"] != "valid":
             return None
+        return info["guild_ids"]
 
     @staticmethod
     def revoke_token(jwt_token: str) -> bool:
         with get_db_context() as conn:
             cursor = conn.cursor()
             try:
-                cursor.execute(
-                    f"UPDATE {DB_TABLE_PREFIX}dashboard_sessions "
-                    f"SET is_revoked = 1 WHERE jwt_token = %s",
-                    (jwt_token,)
-                )
+                try:
+                    cursor.execute(
+                        f"UPDATE {DB_TABLE_PREFIX}dashboard_sessions "
+                        f"SET is_revoked = 1 WHERE jwt_token_hash = %s",
+                        (DashboardSessionModel.token_hash(jwt_token),)
+                    )
+                except Exception as e:
+                    msg = str(e).lower()
+                    if not ("unknown column" in msg and "jwt_token_hash" in msg):
+                        raise
+                    cursor.execute(
+                        f"UPDATE {DB_TABLE_PREFIX}dashboard_sessions "
+                        f"SET is_revoked = 1 WHERE jwt_token = %s",
+                        (jwt_token,)
+                    )
                 return True
             except Exception as e:
                 msg = str(e).lower()
@@ -1064,17 +1674,109 @@ class AuditLogModel:
             if guild_id:
                 cursor.execute(
                     f"SELECT * FROM {DB_TABLE_PREFIX}audit_log "
-                    f"WHERE guild_id = %s ORDER BY created_at DESC LIMIT %s",
+                    f"WHERE guild_id = %s ORDER BY created_at DESC, id DESC LIMIT %s",
                     (guild_id, limit)
                 )
             else:
                 cursor.execute(
                     f"SELECT * FROM {DB_TABLE_PREFIX}audit_log "
-                    f"ORDER BY created_at DESC LIMIT %s",
+                    f"ORDER BY created_at DESC, id DESC LIMIT %s",
                     (limit,)
                 )
             return cursor.fetchall()
 
+    @staticmethod
+    def page(guild_id: int = None, limit: int = 50, cursor: str = None) -> Dict[str, Any]:
+        """Journal du plus recent au plus ancien, pagine par curseur."""
+        where, params = (["guild_id = %s"], [guild_id]) if guild_id else ([], [])
+        with get_db_context() as conn:
+            return _keyset_page(
+                conn.cursor(dictionary=True), f"{DB_TABLE_PREFIX}audit_log", "created_at",
+                where, params, limit, cursor,
+            )
+
+    @staticmethod
+    def count(guild_id: int = None) -> Dict[str, Any]:
+        """{"total", "approximate"} : sans filtre, estimation InnoDB (pas de COUNT(*))."""
+        with get_db_context() as conn:
+            cursor = conn.cursor(dictionary=True)
+            if not guild_id:
+                return {"total": _estimated_rows(cursor, f"{DB_TABLE_PREFIX}audit_log"), "approximate": True}
+            cursor.execute(
+                f"SELECT COUNT(*) AS total FROM {DB_TABLE_PREFIX}audit_log WHERE guild_id = %s",
+                (guild_id,)
+            )
+            return {"total": int(cursor.fetchone()["total"]), "approximate": False}
+
+
+# ============================================================================
+# STATISTIQUES GLOBALES (Super Admin)
+# ============================================================================
+
+
+class GlobalStatsModel:
+
+    @staticmethod
+    def _counters_sql(users_sql: str) -> str:
+        return (
+            f"SELECT "
+            f"(SELECT COUNT(*) FROM {DB_TABLE_PREFIX}guilds) AS total_guilds, "
+            f"{users_sql}, "
+            f"(SELECT COUNT(*) FROM {DB_TABLE_PREFIX}tickets "
+            f" WHERE opened_at >= {_TODAY_START} AND opened_at < {_TOMORROW_START}) AS tickets_today, "
+            f"(SELECT COUNT(*) FROM {DB_TABLE_PREFIX}orders WHERE status = 'pending') AS orders_pending, "
+            f"(SELECT COALESCE(SUM(amount), 0) FROM {DB_TABLE_PREFIX}payments "
+            f" WHERE status = 'completed' "
+            f" AND paid_at >= {_MONTH_START} AND paid_at < {_NEXT_MONTH_START}) AS revenue_month, "
+            f"(SELECT COUNT(*) FROM {DB_TABLE_PREFIX}subscriptions WHERE is_active = 1) AS active_subs"
+        )
+
+    @staticmethod
+    def snapshot() -> Dict[str, Any]:
+        """
+        Compteurs globaux du panel Super Admin en une seule requete.
+        "Utilisateurs" = comptes dashboard (OAuth), au moins le nombre d'utilisateurs
+        distincts ayant une session ; repli sur vai_users pour les anciens schemas.
+        """
+        variants = [
+            f"(SELECT COUNT(*) FROM {DB_TABLE_PREFIX}dashboard_users) AS dashboard_users, "
+            f"(SELECT COUNT(DISTINCT discord_user_id) FROM {DB_TABLE_PREFIX}dashboard_sessions) AS session_users",
+            f"NULL AS dashboard_users, "
+            f"(SELECT COUNT(DISTINCT discord_user_id) FROM {DB_TABLE_PREFIX}dashboard_sessions) AS session_users",
+            f"NULL AS dashboard_users, NULL AS session_users, "
+            f"(SELECT COUNT(*) FROM {DB_TABLE_PREFIX}users) AS legacy_users",
+        ]
+        with get_db_context() as conn:
+            cursor = conn.cursor(dictionary=True)
+            row = None
+            for i, users_sql in enumerate(variants):
+                try:
+                    cursor.execute(GlobalStatsModel._counters_sql(users_sql))
+                    row = cursor.fetchone() or {}
+                    break
+                except Exception as e:
+                    if i == len(variants) - 1:
+                        raise
+                    logger.debug(f"Stats globales, repli comptage utilisateurs: {e}")
+
+        dashboard_users = row.get("dashboard_users")
+        session_users = row.get("session_users")
+        if dashboard_users is not None:
+            total_users = max(int(dashboard_users), int(session_users or 0))
+        elif session_users is not None:
+            total_users = int(session_users)
+        else:
+            total_users = int(row.get("legacy_users") or 0)
+
+        return {
+            "total_guilds":   int(row.get("total_guilds") or 0),
+            "total_users":    total_users,
+            "tickets_today":  int(row.get("tickets_today") or 0),
+            "orders_pending": int(row.get("orders_pending") or 0),
+            "revenue_month":  float(row.get("revenue_month") or 0),
+            "active_subs":    int(row.get("active_subs") or 0),
+        }
+
 
 # ============================================================================
 # VAI_BOT_STATUS
@@ -1166,6 +1868,46 @@ class BotStatusModel:
             return row
 
 
+class BotShardStatusModel:
+
+    @staticmethod
+    def upsert_many(rows: List[Dict]) -> bool:
+        """Heartbeat des shards d'un process (une ligne par shard)."""
+        if not rows:
+            return False
+        columns = ["shard_id", "shard_count", "cluster_id", "worker_id", "guild_count", "user_count",
+                   "channel_count", "latency_ms", "uptime_sec", "started_at", "version"]
+        placeholders = "(" + ", ".join(["%s"] * len(columns)) + ")"
+        updates = ", ".join(f"{c} = VALUES({c})" for c in columns[1:])
+        with get_db_context() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(
+                    f"INSERT INTO {DB_TABLE_PREFIX}bot_shard_status ({', '.join(columns)}) "
+                    f"VALUES {', '.join([placeholders] * len(rows))} "
+                    f"ON DUPLICATE KEY UPDATE {updates}, updated_at = NOW()",
+                    [row.get(c) for row in rows for c in columns]
+                )
+                return True
+            except Exception as e:
+                logger.error(f"Erreur heartbeat shards: {e}")
+                return False
+
+    @staticmethod
+    def get_all(online_seconds: int = 120) -> List[Dict]:
+        with get_db_context() as conn:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(
+                f"SELECT *, (TIMESTAMPDIFF(SECOND, updated_at, NOW()) < %s) AS is_online "
+                f"FROM {DB_TABLE_PREFIX}bot_shard_status ORDER BY shard_id",
+                (int(online_seconds),)
+            )
+            rows = cursor.fetchall()
+        for row in rows:
+            row["is_online"] = bool(row.get("is_online", 0))
+        return rows
+
+
 # ============================================================================
 # VAI_TEMP_CODES - Codes d'echange temporaires post-OAuth
 # ============================================================================
@@ -1240,3 +1982,270 @@ class TempCodeModel:
             except Exception as e:
                 logger.error(f"Erreur cleanup temp_codes: {e}")
                 return 0
+
+
+# ============================================================================
+# VAI_JOBS
+# ============================================================================
+
+class JobModel:
+
+    @staticmethod
+    def enqueue(job_type: str, payload: Dict = None, guild_id: int = None,
+                delay_seconds: int = 0, max_attempts: int = 5, priority: int = 0,
+                dedupe_key: str = None) -> Optional[int]:
+        """
+        Enregistre une tâche. Avec `dedupe_key`, une tâche déjà en attente pour
+        la même clé est réutilisée (payload conservé) : on garde la date
+        d'exécution la plus proche et la priorité la plus haute.
+        """
+        import json
+        with get_db_context() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(
+                    f"INSERT INTO {DB_TABLE_PREFIX}jobs "
+                    f"(job_type, guild_id, payload, max_attempts, priority, dedupe_key, run_at) "
+                    f"VALUES (%s, %s, %s, %s, %s, %s, DATE_ADD(NOW(3), INTERVAL %s SECOND)) "
+                    f"ON DUPLICATE KEY UPDATE id = LAST_INSERT_ID(id), "
+                    f"run_at = LEAST(run_at, VALUES(run_at)), priority = GREATEST(priority, VALUES(priority))",
+                    (job_type, guild_id, json.dumps(payload or {}, ensure_ascii=False, default=str),
+                     max_attempts, int(priority), dedupe_key, max(0, int(delay_seconds)))
+                )
+                return cursor.lastrowid
+            except Exception as e:
+                logger.error(f"Erreur enqueue job {job_type}: {e}")
+                return None
+
+    @staticmethod
+    def claim(worker_id: str, limit: int = 1, job_types: List[str] = None,
+              shard_scope: tuple = None) -> List[Dict]:
+        """
+        Réserve jusqu'à `limit` tâches prêtes (des types `job_types` si fournis),
+        priorité la plus haute d'abord puis la plus ancienne.
+        `shard_scope` = (shard_count, shard_ids) : en mode cluster, seules les
+        tâches sans guild ou dont la guild est portée par ces shards
+        (shard = (guild_id >> 22) % shard_count, règle Discord).
+        SKIP LOCKED : plusieurs workers peuvent réclamer en parallèle sans se
+        bloquer ni prendre la même tâche. La dedupe_key est libérée au claim :
+        une nouvelle occurrence peut être planifiée pendant l'exécution.
+        """
+        import json
+        if limit <= 0:
+            return []
+        type_filter = ""
+        params: list = []
+        if job_types:
+            type_filter = f"AND job_type IN ({', '.join(['%s'] * len(job_types))}) "
+            params.extend(job_types)
+        if shard_scope:
+            shard_count, shard_ids = shard_scope
+            type_filter += (
+                f"AND (guild_id IS NULL OR MOD(guild_id >> 22, %s) IN ({', '.join(['%s'] * len(shard_ids))})) "
+            )
+            params.extend([int(shard_count), *[int(i) for i in shard_ids]])
+        with get_db_context() as conn:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(
+                f"SELECT id FROM {DB_TABLE_PREFIX}jobs "
+                f"WHERE status = 'pending' AND run_at <= NOW(3) {type_filter}"
+                f"ORDER BY priority DESC, run_at, id LIMIT %s "
+                f"FOR UPDATE SKIP LOCKED",
+                (*params, int(limit))
+            )
+            ids = [row["id"] for row in cursor.fetchall()]
+            if not ids:
+                return []
+            placeholders = ", ".join(["%s"] * len(ids))
+            cursor.execute(
+                f"UPDATE {DB_TABLE_PREFIX}jobs "
+                f"SET status = 'running', locked_by = %s, locked_at = NOW(3), heartbeat_at = NOW(3), "
+                f"attempts = attempts + 1, "
+                f"dedupe_key = NULL "
+                f"WHERE id IN ({placeholders})",
+                [worker_id, *ids]
+            )
+            cursor.execute(
+                f"SELECT *, GREATEST(0, TIMESTAMPDIFF(MICROSECOND, run_at, locked_at)) DIV 1000 AS wait_ms "
+                f"FROM {DB_TABLE_PREFIX}jobs WHERE id IN ({placeholders}) "
+                f"ORDER BY priority DESC, run_at, id",
+                ids
+            )
+            jobs = cursor.fetchall()
+        for job in jobs:
+            payload = job.get("payload")
+            if isinstance(payload, (str, bytes, bytearray)):
+                try:
+                    job["payload"] = json.loads(payload)
+                except Exception:
+                    job["payload"] = {}
+            elif payload is None:
+                job["payload"] = {}
+        return jobs
+
+    @staticmethod
+    def heartbeat(worker_id: str, job_ids: List[int]) -> int:
+        """Prolonge le verrou des tâches en cours de ce worker (évite leur remise en attente)."""
+        if not job_ids:
+            return 0
+        placeholders = ", ".join(["%s"] * len(job_ids))
+        with get_db_context() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"UPDATE {DB_TABLE_PREFIX}jobs SET heartbeat_at = NOW(3) "
+                f"WHERE id IN ({placeholders}) AND locked_by = %s AND status = 'running'",
+                [*job_ids, worker_id]
+            )
+            return cursor.rowcount
+
+    @staticmethod
+    def complete(job_id: int, worker_id: str) -> bool:
+        """False si la tâche n'est plus verrouillée par ce worker (verrou expiré puis repris)."""
+        with get_db_context() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"UPDATE {DB_TABLE_PREFIX}jobs "
+                f"SET status = 'done', locked_by = NULL, finished_at = NOW(3) "
+                f"WHERE id = %s AND locked_by = %s AND status = 'running'",
+                (job_id, worker_id)
+            )
+            return cursor.rowcount > 0
+
+    @staticmethod
+    def fail(job_id: int, worker_id: str, error: str, retry_in_seconds: int | None) -> bool:
+        """
+        Echec : replanifiée dans `retry_in_seconds`, ou dead-letter ('dead') si None.
+        False si la tâche n'est plus verrouillée par ce worker.
+        """
+        with get_db_context() as conn:
+            cursor = conn.cursor()
+            if retry_in_seconds is None:
+                cursor.execute(
+                    f"UPDATE {DB_TABLE_PREFIX}jobs "
+                    f"SET status = 'dead', locked_by = NULL, last_error = %s, finished_at = NOW(3) "
+                    f"WHERE id = %s AND locked_by = %s AND status = 'running'",
+                    ((error or "")[:2000], job_id, worker_id)
+                )
+            else:
+                cursor.execute(
+                    f"UPDATE {DB_TABLE_PREFIX}jobs "
+                    f"SET status = 'pending', locked_by = NULL, last_error = %s, "
+                    f"run_at = DATE_ADD(NOW(3), INTERVAL %s SECOND) "
+                    f"WHERE id = %s AND locked_by = %s AND status = 'running'",
+                    ((error or "")[:2000], int(retry_in_seconds), job_id, worker_id)
+                )
+            return cursor.rowcount > 0
+
+    @staticmethod
+    def requeue_stale(lock_timeout_seconds: int) -> int:
+        """
+        Remet en attente les tâches 'running' d'un worker mort : plus de
+        heartbeat depuis `lock_timeout_seconds` (locked_at pour les lignes
+        d'avant heartbeat_at).
+        """
+        with get_db_context() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"UPDATE {DB_TABLE_PREFIX}jobs "
+                f"SET status = IF(attempts >= max_attempts, 'dead', 'pending'), locked_by = NULL, "
+                f"finished_at = IF(attempts >= max_attempts, NOW(3), NULL), "
+                f"last_error = 'verrou expire (worker arrete ?)' "
+                f"WHERE status = 'running' "
+                f"AND COALESCE(heartbeat_at, locked_at) < DATE_SUB(NOW(3), INTERVAL %s SECOND)",
+                (int(lock_timeout_seconds),)
+            )
+            return cursor.rowcount
+
+    @staticmethod
+    def retry_dead(job_id: int) -> bool:
+        """Remet une tâche du dead-letter en attente (tentatives remises à zéro)."""
+        with get_db_context() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"UPDATE {DB_TABLE_PREFIX}jobs "
+                f"SET status = 'pending', attempts = 0, run_at = NOW(3), finished_at = NULL "
+                f"WHERE id = %s AND status = 'dead'",
+                (job_id,)
+            )
+            return cursor.rowcount > 0
+
+    @staticmethod
+    def list_dead(limit: int = 50, job_type: str = None) -> List[Dict]:
+        where = "status = 'dead'"
+        params: list = []
+        if job_type:
+            where += " AND job_type = %s"
+            params.append(job_type)
+        with get_db_context() as conn:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(
+                f"SELECT id, job_type, guild_id, attempts, max_attempts, last_error, created_at, finished_at "
+                f"FROM {DB_TABLE_PREFIX}jobs WHERE {where} "
+                f"ORDER BY finished_at DESC LIMIT %s",
+                (*params, int(limit))
+            )
+            return cursor.fetchall()
+
+    @staticmethod
+    def prune(done_days: int, dead_days: int) -> int:
+        """Supprime les tâches terminées (et les dead-letters) trop anciennes."""
+        with get_db_context() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"DELETE FROM {DB_TABLE_PREFIX}jobs "
+                f"WHERE (status = 'done' AND finished_at < DATE_SUB(NOW(), INTERVAL %s DAY)) "
+                f"OR (status = 'dead' AND finished_at < DATE_SUB(NOW(), INTERVAL %s DAY))",
+                (int(done_days), int(dead_days))
+            )
+            return cursor.rowcount
+
+    @staticmethod
+    def count_by_status() -> Dict[str, int]:
+        with get_db_context() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT status, COUNT(*) FROM {DB_TABLE_PREFIX}jobs GROUP BY status")
+            return {status: int(count) for status, count in cursor.fetchall()}
+
+    @staticmethod
+    def metrics(window_seconds: int = 3600) -> List[Dict]:
+        """
+        Métriques par type de tâche : file (pending/running/dead), débit et
+        latences (attente = run_at -> claim, exécution = claim -> fin) sur la
+        fenêtre `window_seconds`, âge de la plus ancienne tâche prête.
+        """
+        with get_db_context() as conn:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(
+                f"SELECT job_type, "
+                f"  SUM(status = 'pending') AS pending, "
+                f"  SUM(status = 'running') AS running, "
+                f"  SUM(status = 'dead') AS dead, "
+                f"  SUM(status = 'done' AND finished_at >= DATE_SUB(NOW(3), INTERVAL %s SECOND)) AS done_window, "
+                f"  AVG(IF(status = 'done' AND finished_at >= DATE_SUB(NOW(3), INTERVAL %s SECOND), "
+                f"      TIMESTAMPDIFF(MICROSECOND, run_at, locked_at) / 1000, NULL)) AS avg_wait_ms, "
+                f"  AVG(IF(status = 'done' AND finished_at >= DATE_SUB(NOW(3), INTERVAL %s SECOND), "
+                f"      TIMESTAMPDIFF(MICROSECOND, locked_at, finished_at) / 1000, NULL)) AS avg_run_ms, "
+                f"  MAX(IF(status = 'pending' AND run_at <= NOW(3), "
+                f"      TIMESTAMPDIFF(SECOND, run_at, NOW(3)), NULL)) AS oldest_ready_s "
+                f"FROM {DB_TABLE_PREFIX}jobs "
+                f"WHERE status IN ('pending', 'running', 'dead') "
+                f"   OR finished_at >= DATE_SUB(NOW(3), INTERVAL %s SECOND) "
+                f"GROUP BY job_type ORDER BY job_type",
+                (int(window_seconds),) * 4
+            )
+            rows = cursor.fetchall()
+        metrics = []
+        for row in rows:
+            done = int(row.get("done_window") or 0)
+            metrics.append({
+                "job_type": row["job_type"],
+                "pending": int(row.get("pending") or 0),
+                "running": int(row.get("running") or 0),
+                "dead": int(row.get("dead") or 0),
+                "done_window": done,
+                "throughput_per_min": round(done * 60 / max(1, int(window_seconds)), 2),
+                "avg_wait_ms": round(float(row["avg_wait_ms"]), 1) if row.get("avg_wait_ms") is not None else None,
+                "avg_run_ms": round(float(row["avg_run_ms"]), 1) if row.get("avg_run_ms") is not None else None,
+                "oldest_ready_s": int(row["oldest_ready_s"]) if row.get("oldest_ready_s") is not None else None,
+            })
+        return metrics
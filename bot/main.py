@@ -9,6 +9,7 @@ from discord.ext import commands, tasks
 from loguru import logger
 from dotenv import load_dotenv
 import asyncio
+import math
 import sys
 from datetime import datetime, timezone
 from pathlib import Path
@@ -39,7 +40,18 @@ logger.add(sys.stdout, format="{message}", level="INFO")
 
 # Import config après logs setup
 from bot.config import VERSION, VERSION_EMOJI
-from bot.config import DASHBOARD_URL
+from bot.config import (
+    DASHBOARD_URL, GUILD_CONFIG_POLL_SECONDS, TICKET_INDEX_RESYNC_SECONDS,
+    TRANSLATION_HIT_FLUSH_SECONDS, JOB_TICKET_OPEN_SYNC,
+)
+from bot.services.loop_monitor import loop_lag_monitor
+from bot.services.translator import TranslatorService
+from bot.services.ticket_index import open_ticket_index
+from bot.services.guild_cache import guild_config_cache
+from bot.services.answer_cache import answer_cache
+from bot.services.knowledge import knowledge_service
+from bot.services.jobs import job_worker
+from bot.services.maintenance import register_maintenance_jobs
 
 # Heure de démarrage du bot (sera mise à jour dans on_ready)
 _bot_start_time: datetime | None = None
@@ -98,10 +110,37 @@ intents.message_content = True
 intents.members = True
 intents.guilds = True
 
-bot = commands.Bot(
+
+def _parse_shard_ids(raw: str) -> list[int] | None:
+    """"0-3" ou "0,2,5" -> [0, 1, 2, 3] / [0, 2, 5] ; vide -> None (tous les shards)."""
+    ids: set[int] = set()
+    for part in (raw or "").replace(" ", "").split(","):
+        if not part:
+            continue
+        if "-" in part:
+            start, end = part.split("-", 1)
+            ids.update(range(int(start), int(end) + 1))
+        else:
+            ids.add(int(part))
+    return sorted(ids) or None
+
+
+# Sharding : par défaut un seul process, nombre de shards recommandé par Discord.
+# Mode cluster : chaque process porte une plage de shards
+#   BOT_SHARD_COUNT=8 BOT_SHARD_IDS=0-3 BOT_CLUSTER_ID=a   /   BOT_SHARD_IDS=4-7 BOT_CLUSTER_ID=b
+BOT_SHARD_COUNT = int(os.getenv("BOT_SHARD_COUNT") or 0) or None
+BOT_SHARD_IDS = _parse_shard_ids(os.getenv("BOT_SHARD_IDS", ""))
+BOT_CLUSTER_ID = os.getenv("BOT_CLUSTER_ID") or "0"
+if BOT_SHARD_IDS and not BOT_SHARD_COUNT:
+    logger.warning("⚠ BOT_SHARD_IDS ignoré : BOT_SHARD_COUNT doit aussi être défini")
+    BOT_SHARD_IDS = None
+
+bot = commands.AutoShardedBot(
     command_prefix="/",
     intents=intents,
-    help_command=None
+    help_command=None,
+    shard_count=BOT_SHARD_COUNT,
+    shard_ids=BOT_SHARD_IDS,
 )
 
 
@@ -134,174 +173,177 @@ async def on_ready():
 
     # S'assurer que tous les serveurs actuels existent en DB (au cas où)
     try:
-        from bot.db.models import GuildModel
+        from bot.db.async_models import AsyncGuildModel
         for g in bot.guilds:
             try:
-                GuildModel.create(g.id, g.name)
+                await AsyncGuildModel.create(g.id, g.name)
             except Exception:
                 pass
     except Exception as e:
         logger.debug(f"Guild DB sync failed: {e}")
     
+    # Mesure du lag de l'event loop (exposee dans les logs du heartbeat)
+    loop_lag_monitor.start()
+
     # Démarrer le heartbeat (mise à jour du statut en DB)
     if not heartbeat_loop.is_running():
         heartbeat_loop.start()
         logger.info("✓ Heartbeat démarré (intervalle: 60s)")
 
-    # Démarrer le poller de déploiement du message d'ouverture des tickets
-    if not ticket_open_deploy_loop.is_running():
-        ticket_open_deploy_loop.start()
-        logger.info("✓ Ticket deploy poller démarré (intervalle: 30s)")
+    # Détection des modifications de config faites depuis le dashboard
+    if not guild_config_poll_loop.is_running():
+        guild_config_poll_loop.start()
+
+    # Index des channels de tickets ouverts (premier chargement immédiat)
+    if not ticket_index_resync_loop.is_running():
+        ticket_index_resync_loop.start()
+
+    # Écriture groupée des hits du cache de traduction
+    if not translation_hits_flush_loop.is_running():
+        translation_hits_flush_loop.start()
+
+    # File de tâches persistante (fermeture des tickets, déploiements demandés par l'API, maintenance...)
+    # En mode cluster, seules les tâches des guilds de nos shards sont réclamées.
+    job_worker.set_shard_scope(bot.shard_count, bot.shard_ids)
+    job_worker.register(JOB_TICKET_OPEN_SYNC, _job_ticket_open_sync)
+    if os.getenv("JOB_MAINTENANCE_IN_BOT", "1").strip().lower() not in {"0", "false", "no", "off"}:
+        register_maintenance_jobs(job_worker)
+    job_worker.start()
+
+    # Demandes de déploiement du message d'ouverture posées hors ligne
+    await _sweep_ticket_open_requests()
     
     # Premier heartbeat immédiat
     await _update_bot_status()
 
 
-@tasks.loop(seconds=30)
-async def ticket_open_deploy_loop():
-    """Poll DB for guilds that need (re)deploy of ticket open message."""
-    await _deploy_ticket_open_messages()
-
+async def _sweep_ticket_open_requests():
+    """Rattrapage au démarrage : demandes de (re)déploiement posées pendant que le bot était arrêté."""
+    from bot.db.async_models import AsyncGuildModel
+    try:
+        guild_ids = await AsyncGuildModel.get_pending_ticket_open_ids()
+    except Exception as e:
+        logger.debug(f"Rattrapage message d'ouverture: {e}")
+        return
+    for guild_id in guild_ids:
+        await job_worker.enqueue(
+            JOB_TICKET_OPEN_SYNC, {"guild_id": guild_id}, guild_id=guild_id,
+            priority=10, dedupe_key=f"ticket_open:{guild_id}",
+        )
+    if guild_ids:
+        logger.info(f"✓ {len(guild_ids)} message(s) d'ouverture de tickets à synchroniser")
 
-@ticket_open_deploy_loop.before_loop
-async def before_ticket_open_deploy_loop():
-    await bot.wait_until_ready()
 
+async def _job_ticket_open_sync(job: dict):
+    """
+    Applique l'état demandé par le dashboard pour le message d'ouverture d'une
+    guild (suppression puis (re)déploiement). La tâche est posée par l'API ;
+    les flags en DB restent la source de vérité, la tâche est donc idempotente.
+    """
+    from bot.db.async_models import AsyncGuildModel
+    from bot.cogs.tickets import TicketOpenButtonView, TicketOpenSelectView
+    import json
 
-async def _deploy_ticket_open_messages():
-    try:
-        from bot.db.models import GuildModel
-        from bot.cogs.tickets import TicketOpenButtonView, TicketOpenSelectView
-        import json
+    guild_id = int((job.get("payload") or {}).get("guild_id") or job.get("guild_id") or 0)
+    cfg = await AsyncGuildModel.get(guild_id) if guild_id else None
+    if not cfg:
+        return
+    needs_delete = int(cfg.get("ticket_open_delete_requested") or 0) == 1
+    needs_deploy = int(cfg.get("ticket_open_needs_deploy") or 0) == 1
+    if not (needs_delete or needs_deploy):
+        return
 
-        # Handle delete requests first (to avoid editing a message that should be removed)
-        delete_rows = []
-        try:
-            # We reuse get_all and filter here to avoid adding too many new model methods.
-            # If perf becomes an issue, add a dedicated query method.
-            delete_rows = [g for g in GuildModel.get_all() if int(g.get("ticket_open_delete_requested") or 0) == 1]
-        except Exception:
-            delete_rows = []
+    guild = bot.get_guild(guild_id)
+    if not guild:
+        # Cache pas encore prêt (ou bot absent) : nouvel essai avec backoff
+        raise RuntimeError(f"guild {guild_id} absente du cache")
 
-        for cfg in delete_rows[:25]:
-            guild_id = int(cfg.get("id") or 0)
-            if not guild_id:
-                continue
-            guild = bot.get_guild(guild_id)
-            if not guild:
-                continue
+    channel_id = cfg.get("ticket_open_channel_id")
+    try:
+        channel_id = int(channel_id) if channel_id else None
+    except Exception:
+        channel_id = None
 
-            channel_id = cfg.get("ticket_open_channel_id")
+    async def resolve_channel():
+        channel = guild.get_channel(channel_id)
+        if channel is None:
             try:
-                channel_id = int(channel_id) if channel_id else None
+                channel = await bot.fetch_channel(channel_id)
             except Exception:
-                channel_id = None
-
-            msg_id = cfg.get("ticket_open_message_id")
-            if not (channel_id and msg_id):
-                GuildModel.ack_ticket_open_delete(guild_id)
-                continue
-
-            channel = guild.get_channel(channel_id)
-            if channel is None:
-                try:
-                    channel = await bot.fetch_channel(channel_id)
-                except Exception:
-                    channel = None
-            if channel is None:
-                GuildModel.ack_ticket_open_delete(guild_id)
-                continue
-
+                channel = None
+        return channel
+
+    # Handle delete requests first (to avoid editing a message that should be removed)
+    if needs_delete:
+        msg_id = cfg.get("ticket_open_message_id")
+        channel = await resolve_channel() if (channel_id and msg_id) else None
+        if channel is not None:
             try:
                 message = await channel.fetch_message(int(msg_id))
                 await message.delete()
             except Exception:
                 # If it can't be fetched/deleted, clear anyway to unblock
                 pass
-            GuildModel.ack_ticket_open_delete(guild_id)
+        await AsyncGuildModel.ack_ticket_open_delete(guild_id)
+        cfg["ticket_open_message_id"] = None
 
-        rows = GuildModel.get_needing_ticket_open_deploy(limit=25)
-        if not rows:
-            return
+    if not needs_deploy:
+        return
 
-        for cfg in rows:
-            guild_id = int(cfg.get("id") or 0)
-            if not guild_id:
-                continue
+    if not channel_id:
+        # Nothing to deploy to; ack to avoid endless loop
+        await AsyncGuildModel.ack_ticket_open_deploy(guild_id, message_id=cfg.get("ticket_open_message_id"))
+        return
 
-            guild = bot.get_guild(guild_id)
-            if not guild:
-                # Bot not in guild or cache not ready: keep flag, try later
-                continue
+    channel = await resolve_channel()
+    if channel is None:
+        await AsyncGuildModel.set_ticket_open_deploy_error(guild_id, f"Channel introuvable: {channel_id}")
+        return
 
-            channel_id = cfg.get("ticket_open_channel_id")
-            try:
-                channel_id = int(channel_id) if channel_id else None
-            except Exception:
-                channel_id = None
-            if not channel_id:
-                # Nothing to deploy to; ack to avoid endless loop
-                GuildModel.ack_ticket_open_deploy(guild_id, message_id=cfg.get("ticket_open_message_id"))
-                continue
-
-            channel = guild.get_channel(channel_id)
-            if channel is None:
-                try:
-                    channel = await bot.fetch_channel(channel_id)
-                except Exception:
-                    channel = None
-            if channel is None:
-                GuildModel.set_ticket_open_deploy_error(guild_id, f"Channel introuvable: {channel_id}")
-                continue
-
-            content = (cfg.get("ticket_open_message") or "").strip() or "Cliquez ci-dessous pour ouvrir un ticket."
-
-            # Build view
-            selector_enabled = int(cfg.get("ticket_selector_enabled") or 0) == 1
-            if selector_enabled:
-                placeholder = (cfg.get("ticket_selector_placeholder") or "Sélectionnez le type de ticket")
-                options_raw = cfg.get("ticket_selector_options")
-                options = []
-                try:
-                    if isinstance(options_raw, str):
-                        options = json.loads(options_raw) if options_raw.strip() else []
-                    elif isinstance(options_raw, list):
-                        options = options_raw
-                except Exception:
-                    options = []
-                view = TicketOpenSelectView(bot, guild_id=guild_id, placeholder=placeholder, options=options)
-            else:
-                view = TicketOpenButtonView(
-                    bot,
-                    guild_id=guild_id,
-                    label=(cfg.get("ticket_button_label") or "Ouvrir un ticket"),
-                    style=(cfg.get("ticket_button_style") or "primary"),
-                    emoji=(cfg.get("ticket_button_emoji") or None),
-                )
-
-            # Send or edit existing
-            msg_id = cfg.get("ticket_open_message_id")
-            message = None
-            try:
-                if msg_id:
-                    message = await channel.fetch_message(int(msg_id))
-            except Exception:
-                message = None
+    content = (cfg.get("ticket_open_message") or "").strip() or "Cliquez ci-dessous pour ouvrir un ticket."
 
-            try:
-                if message:
-                    await message.edit(content=content, view=view)
-                    GuildModel.ack_ticket_open_deploy(guild_id, message_id=int(message.id))
-                else:
-                    sent = await channel.send(content=content, view=view)
-                    GuildModel.ack_ticket_open_deploy(guild_id, message_id=int(sent.id))
-            except Exception as e:
-                logger.warning(f"Ticket open deploy failed for guild {guild_id}: {e}")
-                GuildModel.set_ticket_open_deploy_error(guild_id, str(e))
-                continue
+    # Build view
+    selector_enabled = int(cfg.get("ticket_selector_enabled") or 0) == 1
+    if selector_enabled:
+        placeholder = (cfg.get("ticket_selector_placeholder") or "Sélectionnez le type de ticket")
+        options_raw = cfg.get("ticket_selector_options")
+        options = []
+        try:
+            if isinstance(options_raw, str):
+                options = json.loads(options_raw) if options_raw.strip() else []
+            elif isinstance(options_raw, list):
+                options = options_raw
+        except Exception:
+            options = []
+        view = TicketOpenSelectView(bot, guild_id=guild_id, placeholder=placeholder, options=options)
+    else:
+        view = TicketOpenButtonView(
+            bot,
+            guild_id=guild_id,
+            label=(cfg.get("ticket_button_label") or "Ouvrir un ticket"),
+            style=(cfg.get("ticket_button_style") or "primary"),
+            emoji=(cfg.get("ticket_button_emoji") or None),
+        )
 
+    # Send or edit existing
+    msg_id = cfg.get("ticket_open_message_id")
+    message = None
+    try:
+        if msg_id:
+            message = await channel.fetch_message(int(msg_id))
+    except Exception:
+        message = None
+
+    try:
+        if message:
+            await message.edit(content=content, view=view)
+            await AsyncGuildModel.ack_ticket_open_deploy(guild_id, message_id=int(message.id))
+        else:
+            sent = await channel.send(content=content, view=view)
+            await AsyncGuildModel.ack_ticket_open_deploy(guild_id, message_id=int(sent.id))
     except Exception as e:
-        logger.debug(f"ticket_open_deploy_loop: {e}")
+        logger.warning(f"Ticket open deploy failed for guild {guild_id}: {e}")
+        await AsyncGuildModel.set_ticket_open_deploy_error(guild_id, str(e))
 
 
 @tasks.loop(seconds=60)
@@ -313,38 +355,127 @@ async def heartbeat_loop():
     await _update_bot_status()
 
 
+@tasks.loop(seconds=GUILD_CONFIG_POLL_SECONDS)
+async def guild_config_poll_loop():
+    """Recharge en cache les configs de guilds modifiées (config_version)."""
+    try:
+        await guild_config_cache.poll()
+    except Exception as e:
+        logger.debug(f"guild_config_poll_loop: {e}")
+
+
+@tasks.loop(seconds=TICKET_INDEX_RESYNC_SECONDS)
+async def ticket_index_resync_loop():
+    """Recharge l'index des tickets ouverts (rattrape les fermetures faites hors bot)."""
+    if await open_ticket_index.load():
+        logger.debug(f"Index tickets ouverts: {len(open_ticket_index)} channel(s)")
+
+
+@tasks.loop(seconds=TRANSLATION_HIT_FLUSH_SECONDS)
+async def translation_hits_flush_loop():
+    """Écrit les hit_count du cache de traduction cumulés en mémoire."""
+    await TranslatorService.flush_hit_counts()
+
+
 @heartbeat_loop.before_loop
 async def before_heartbeat():
     """Attend que le bot soit prêt avant de démarrer le heartbeat."""
     await bot.wait_until_ready()
 
 
+def _latency_ms(latency: float | None) -> float:
+    """Latence gateway en ms (NaN tant que le premier heartbeat Discord n'a pas eu lieu)."""
+    if not latency or math.isnan(latency) or math.isinf(latency):
+        return 0
+    return round(latency * 1000, 2)
+
+
+def _shard_status_rows(uptime_sec: int, started_at: str | None) -> list[dict]:
+    """Une ligne vai_bot_shard_status par shard porté par ce process."""
+    import socket
+    shard_count = bot.shard_count or 1
+    shard_ids = sorted(bot.shards.keys()) if bot.shards else [0]
+    latencies = dict(bot.latencies) if bot.shards else {0: bot.latency}
+    by_shard: dict[int, list] = {sid: [] for sid in shard_ids}
+    for g in bot.guilds:
+        by_shard.setdefault(g.shard_id or 0, []).append(g)
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    rows = []
+    for sid, guilds in sorted(by_shard.items()):
+        latency = latencies.get(sid)
+        rows.append({
+            "shard_id": sid,
+            "shard_count": shard_count,
+            "cluster_id": BOT_CLUSTER_ID,
+            "worker_id": worker_id,
+            "guild_count": len(guilds),
+            "user_count": sum(g.member_count or 0 for g in guilds),
+            "channel_count": sum(len(g.channels) for g in guilds),
+            "latency_ms": _latency_ms(latency),
+            "uptime_sec": uptime_sec,
+            "started_at": started_at,
+            "version": VERSION,
+        })
+    return rows
+
+
 async def _update_bot_status():
-    """Écrit les métriques du bot dans vai_bot_status (id=1)."""
+    """
+    Écrit les métriques du bot : une ligne par shard dans vai_bot_shard_status
+    (agrégée par /internal/bot/status) et, si ce process porte tous les
+    shards, la ligne historique vai_bot_status (id=1).
+    """
     try:
-        from bot.db.models import BotStatusModel
-        
+        from bot.db.models import BotStatusModel, BotShardStatusModel
+        from bot.db.async_models import run_db
+
         guild_count = len(bot.guilds)
         user_count = sum(g.member_count or 0 for g in bot.guilds)
         channel_count = sum(len(g.channels) for g in bot.guilds)
-        latency_ms = round(bot.latency * 1000, 2) if bot.latency else 0
+        latency_ms = _latency_ms(bot.latency)
         shard_count = bot.shard_count or 1
         
         uptime_sec = 0
         if _bot_start_time:
             uptime_sec = int((datetime.now(timezone.utc) - _bot_start_time).total_seconds())
-        
-        BotStatusModel.update(
-            guild_count=guild_count,
-            user_count=user_count,
-            uptime_sec=uptime_sec,
-            version=VERSION,
-            latency_ms=latency_ms,
-            shard_count=shard_count,
-            channel_count=channel_count,
-            started_at=_bot_start_time.strftime('%Y-%m-%d %H:%M:%S') if _bot_start_time else None,
+        started_at = _bot_start_time.strftime('%Y-%m-%d %H:%M:%S') if _bot_start_time else None
+
+        await run_db(BotShardStatusModel.upsert_many, _shard_status_rows(uptime_sec, started_at))
+        if bot.shard_ids is None:
+            await run_db(
+                BotStatusModel.update,
+                guild_count=guild_count,
+                user_count=user_count,
+                uptime_sec=uptime_sec,
+                version=VERSION,
+                latency_ms=latency_ms,
+                shard_count=shard_count,
+                channel_count=channel_count,
+                started_at=started_at,
+            )
+        lag = loop_lag_monitor.stats()
+        logger.info(
+            f"♥ Event loop lag (fenetre {lag['samples']} mesures): avg={lag['avg_ms']}ms "
+            f"p95={lag['p95_ms']}ms max={lag['max_ms']}ms, max depuis demarrage {lag['max_ever_ms']}ms"
+        )
+        tr_cache = TranslatorService.memory_cache.stats()
+        cfg_cache = guild_config_cache.stats()
+        kb_stats = knowledge_service.stats()
+        answers = answer_cache.stats()
+        jobs = job_worker.stats()
+        logger.debug(
+            f"♥ Heartbeat [cluster {BOT_CLUSTER_ID}, {len(bot.shards) or 1}/{shard_count} shard(s)]: {guild_count} guilds, {user_count} users, {uptime_sec}s uptime, {latency_ms}ms latency, "
+            f"cache traductions {tr_cache['size']} entrées ({tr_cache['hit_rate'] * 100:.0f}% hits), "
+            f"{TranslatorService.inflight.coalesced} traductions dédupliquées, "
+            f"{open_ticket_index.stats()['rejected_without_db']} messages hors ticket ignorés sans DB, "
+            f"cache config guilds {cfg_cache['entries']} entrées ({cfg_cache['hit_rate'] * 100:.0f}% hits), "
+            f"KB {kb_stats['direct_hits']}/{kb_stats['lookups']} réponses directes "
+            f"({kb_stats['avg_search_ms']}ms/recherche), "
+            f"cache réponses support {answers['entries']} entrées "
+            f"({answers['exact_hits']} exactes + {answers['near_hits']} proches, {answers['hit_rate'] * 100:.0f}% hits), "
+            f"tâches {jobs['running']} en cours / {jobs['completed']} ok / {jobs['retried']} retentées / "
+            f"{jobs['dead']} en dead-letter ({jobs['per_min']}/min)"
         )
-        logger.debug(f"♥ Heartbeat: {guild_count} guilds, {user_count} users, {uptime_sec}s uptime, {latency_ms}ms latency")
     except Exception as e:
         logger.warning(f"⚠ Heartbeat échoué: {e}")
 
@@ -355,8 +486,8 @@ async def on_guild_join(guild: discord.Guild):
     logger.info(f"✓ Bot ajouté au serveur: {guild.name} ({guild.id})")
     
     # Créer l'enregistrement en DB
-    from bot.db.models import GuildModel
-    GuildModel.create(guild.id, guild.name)
+    from bot.db.async_models import AsyncGuildModel
+    await AsyncGuildModel.create(guild.id, guild.name)
 
     # DM au owner avec le lien de configuration
     try:
@@ -433,6 +564,16 @@ async def main():
         logger.error("✗ Erreur d'authentification Discord")
     except Exception as e:
         logger.error(f"✗ Erreur démarrage bot: {e}")
+    finally:
+        from bot.db.async_models import shutdown_db_executor
+        from bot.services.groq_client import close_shared_clients
+        loop_lag_monitor.stop()
+        await job_worker.stop()
+        if translation_hits_flush_loop.is_running():
+            translation_hits_flush_loop.cancel()
+        await TranslatorService.flush_hit_counts()
+        await close_shared_clients()
+        shutdown_db_executor()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,180 @@
+"""
+Cache des réponses du support public IA.
+
+Les channels de support reçoivent sans cesse les mêmes questions ("comment
+je me vérifie", "où sont les règles"). Avant d'appeler Groq, SupportCog
+consulte ce cache par guild :
+
+1. clé exacte : question normalisée (minuscules, sans accents ni ponctuation) ;
+2. sinon quasi-doublon : signatures MinHash sur des 4-grammes de caractères,
+   candidates trouvées par LSH (bandes), similarité estimée >= seuil.
+
+Les réponses expirent (TTL) et le cache d'une guild est vidé dès que son
+prompt personnalisé ou sa base de connaissances change (empreinte comparée
+à chaque lecture).
+"""
+
+import hashlib
+import random
+import time
+import zlib
+from collections import OrderedDict
+
+from bot.config import (
+    ANSWER_CACHE_MAX_PER_GUILD, ANSWER_CACHE_SIMILARITY, ANSWER_CACHE_TTL,
+)
+from bot.services.knowledge import normalize_text
+
+
+_NUM_PERM = 64
+_BANDS = 16
+_ROWS = _NUM_PERM // _BANDS
+_PRIME = (1 << 61) - 1
+_rng = random.Random(1337)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(_NUM_PERM)]
+
+
+def _shingles(text: str, size: int = 4) -> set[int]:
+    padded = f" {text} "
+    if len(padded) <= size:
+        return {zlib.crc32(padded.encode())}
+    return {zlib.crc32(padded[i:i + size].encode()) for i in range(len(padded) - size + 1)}
+
+
+def minhash(text: str) -> tuple[int, ...]:
+    shingles = _shingles(text)
+    return tuple(min((a * s + b) % _PRIME for s in shingles) for a, b in _PERMUTATIONS)
+
+
+def _similarity(sig_a: tuple, sig_b: tuple) -> float:
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / _NUM_PERM
+
+
+def guild_fingerprint(guild_config: dict) -> str:
+    """Empreinte de ce qui influence les réponses : prompt personnalisé + version KB."""
+    parts = [
+        str(int(guild_config.get("ai_prompt_enabled") or 0)),
+        guild_config.get("ai_custom_prompt") or "",
+        str(guild_config.get("kb_version") or 0),
+    ]
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+class _GuildAnswers:
+    def __init__(self, fingerprint: str):
+        self.fingerprint = fingerprint
+        # clé exacte (langue, question normalisée) -> (expires_at, réponse, signature)
+        self.entries: OrderedDict[tuple[str, str], tuple[float, str, tuple]] = OrderedDict()
+        # (langue, bande, valeurs) -> clés exactes
+        self.buckets: dict[tuple, set] = {}
+
+    def _bands(self, language: str, signature: tuple):
+        for band in range(_BANDS):
+            yield (language, band, signature[band * _ROWS:(band + 1) * _ROWS])
+
+    def add(self, key: tuple[str, str], answer: str, signature: tuple, ttl: float) -> None:
+        self.remove(key)
+        self.entries[key] = (time.monotonic() + ttl, answer, signature)
+        for bucket in self._bands(key[0], signature):
+            self.buckets.setdefault(bucket, set()).add(key)
+        while len(self.entries) > ANSWER_CACHE_MAX_PER_GUILD:
+            self.remove(next(iter(self.entries)))
+
+    def remove(self, key: tuple[str, str]) -> None:
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        for bucket in self._bands(key[0], entry[2]):
+            keys = self.buckets.get(bucket)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.buckets[bucket]
+
+    def get_exact(self, key: tuple[str, str]) -> str | None:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            self.remove(key)
+            return None
+        self.entries.move_to_end(key)
+        return entry[1]
+
+    def get_similar(self, language: str, signature: tuple, threshold: float) -> str | None:
+        candidates = set()
+        for bucket in self._bands(language, signature):
+            candidates |= self.buckets.get(bucket, set())
+        best_key, best_sim = None, 0.0
+        for key in candidates:
+            sim = _similarity(signature, self.entries[key][2])
+            if sim > best_sim:
+                best_key, best_sim = key, sim
+        if best_key is None or best_sim < threshold:
+            return None
+        return self.get_exact(best_key)
+
+
+class AnswerCache:
+    def __init__(self, ttl: float = ANSWER_CACHE_TTL, similarity: float = ANSWER_CACHE_SIMILARITY):
+        self.ttl = float(ttl)
+        self.similarity = float(similarity)
+        self._guilds: dict[int, _GuildAnswers] = {}
+        self.exact_hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _guild(self, guild_id: int, fingerprint: str) -> _GuildAnswers:
+        answers = self._guilds.get(guild_id)
+        if answers is None or answers.fingerprint != fingerprint:
+            if answers is not None:
+                self.invalidations += 1
+            answers = _GuildAnswers(fingerprint)
+            self._guilds[guild_id] = answers
+        return answers
+
+    def get(self, guild_id: int, guild_config: dict, language: str, question: str) -> str | None:
+        normalized = normalize_text(question)
+        if not normalized:
+            return None
+        answers = self._guild(int(guild_id), guild_fingerprint(guild_config))
+
+        answer = answers.get_exact((language, normalized))
+        if answer is not None:
+            self.exact_hits += 1
+            return answer
+
+        answer = answers.get_similar(language, minhash(normalized), self.similarity)
+        if answer is not None:
+            self.near_hits += 1
+            return answer
+
+        self.misses += 1
+        return None
+
+    def put(self, guild_id: int, guild_config: dict, language: str, question: str, answer: str) -> None:
+        normalized = normalize_text(question)
+        if not normalized or not answer:
+            return
+        answers = self._guild(int(guild_id), guild_fingerprint(guild_config))
+        answers.add((language, normalized), answer, minhash(normalized), self.ttl)
+
+    def invalidate(self, guild_id: int) -> None:
+        if self._guilds.pop(int(guild_id), None) is not None:
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        lookups = self.exact_hits + self.near_hits + self.misses
+        return {
+            "guilds": len(self._guilds),
+            "entries": sum(len(g.entries) for g in self._guilds.values()),
+            "exact_hits": self.exact_hits,
+            "near_hits": self.near_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.exact_hits + self.near_hits) / lookups, 3) if lookups else 0.0,
+            "invalidations": self.invalidations,
+        }
+
+
+answer_cache = AnswerCache()
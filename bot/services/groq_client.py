@@ -1,13 +1,70 @@
 """
 Client Groq pour les appels IA
 Gère les réponses, traductions et résumés de tickets
-Support de 4 clés API avec fallback automatique
+Support de 4 clés API, réparties selon leurs quotas (voir groq_keys.py)
+
+Toutes les méthodes sont asynchrones : un seul client `AsyncGroq` (pool HTTP
+keep-alive) est conservé par clé API et partagé par toutes les instances de
+GroqClient, ce qui évite un nouveau handshake TLS à chaque complétion et
+permet de lancer plusieurs appels LLM en parallèle sans bloquer le bot.
 """
 
+import asyncio
 import os
-from groq import Groq
+import time
+from typing import AsyncIterator
+from groq import AsyncGroq, RateLimitError
 from loguru import logger
-from bot.config import GROQ_MODEL_FAST, GROQ_MODEL_QUALITY, SYSTEM_PROMPT_SUPPORT, SYSTEM_PROMPT_TICKET_SUMMARY
+from bot.config import (
+    GROQ_MODEL_FAST, GROQ_MODEL_QUALITY, GROQ_MAX_CONCURRENCY, GROQ_TIMEOUT_SECONDS,
+    SYSTEM_PROMPT_SUPPORT, SYSTEM_PROMPT_TICKET_SUMMARY,
+    SYSTEM_PROMPT_TICKET_CHUNK_SUMMARY, SYSTEM_PROMPT_TICKET_SUMMARY_MERGE,
+    SYSTEM_PROMPT_TICKET_SUMMARY_UPDATE, TRIAGE_LOCAL_ENABLED,
+)
+from bot.services.groq_keys import key_scheduler, estimate_tokens
+from bot.services.triage import triage_classifier
+
+
+# Réponses de repli du support public (jamais mises en cache).
+SUPPORT_NO_KEY_RESPONSE = "Erreur: Aucune clé Groq disponible"
+SUPPORT_FALLBACK_RESPONSE = "Je suis désolé, je n'ai pas pu traiter votre demande. Veuillez ouvrir un ticket."
+SUPPORT_ERROR_RESPONSES = (SUPPORT_NO_KEY_RESPONSE, SUPPORT_FALLBACK_RESPONSE)
+# Réponses de repli des résumés de tickets.
+SUMMARY_NO_KEY_RESPONSE = "Impossible de générer le résumé"
+SUMMARY_FALLBACK_RESPONSE = "Impossible de générer le résumé du ticket."
+SUMMARY_ERROR_RESPONSES = (SUMMARY_NO_KEY_RESPONSE, SUMMARY_FALLBACK_RESPONSE)
+
+# Clients partagés (un par clé API), créés à la demande.
+_clients: dict[str, AsyncGroq] = {}
+# Limite globale d'appels simultanés vers Groq (créée dans la boucle courante).
+_semaphore: asyncio.Semaphore | None = None
+
+
+def _get_shared_client(api_key: str) -> AsyncGroq:
+    client = _clients.get(api_key)
+    if client is None:
+        # max_retries=0 : un 429 doit remonter tout de suite pour basculer sur
+        # une autre clé plutôt que d'attendre en boucle dans le SDK.
+        client = AsyncGroq(api_key=api_key, timeout=GROQ_TIMEOUT_SECONDS, max_retries=0)
+        _clients[api_key] = client
+    return client
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(GROQ_MAX_CONCURRENCY)
+    return _semaphore
+
+
+async def close_shared_clients() -> None:
+    """Ferme les connexions HTTP des clients partagés (arrêt du bot)."""
+    for client in list(_clients.values()):
+        try:
+            await client.close()
+        except Exception:
+            pass
+    _clients.clear()
 
 
 class GroqClient:
@@ -19,39 +76,171 @@ class GroqClient:
             os.getenv('GROQ_API_KEY_3'),
             os.getenv('GROQ_API_KEY_4')
         ]
-        
+
         # Filtrer les clés vides
         self.api_keys = [key for key in self.api_keys if key]
-        
+
         if not self.api_keys:
             logger.error("✗ Aucune clé Groq trouvée dans .env (GROQ_API_KEY_1-4)")
         else:
             logger.info(f"✓ Client Groq initialisé avec {len(self.api_keys)} clés API disponibles")
-        
-        self.current_key_index = 0
-    
-    def _get_client(self, force_key_index=None):
-        """Retourne un client Groq avec la clé actuelle ou spécifique."""
-        if force_key_index is not None:
-            key_index = force_key_index
-        else:
-            key_index = self.current_key_index % len(self.api_keys) if self.api_keys else 0
-        
-        if not self.api_keys or key_index >= len(self.api_keys):
-            return None
-        
-        return Groq(api_key=self.api_keys[key_index])
 
-    def generate_support_response(self, message: str, guild_name: str, language: str = 'en',
-                                   custom_prompt: str = None) -> str:
+    async def _complete(self, *, model: str, messages: list, label: str, **params) -> tuple[str, int] | None:
+        """
+        Exécute une complétion sur la clé la plus disponible, puis sur les suivantes en cas d'échec.
+
+        Returns:
+            (contenu, index de la clé utilisée) ou None si toutes les clés échouent.
+        """
+        estimated = estimate_tokens(messages, params.get("max_tokens", 0))
+
+        for key_index in key_scheduler.order(self.api_keys, model, estimated):
+            api_key = self.api_keys[key_index]
+            client = _get_shared_client(api_key)
+            key_scheduler.reserve(api_key, model, estimated)
+            try:
+                async with _get_semaphore():
+                    raw = await client.chat.completions.with_raw_response.create(
+                        model=model,
+                        messages=messages,
+                        stream=False,
+                        **params,
+                    )
+                completion = raw.parse()
+                key_scheduler.on_success(api_key, model, raw.headers)
+                return completion.choices[0].message.content or "", key_index
+
+            except RateLimitError as e:
+                key_scheduler.on_rate_limited(api_key, model, getattr(e.response, "headers", None))
+                logger.warning(f"⚠ Clé Groq #{key_index + 1} {label}: quota atteint")
+            except Exception as e:
+                key_scheduler.on_error(api_key, model, estimated)
+                logger.warning(f"⚠ Clé Groq #{key_index + 1} {label}: {str(e)[:100]}")
+            finally:
+                key_scheduler.release(api_key, model)
+
+        return None
+
+    async def _stream(self, *, model: str, messages: list, label: str, **params) -> AsyncIterator[str]:
+        """
+        Variante streamée de `_complete` : produit les fragments de texte au fil
+        de la génération.
+
+        On bascule sur la clé suivante tant qu'aucun fragment n'a été produit ;
+        une erreur en cours de génération est remontée à l'appelant.
+        """
+        estimated = estimate_tokens(messages, params.get("max_tokens", 0))
+        started = time.perf_counter()
+
+        for key_index in key_scheduler.order(self.api_keys, model, estimated):
+            api_key = self.api_keys[key_index]
+            client = _get_shared_client(api_key)
+            key_scheduler.reserve(api_key, model, estimated)
+            first_token_at = None
+            try:
+                # Le sémaphore ne couvre que l'ouverture de la requête : pendant la
+                # lecture du flux, l'appelant fait ses allers-retours Discord
+                # (reply / edit) et ne doit pas bloquer les autres appels Groq.
+                async with _get_semaphore():
+                    raw = await client.chat.completions.with_raw_response.create(
+                        model=model,
+                        messages=messages,
+                        stream=True,
+                        **params,
+                    )
+                key_scheduler.on_success(api_key, model, raw.headers)
+                async for chunk in raw.parse():
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if not delta:
+                        continue
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                    yield delta
+
+                if first_token_at is not None:
+                    logger.info(
+                        f"✓ {label} streamé (clé #{key_index + 1}, "
+                        f"TTFT {(first_token_at - started) * 1000:.0f}ms, "
+                        f"total {(time.perf_counter() - started) * 1000:.0f}ms)"
+                    )
+                return
+
+            except RateLimitError as e:
+                key_scheduler.on_rate_limited(api_key, model, getattr(e.response, "headers", None))
+                logger.warning(f"⚠ Clé Groq #{key_index + 1} {label}: quota atteint")
+                if first_token_at is not None:
+                    raise
+            except Exception as e:
+                key_scheduler.on_error(api_key, model, estimated)
+                logger.warning(f"⚠ Clé Groq #{key_index + 1} {label}: {str(e)[:100]}")
+                if first_token_at is not None:
+                    raise
+            finally:
+                key_scheduler.release(api_key, model)
+
+    def key_stats(self) -> list[dict]:
+        """Quotas connus par clé/modèle (pour le heartbeat / debug)."""
+        return key_scheduler.stats(self.api_keys)
+
+    async def generate_support_response(self, message: str, guild_name: str, language: str = 'en',
+                                        custom_prompt: str = None, context: list | None = None) -> str:
         """Génère une réponse IA avec fallback sur 4 clés.
-        
+
         Si custom_prompt est fourni et non vide, il remplace le prompt système par défaut.
         Cela permet aux owners de serveur de personnaliser le comportement de l'IA.
+        `context` : entrées de la base de connaissances du serveur jugées pertinentes.
         """
         if not self.api_keys:
-            return "Erreur: Aucune clé Groq disponible"
+            return SUPPORT_NO_KEY_RESPONSE
 
+        result = await self._complete(
+            model=GROQ_MODEL_FAST,
+            messages=self._support_messages(message, guild_name, custom_prompt, context),
+            label="support",
+            temperature=0.7,
+            max_tokens=500,
+            top_p=1,
+        )
+        if result is not None:
+            response, key_index = result
+            logger.info(f"✓ Support généré (clé #{key_index + 1}, {len(response)} chars)")
+            return response
+
+        logger.error("✗ Toutes les clés Groq épuisées")
+        return SUPPORT_FALLBACK_RESPONSE
+
+    async def stream_support_response(self, message: str, guild_name: str, language: str = 'en',
+                                      custom_prompt: str = None,
+                                      context: list | None = None) -> AsyncIterator[str]:
+        """Comme `generate_support_response`, mais produit la réponse par fragments.
+
+        Si aucune clé ne répond, un seul fragment est produit : la réponse de repli.
+        Une erreur survenue après le premier fragment est propagée.
+        """
+        if not self.api_keys:
+            yield SUPPORT_NO_KEY_RESPONSE
+            return
+
+        produced = False
+        async for delta in self._stream(
+            model=GROQ_MODEL_FAST,
+            messages=self._support_messages(message, guild_name, custom_prompt, context),
+            label="Support",
+            temperature=0.7,
+            max_tokens=500,
+            top_p=1,
+        ):
+            produced = True
+            yield delta
+
+        if not produced:
+            logger.error("✗ Toutes les clés Groq épuisées")
+            yield SUPPORT_FALLBACK_RESPONSE
+
+    def _support_messages(self, message: str, guild_name: str, custom_prompt: str | None,
+                          context: list | None) -> list[dict]:
         if custom_prompt and custom_prompt.strip():
             # Le prompt personnalisé est utilisé tel quel, avec le nom du serveur injecté
             system_prompt = custom_prompt.strip()
@@ -60,40 +249,32 @@ class GroqClient:
             logger.debug(f"Support IA: utilisation du prompt personnalise pour {guild_name}")
         else:
             system_prompt = SYSTEM_PROMPT_SUPPORT.format(guild_name=guild_name)
-        
-        for attempt in range(len(self.api_keys)):
-            try:
-                client = self._get_client(force_key_index=attempt)
-                if not client:
-                    continue
-                
-                completion = client.chat.completions.create(
-                    model=GROQ_MODEL_FAST,
-                    messages=[
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": message}
-                    ],
-                    temperature=0.7,
-                    max_tokens=500,
-                    top_p=1,
-                    stream=False,
-                )
-                
-                response = completion.choices[0].message.content
-                logger.info(f"✓ Support généré (clé #{attempt + 1}, {len(response)} chars)")
-                return response
-                
-            except Exception as e:
-                logger.warning(f"⚠ Clé Groq #{attempt + 1} échouée: {str(e)[:100]}")
-        
-        logger.error("✗ Toutes les clés Groq épuisées")
-        return "Je suis désolé, je n'ai pas pu traiter votre demande. Veuillez ouvrir un ticket."
 
-    def translate(self, text: str, source_language: str, target_language: str) -> str:
+        if context:
+            system_prompt += "\n\n" + self._format_kb_context(context)
+
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": message},
+        ]
+
+    @staticmethod
+    def _format_kb_context(entries: list, max_answer_chars: int = 800) -> str:
+        lines = [
+            "Base de connaissances du serveur (utilise ces informations en priorite "
+            "si elles repondent a la question) :"
+        ]
+        for entry in entries:
+            question = (entry.get("question") or "").strip()
+            answer = (entry.get("answer") or "").strip()[:max_answer_chars]
+            lines.append(f"Q: {question}\nR: {answer}")
+        return "\n\n".join(lines)
+
+    async def translate(self, text: str, source_language: str, target_language: str) -> str:
         """Traduit un texte avec fallback."""
         if not self.api_keys:
             return text
-        
+
         system = (
             "You are a translation engine.\n"
             "Rules:\n"
@@ -108,91 +289,170 @@ class GroqClient:
             "Text:\n"
             f"{text}"
         )
-        
-        for attempt in range(len(self.api_keys)):
-            try:
-                client = self._get_client(force_key_index=attempt)
-                if not client:
-                    continue
-                
-                completion = client.chat.completions.create(
-                    model=GROQ_MODEL_FAST,
-                    messages=[
-                        {"role": "system", "content": system},
-                        {"role": "user", "content": prompt},
-                    ],
-                    temperature=0.3,
-                    max_tokens=1000,
-                    stream=False,
-                )
-                
-                logger.debug(f"✓ Traduction (clé #{attempt + 1})")
-                return completion.choices[0].message.content.strip()
-                
-            except Exception as e:
-                logger.warning(f"⚠ Clé Groq #{attempt + 1} traduction: {str(e)[:80]}")
-        
+
+        result = await self._complete(
+            model=GROQ_MODEL_FAST,
+            messages=[
+                {"role": "system", "content": system},
+                {"role": "user", "content": prompt},
+            ],
+            label="traduction",
+            temperature=0.3,
+            max_tokens=1000,
+        )
+        if result is not None:
+            content, key_index = result
+            logger.debug(f"✓ Traduction (clé #{key_index + 1})")
+            return content.strip()
+
         return text
 
-    def generate_ticket_summary(self, messages: list, ticket_language: str) -> str:
+    async def generate_ticket_summary(self, messages: list, ticket_language: str) -> str:
         """Génère un résumé de ticket avec fallback."""
         if not self.api_keys:
-            return "Impossible de générer le résumé"
-        
+            return SUMMARY_NO_KEY_RESPONSE
+
         conversation = "\n".join([
             f"[{msg.get('author', 'Unknown')}]: {msg.get('content', '')}"
             for msg in messages
         ])
-        
+
         system_prompt = SYSTEM_PROMPT_TICKET_SUMMARY.format(ticket_language=ticket_language)
-        
-        for attempt in range(len(self.api_keys)):
-            try:
-                client = self._get_client(force_key_index=attempt)
-                if not client:
-                    continue
-                
-                completion = client.chat.completions.create(
-                    model=GROQ_MODEL_QUALITY,
-                    messages=[
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": f"Conversation:\n\n{conversation}"}
-                    ],
-                    temperature=0.5,
-                    max_tokens=800,
-                    stream=False,
-                )
-                
-                logger.info(f"✓ Résumé (clé #{attempt + 1})")
-                return completion.choices[0].message.content
-                
-            except Exception as e:
-                logger.warning(f"⚠ Clé Groq #{attempt + 1} résumé: {str(e)[:80]}")
-        
-        return "Impossible de générer le résumé du ticket."
 
-    def classify_ticket_priority(self, messages: list, ticket_language: str) -> str:
+        result = await self._complete(
+            model=GROQ_MODEL_QUALITY,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": f"Conversation:\n\n{conversation}"}
+            ],
+            label="résumé",
+            temperature=0.5,
+            max_tokens=800,
+        )
+        if result is not None:
+            content, key_index = result
+            logger.info(f"✓ Résumé (clé #{key_index + 1})")
+            return content
+
+        return SUMMARY_FALLBACK_RESPONSE
+
+    async def summarize_ticket_chunk(self, conversation: str, ticket_language: str,
+                                     max_tokens: int = 250) -> str | None:
+        """Résumé partiel d'une fenêtre de messages (modèle rapide). None si échec."""
+        if not self.api_keys:
+            return None
+        result = await self._complete(
+            model=GROQ_MODEL_FAST,
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT_TICKET_CHUNK_SUMMARY.format(
+                    ticket_language=ticket_language)},
+                {"role": "user", "content": f"Extrait:\n\n{conversation}"}
+            ],
+            label="résumé partiel",
+            temperature=0.3,
+            max_tokens=max_tokens,
+        )
+        return result[0].strip() if result is not None and result[0].strip() else None
+
+    async def update_ticket_summary(self, previous: str | None, messages: list, ticket_language: str,
+                                    model: str = GROQ_MODEL_FAST) -> str | None:
+        """Met à jour un résumé existant avec les nouveaux messages. None si échec."""
+        if not self.api_keys:
+            return None
+
+        conversation = "\n".join(
+            f"[{msg.get('author', 'Unknown')}]: {msg.get('content', '')}" for msg in messages
+        )
+        result = await self._complete(
+            model=model,
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT_TICKET_SUMMARY_UPDATE.format(
+                    ticket_language=ticket_language)},
+                {"role": "user", "content": (
+                    f"Resume actuel:\n{(previous or '').strip() or '(aucun)'}\n\n"
+                    f"Nouveaux messages:\n{conversation}"
+                )}
+            ],
+            label="résumé glissant",
+            temperature=0.3,
+            max_tokens=600,
+        )
+        return result[0].strip() if result is not None and result[0].strip() else None
+
+    async def merge_ticket_summaries(self, partials: list[str], ticket_language: str) -> str:
+        """Fusionne les résumés partiels (ordre chronologique) en un résumé final (modèle qualité)."""
+        if not self.api_keys:
+            return SUMMARY_NO_KEY_RESPONSE
+
+        parts = "\n\n".join(f"[Partie {i}]\n{text}" for i, text in enumerate(partials, 1))
+        result = await self._complete(
+            model=GROQ_MODEL_QUALITY,
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT_TICKET_SUMMARY_MERGE.format(
+                    ticket_language=ticket_language)},
+                {"role": "user", "content": parts}
+            ],
+            label="fusion résumé",
+            temperature=0.5,
+            max_tokens=800,
+        )
+        if result is not None:
+            content, key_index = result
+            logger.info(f"✓ Résumé fusionné ({len(partials)} parties, clé #{key_index + 1})")
+            return content
+
+        return SUMMARY_FALLBACK_RESPONSE
+
+    async def classify_ticket_priority(self, messages: list, ticket_language: str,
+                                       previous_priority: str | None = None,
+                                       context: list | None = None,
+                                       topic: str | None = None) -> str:
         """
         Classe la priorité d'un ticket : low, medium, high, urgent.
 
-        `messages` est une liste de dicts {author, content}.
+        `messages` est une liste de dicts {author, content} (les nouveaux messages).
+        `context` (messages déjà classés) et `previous_priority` forment l'état
+        glissant du ticket : seuls les nouveaux messages sont envoyés en entier.
+
+        Avec TRIAGE_LOCAL_ENABLED, le triage local (bot/services/triage.py) est
+        consulté d'abord ; le LLM n'est appelé que si sa confiance est insuffisante.
         """
+        if TRIAGE_LOCAL_ENABLED:
+            local = triage_classifier.decide(list(context or []) + list(messages or []), topic=topic)
+            if local is not None:
+                logger.info(f"✓ Priorité ticket classée '{local}' (triage local)")
+                return local
+
         if not self.api_keys:
-            return "medium"
+            return previous_priority or "medium"
+
+        def fmt(msg: dict) -> str:
+            return f"[{msg.get('author', 'Unknown')}]: {msg.get('content', '')}".strip()
 
-        # On limite la taille du contexte pour rester efficace.
-        chunks = []
-        total_chars = 0
-        for msg in messages or []:
-            line = f"[{msg.get('author', 'Unknown')}]: {msg.get('content', '')}".strip()
+        # On limite la taille du contexte pour rester efficace : priorité aux
+        # messages les plus récents.
+        budget = 4000
+        new_lines = []
+        for msg in reversed(messages or []):
+            line = fmt(msg)
             if not line:
                 continue
-            if total_chars + len(line) > 4000:
+            if budget - len(line) < 0 and new_lines:
+                break
+            new_lines.append(line[:budget])
+            budget -= len(line)
+        new_lines.reverse()
+
+        context_lines = []
+        for msg in reversed(context or []):
+            line = fmt(msg)
+            if budget - len(line) < 0:
                 break
-            chunks.append(line)
-            total_chars += len(line)
+            context_lines.append(line)
+            budget -= len(line)
+        context_lines.reverse()
 
-        conversation = "\n".join(chunks)
+        conversation = "\n".join(new_lines)
 
         system = (
             "You are a support triage assistant for a Discord ticket system.\n"
@@ -208,69 +468,64 @@ class GroqClient:
             "- Do not add any explanation or extra text.\n"
         )
 
-        user_prompt = (
-            f"Ticket language (hint): {ticket_language}\n"
-            f"Conversation:\n{conversation}\n\n"
+        user_prompt = f"Ticket language (hint): {ticket_language}\n"
+        if topic:
+            user_prompt += f"Ticket topic: {topic}\n"
+        if previous_priority:
+            user_prompt += (
+                f"Current priority: {previous_priority} "
+                "(keep it unless the new messages change the severity)\n"
+            )
+        if context_lines:
+            user_prompt += "Earlier messages:\n" + "\n".join(context_lines) + "\n"
+        user_prompt += (
+            f"New messages:\n{conversation}\n\n"
             "Return the priority label now (low, medium, high or urgent)."
         )
 
-        for attempt in range(len(self.api_keys)):
-            try:
-                client = self._get_client(force_key_index=attempt)
-                if not client:
-                    continue
-
-                completion = client.chat.completions.create(
-                    model=GROQ_MODEL_FAST,
-                    messages=[
-                        {"role": "system", "content": system},
-                        {"role": "user", "content": user_prompt},
-                    ],
-                    temperature=0.0,
-                    max_tokens=4,
-                    stream=False,
-                )
-
-                raw = (completion.choices[0].message.content or "").strip().lower()
-                for label in ("low", "medium", "high", "urgent"):
-                    if label in raw:
-                        logger.info(f"✓ Priorité ticket classée '{label}' (clé #{attempt + 1})")
-                        return label
-
-            except Exception as e:
-                logger.warning(f"⚠ Clé Groq #{attempt + 1} priorité: {str(e)[:80]}")
+        result = await self._complete(
+            model=GROQ_MODEL_FAST,
+            messages=[
+                {"role": "system", "content": system},
+                {"role": "user", "content": user_prompt},
+            ],
+            label="priorité",
+            temperature=0.0,
+            max_tokens=4,
+        )
+        if result is not None:
+            content, key_index = result
+            raw = content.strip().lower()
+            for label in ("low", "medium", "high", "urgent"):
+                if label in raw:
+                    logger.info(f"✓ Priorité ticket classée '{label}' (clé #{key_index + 1})")
+                    return label
 
-        return "medium"
+        return previous_priority or "medium"
 
-    def detect_question(self, message: str) -> bool:
+    async def detect_question(self, message: str) -> bool:
         """Détecte si un message est une question."""
         question_indicators = ['?', 'comment', 'pourquoi', 'quoi', 'qu\'est', 'qui', 'où', 'quand', 'quel',
                              'how', 'why', 'what', 'who', 'where', 'when', 'which']
-        
+
         if any(ind in message.lower() for ind in question_indicators):
             return True
-        
+
         if len(message.split()) < 3:
             return False
-        
+
         if not self.api_keys:
             return False
-        
-        try:
-            client = self._get_client(force_key_index=0)
-            if not client:
-                return False
-            
-            completion = client.chat.completions.create(
-                model=GROQ_MODEL_FAST,
-                messages=[{"role": "user", "content": f"Question ou non? Réponds: oui/non.\n{message}"}],
-                temperature=0.1,
-                max_tokens=10,
-                stream=False,
-            )
-            
-            response = completion.choices[0].message.content.lower()
-            return 'oui' in response or 'yes' in response
-            
-        except Exception:
+
+        result = await self._complete(
+            model=GROQ_MODEL_FAST,
+            messages=[{"role": "user", "content": f"Question ou non? Réponds: oui/non.\n{message}"}],
+            label="détection question",
+            temperature=0.1,
+            max_tokens=10,
+        )
+        if result is None:
             return False
+
+        response = result[0].lower()
+        return 'oui' in response or 'yes' in response
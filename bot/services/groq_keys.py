@@ -0,0 +1,244 @@
+"""
+Ordonnanceur des clés Groq (GROQ_API_KEY_1..4) selon leurs limites de débit.
+
+Au lieu d'essayer toujours la clé #1 puis de basculer sur erreur, chaque requête
+est routée vers la clé qui a le plus de marge pour le modèle demandé :
+
+- les en-têtes `x-ratelimit-*` de chaque réponse mettent à jour les requêtes et
+  tokens restants (par clé ET par modèle, les quotas Groq étant par modèle) ;
+- un 429 place la clé en cooldown pour ce modèle (Retry-After / reset) ;
+- entre deux réponses, les appels en cours sont réservés localement pour
+  répartir la charge même quand plusieurs appels partent en même temps ;
+- sans en-têtes connus, on part du budget par défaut du modèle (GROQ_MODEL_BUDGETS) ;
+- sans heure de reset connue (erreurs, 429 sans en-têtes), le budget se
+  recharge au fil du temps (tokens par minute, requêtes par jour) et un échec
+  hors 429 rend sa réservation : les clés ne dérivent pas vers une marge nulle.
+"""
+
+import re
+import time
+
+from loguru import logger
+
+from bot.config import GROQ_MODEL_BUDGETS, GROQ_RATE_LIMIT_COOLDOWN_SECONDS
+
+
+# Fenêtres des quotas Groq, pour la recharge quand aucun reset n'est connu.
+_TOKENS_WINDOW_SECONDS = 60.0
+_REQUESTS_WINDOW_SECONDS = 86400.0
+
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+
+
+def _parse_duration(raw) -> float | None:
+    """Convertit '1m2.5s', '7.66s', '120ms' ou '30' en secondes."""
+    if raw is None:
+        return None
+    value = str(raw).strip()
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    total = 0.0
+    matched = False
+    for amount, unit in _DURATION_RE.findall(value):
+        matched = True
+        amount = float(amount)
+        total += {"h": 3600, "m": 60, "s": 1, "ms": 0.001}[unit] * amount
+    return total if matched else None
+
+
+def _parse_int(raw) -> int | None:
+    try:
+        return int(float(str(raw).strip()))
+    except (TypeError, ValueError):
+        return None
+
+
+def estimate_tokens(messages: list, max_tokens: int = 0) -> int:
+    """Estimation grossière (≈ 4 caractères / token) du coût d'une requête."""
+    chars = sum(len(str(m.get("content") or "")) for m in messages or [])
+    return chars // 4 + int(max_tokens or 0)
+
+
+class _KeyBudget:
+    """Etat des quotas d'une clé pour un modèle."""
+
+    __slots__ = (
+        "limit_requests", "limit_tokens",
+        "remaining_requests", "remaining_tokens",
+        "requests_reset_at", "tokens_reset_at",
+        "cooldown_until", "in_flight", "refilled_at",
+        "requests", "rate_limited", "errors",
+    )
+
+    def __init__(self, limit_requests: int, limit_tokens: int):
+        self.limit_requests = limit_requests
+        self.limit_tokens = limit_tokens
+        self.remaining_requests = limit_requests
+        self.remaining_tokens = limit_tokens
+        self.requests_reset_at = 0.0
+        self.tokens_reset_at = 0.0
+        self.cooldown_until = 0.0
+        self.in_flight = 0
+        self.refilled_at = time.monotonic()
+        self.requests = 0
+        self.rate_limited = 0
+        self.errors = 0
+
+    def refresh(self, now: float) -> None:
+        elapsed = max(0.0, now - self.refilled_at)
+        self.refilled_at = now
+        # Reset connu (en-têtes) : quota rechargé une fois la fenêtre écoulée.
+        # Sinon, recharge proportionnelle au temps écoulé sur la fenêtre du quota.
+        if self.requests_reset_at:
+            if now >= self.requests_reset_at:
+                self.remaining_requests = self.limit_requests
+                self.requests_reset_at = 0.0
+        elif self.remaining_requests < self.limit_requests:
+            self.remaining_requests = min(
+                self.limit_requests,
+                self.remaining_requests + elapsed * self.limit_requests / _REQUESTS_WINDOW_SECONDS,
+            )
+        if self.tokens_reset_at:
+            if now >= self.tokens_reset_at:
+                self.remaining_tokens = self.limit_tokens
+                self.tokens_reset_at = 0.0
+        elif self.remaining_tokens < self.limit_tokens:
+            self.remaining_tokens = min(
+                self.limit_tokens,
+                self.remaining_tokens + elapsed * self.limit_tokens / _TOKENS_WINDOW_SECONDS,
+            )
+
+    def headroom(self, estimated_tokens: int) -> float:
+        """Marge restante normalisée (0..1) ; <= 0 si la requête ne passerait pas."""
+        req_ratio = self.remaining_requests / max(1, self.limit_requests)
+        tok_left = self.remaining_tokens - estimated_tokens
+        if self.remaining_requests <= 0 or tok_left < 0:
+            return 0.0
+        tok_ratio = tok_left / max(1, self.limit_tokens)
+        # Pénalise légèrement les clés déjà occupées pour étaler les rafales.
+        return min(req_ratio, tok_ratio) / (1 + self.in_flight)
+
+
+class GroqKeyScheduler:
+    """Choisit la clé Groq la plus disponible pour chaque modèle."""
+
+    def __init__(self):
+        self._budgets: dict[tuple[str, str], _KeyBudget] = {}
+
+    def _budget(self, api_key: str, model: str) -> _KeyBudget:
+        budget = self._budgets.get((api_key, model))
+        if budget is None:
+            defaults = GROQ_MODEL_BUDGETS.get(model) or GROQ_MODEL_BUDGETS["default"]
+            budget = _KeyBudget(defaults["requests_per_day"], defaults["tokens_per_minute"])
+            self._budgets[(api_key, model)] = budget
+        return budget
+
+    def order(self, api_keys: list[str], model: str, estimated_tokens: int = 0) -> list[int]:
+        """
+        Retourne les index de clés à essayer, de la plus disponible à la moins disponible.
+        Les clés en cooldown passent en dernier (triées par fin de cooldown).
+        """
+        now = time.monotonic()
+        ready: list[tuple[float, int]] = []
+        cooling: list[tuple[float, int]] = []
+        for index, api_key in enumerate(api_keys):
+            budget = self._budget(api_key, model)
+            budget.refresh(now)
+            if budget.cooldown_until > now:
+                cooling.append((budget.cooldown_until, index))
+            else:
+                ready.append((budget.headroom(estimated_tokens), index))
+
+        ready.sort(key=lambda item: (-item[0], item[1]))
+        cooling.sort()
+        return [index for _, index in ready] + [index for _, index in cooling]
+
+    def reserve(self, api_key: str, model: str, estimated_tokens: int) -> None:
+        budget = self._budget(api_key, model)
+        budget.refresh(time.monotonic())
+        budget.in_flight += 1
+        budget.requests += 1
+        budget.remaining_requests -= 1
+        budget.remaining_tokens -= estimated_tokens
+
+    def release(self, api_key: str, model: str) -> None:
+        budget = self._budget(api_key, model)
+        budget.in_flight = max(0, budget.in_flight - 1)
+
+    def on_success(self, api_key: str, model: str, headers) -> None:
+        self._apply_headers(self._budget(api_key, model), headers)
+
+    def on_rate_limited(self, api_key: str, model: str, headers) -> None:
+        budget = self._budget(api_key, model)
+        budget.rate_limited += 1
+        self._apply_headers(budget, headers)
+
+        now = time.monotonic()
+        wait = _parse_duration((headers or {}).get("retry-after"))
+        if wait is None:
+            resets = [t - now for t in (budget.requests_reset_at, budget.tokens_reset_at) if t > now]
+            wait = min(resets) if resets else GROQ_RATE_LIMIT_COOLDOWN_SECONDS
+        budget.cooldown_until = now + max(1.0, wait)
+        logger.warning(f"⚠ Clé Groq en cooldown {wait:.1f}s pour {model} (429)")
+
+    def on_error(self, api_key: str, model: str, estimated_tokens: int = 0) -> None:
+        """Echec hors 429 : la réservation (requête + tokens estimés) est rendue."""
+        budget = self._budget(api_key, model)
+        budget.errors += 1
+        budget.remaining_requests = min(budget.limit_requests, budget.remaining_requests + 1)
+        budget.remaining_tokens = min(budget.limit_tokens, budget.remaining_tokens + estimated_tokens)
+
+    @staticmethod
+    def _apply_headers(budget: _KeyBudget, headers) -> None:
+        if not headers:
+            return
+        now = time.monotonic()
+
+        limit_requests = _parse_int(headers.get("x-ratelimit-limit-requests"))
+        limit_tokens = _parse_int(headers.get("x-ratelimit-limit-tokens"))
+        remaining_requests = _parse_int(headers.get("x-ratelimit-remaining-requests"))
+        remaining_tokens = _parse_int(headers.get("x-ratelimit-remaining-tokens"))
+        reset_requests = _parse_duration(headers.get("x-ratelimit-reset-requests"))
+        reset_tokens = _parse_duration(headers.get("x-ratelimit-reset-tokens"))
+
+        if limit_requests:
+            budget.limit_requests = limit_requests
+        if limit_tokens:
+            budget.limit_tokens = limit_tokens
+        if remaining_requests is not None:
+            # Les appels encore en vol ne sont pas reflétés dans la réponse.
+            budget.remaining_requests = remaining_requests - budget.in_flight + 1
+        if remaining_tokens is not None:
+            budget.remaining_tokens = remaining_tokens
+        if reset_requests is not None:
+            budget.requests_reset_at = now + reset_requests
+        if reset_tokens is not None:
+            budget.tokens_reset_at = now + reset_tokens
+
+    def stats(self, api_keys: list[str]) -> list[dict]:
+        """Etat par clé/modèle (les clés ne sont jamais exposées, seulement leur numéro)."""
+        now = time.monotonic()
+        out = []
+        for (api_key, model), budget in self._budgets.items():
+            if api_key not in api_keys:
+                continue
+            budget.refresh(now)
+            out.append({
+                "key": api_keys.index(api_key) + 1,
+                "model": model,
+                "remaining_requests": int(budget.remaining_requests),
+                "remaining_tokens": int(budget.remaining_tokens),
+                "in_flight": budget.in_flight,
+                "cooldown_sec": round(max(0.0, budget.cooldown_until - now), 1),
+                "requests": budget.requests,
+                "rate_limited": budget.rate_limited,
+                "errors": budget.errors,
+            })
+        return sorted(out, key=lambda row: (row["model"], row["key"]))
+
+
+key_scheduler = GroqKeyScheduler()
@@ -0,0 +1,109 @@
+"""
+Cache de configuration des guilds (vai_guilds) côté bot.
+
+`GuildModel.get` (SELECT * sur une ligne large) était appelé à chaque message
+par SupportCog et TicketsCog. Les lectures passent désormais par ce cache :
+
+- chaque écriture sur vai_guilds (dashboard via l'API, ou bot) met à jour
+  `config_version` (timestamp ms côté MySQL) ;
+- le bot interroge toutes les quelques secondes les lignes dont la version
+  dépasse la dernière vue (`poll`) : une requête indexée qui ne renvoie rien
+  la plupart du temps ;
+- les modifications du dashboard sont donc visibles en quelques secondes, et
+  un TTL de sécurité force un rechargement si le poll échoue durablement.
+"""
+
+import time
+
+from loguru import logger
+
+from bot.config import GUILD_CONFIG_CACHE_TTL, GUILD_CONFIG_POLL_OVERLAP_MS
+from bot.db.async_models import AsyncGuildModel
+from bot.services.cache import SingleFlight
+
+
+class GuildConfigCache:
+    def __init__(self, ttl: float = GUILD_CONFIG_CACHE_TTL):
+        self.ttl = float(ttl)
+        self._entries: dict[int, tuple[float, dict]] = {}
+        self._inflight = SingleFlight()
+        self.high_water = 0
+        self.hits = 0
+        self.misses = 0
+        self.refreshed = 0
+
+    async def get(self, guild_id: int) -> dict | None:
+        """Configuration de la guild (copie), ou None si elle n'existe pas en DB."""
+        guild_id = int(guild_id)
+        entry = self._entries.get(guild_id)
+        if entry is not None and time.monotonic() - entry[0] < self.ttl:
+            self.hits += 1
+            return dict(entry[1])
+
+        self.misses += 1
+        row = await self._inflight.do(guild_id, lambda: self._fetch(guild_id))
+        return dict(row) if row else None
+
+    async def _fetch(self, guild_id: int) -> dict | None:
+        row = await AsyncGuildModel.get(guild_id)
+        if row:
+            self._store(row)
+        else:
+            self._entries.pop(guild_id, None)
+        return row
+
+    def _store(self, row: dict) -> None:
+        self._entries[int(row["id"])] = (time.monotonic(), row)
+        version = int(row.get("config_version") or 0)
+        if version > self.high_water:
+            self.high_water = version
+
+    def invalidate(self, guild_id: int) -> None:
+        """A appeler après une écriture locale sur vai_guilds."""
+        self._entries.pop(int(guild_id), None)
+
+    async def poll(self) -> int:
+        """
+        Recharge les guilds modifiées depuis le dernier poll. Retourne le nombre
+        d'entrées mises à jour.
+
+        On relit une petite fenêtre avant le high water mark : une transaction
+        commitée après une autre peut porter un timestamp légèrement plus ancien.
+        """
+        since = max(0, self.high_water - GUILD_CONFIG_POLL_OVERLAP_MS) if self.high_water else None
+        if since is None:
+            # Premier poll : on part de la version courante, le cache se remplit à la demande.
+            self.high_water = int(await AsyncGuildModel.get_max_config_version() or 0)
+            return 0
+
+        rows = await AsyncGuildModel.get_changed_since(since)
+        updated = 0
+        for row in rows or []:
+            guild_id = int(row["id"])
+            cached = self._entries.get(guild_id)
+            version = int(row.get("config_version") or 0)
+            if version > self.high_water:
+                self.high_water = version
+            if cached is None:
+                continue
+            if int(cached[1].get("config_version") or 0) != version:
+                self._store(row)
+                updated += 1
+        if updated:
+            self.refreshed += updated
+            logger.debug(f"Config guild: {updated} entrée(s) rechargée(s) (version {self.high_water})")
+        return updated
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "refreshed": self.refreshed,
+            "high_water": self.high_water,
+        }
+
+
+guild_config_cache = GuildConfigCache()
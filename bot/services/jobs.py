@@ -0,0 +1,360 @@
+"""
+File de tâches persistante (table vai_jobs).
+
+Les traitements lents déclenchés par une interaction Discord (résumé IA,
+traduction, DM...) ne doivent pas retarder la réponse : l'interaction
+enregistre une tâche et répond tout de suite, le worker l'exécute ensuite.
+Les travaux périodiques (purges...) passent par la même file.
+
+- une tâche = une ligne vai_jobs (type, payload JSON, guild_id, priorité) ;
+- le worker réclame les tâches prêtes par SELECT ... FOR UPDATE SKIP LOCKED,
+  priorité la plus haute d'abord : plusieurs processus (bot, `python -m
+  bot.worker`) peuvent consommer la même file ;
+- `run_at` / `delay_seconds` planifient une tâche ; `dedupe_key` garantit une
+  seule tâche en attente par clé (les demandes en double sont fusionnées) ;
+- `concurrency` limite le nombre d'exécutions simultanées d'un type dans ce
+  worker (ex: 1 pour une purge) ;
+- en cas d'erreur la tâche est replanifiée avec un backoff exponentiel
+  (run_at), jusqu'à max_attempts ; ensuite elle passe en 'dead' (dead-letter,
+  relançable depuis l'API) et le callback `on_give_up` du type est appelé ;
+- le worker prolonge le verrou de ses tâches en cours (heartbeat toutes les
+  JOB_HEARTBEAT_SECONDS) ; celles d'un worker arrêté brutalement sont remises
+  en attente après JOB_LOCK_TIMEOUT_SECONDS sans heartbeat. Fin / échec ne
+  s'appliquent que si la tâche est toujours verrouillée par ce worker ;
+- en mode cluster (plusieurs process du bot), chaque worker ne réclame que
+  les tâches des guilds de ses shards (`set_shard_scope`) ;
+- les traitements s'enchaînent en enregistrant la tâche suivante depuis le
+  handler (ex: ticket.close.summary -> ticket.close.translate -> ...) ;
+- une tâche récurrente (`register_recurring`) planifie sa prochaine
+  occurrence au début de chaque exécution.
+
+Usage :
+
+    job_worker.register("ticket.close.dm", handler, on_give_up=callback)
+    await job_worker.enqueue("ticket.close.dm", {"ticket_id": 42}, guild_id=...)
+"""
+
+import asyncio
+import os
+import random
+import socket
+import time
+from collections import Counter, deque
+from datetime import datetime, timezone
+from typing import Awaitable, Callable
+
+from loguru import logger
+
+from bot.config import (
+    JOB_CONCURRENCY, JOB_HEARTBEAT_SECONDS, JOB_LATENCY_WINDOW, JOB_LOCK_TIMEOUT_SECONDS, JOB_MAX_ATTEMPTS,
+    JOB_POLL_SECONDS, JOB_RETRY_BASE_SECONDS, JOB_RETRY_MAX_SECONDS,
+)
+from bot.db.async_models import run_db
+from bot.db.models import JobModel
+
+
+JobHandler = Callable[[dict], Awaitable[None]]
+GiveUpHandler = Callable[[dict, str], Awaitable[None]]
+
+
+class PermanentJobError(Exception):
+    """Erreur définitive : la tâche n'est pas retentée."""
+
+
+def backoff_seconds(attempt: int) -> int:
+    """Délai avant la tentative suivante (exponentiel, plafonné, avec jitter)."""
+    delay = min(JOB_RETRY_MAX_SECONDS, JOB_RETRY_BASE_SECONDS * 2 ** max(0, attempt - 1))
+    return int(delay * random.uniform(0.8, 1.2))
+
+
+def _percentile(samples, ratio: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * ratio))]
+
+
+class _TypeMetrics:
+    """Compteurs et latences (attente / exécution) d'un type de tâche dans ce worker."""
+
+    def __init__(self, window: int):
+        self.completed = 0
+        self.retried = 0
+        self.dead = 0
+        self.wait_ms: deque[float] = deque(maxlen=window)
+        self.run_ms: deque[float] = deque(maxlen=window)
+
+    def as_dict(self, uptime: float) -> dict:
+        return {
+            "completed": self.completed,
+            "retried": self.retried,
+            "dead": self.dead,
+            "per_min": round(self.completed * 60 / max(1.0, uptime), 2),
+            "wait_avg_ms": round(sum(self.wait_ms) / len(self.wait_ms), 1) if self.wait_ms else 0.0,
+            "wait_p95_ms": round(_percentile(self.wait_ms, 0.95), 1),
+            "run_avg_ms": round(sum(self.run_ms) / len(self.run_ms), 1) if self.run_ms else 0.0,
+            "run_p95_ms": round(_percentile(self.run_ms, 0.95), 1),
+        }
+
+
+class JobWorker:
+    def __init__(self, concurrency: int = JOB_CONCURRENCY, poll_seconds: float = JOB_POLL_SECONDS):
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.concurrency = max(1, int(concurrency))
+        self.poll_seconds = float(poll_seconds)
+        self._handlers: dict[str, tuple[JobHandler, GiveUpHandler | None]] = {}
+        self._limits: dict[str, int] = {}
+        self._recurring: dict[str, int] = {}
+        self._running: set[asyncio.Task] = set()
+        self._running_by_type: Counter[str] = Counter()
+        self._running_ids: set[int] = set()
+        self._metrics: dict[str, _TypeMetrics] = {}
+        self._shard_scope: tuple[int, list[int]] | None = None
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._started_at = time.monotonic()
+        self.completed = 0
+        self.retried = 0
+        self.dead = 0
+
+    def register(self, job_type: str, handler: JobHandler,
+                 on_give_up: GiveUpHandler | None = None, concurrency: int | None = None) -> None:
+        """`concurrency` : exécutions simultanées max de ce type dans ce worker."""
+        self._handlers[job_type] = (handler, on_give_up)
+        if concurrency:
+            self._limits[job_type] = max(1, int(concurrency))
+        else:
+            self._limits.pop(job_type, None)
+
+    def register_recurring(self, job_type: str, handler: JobHandler, every_seconds: int,
+                           concurrency: int = 1) -> None:
+        """Tâche périodique : une seule occurrence en attente (dedupe), replanifiée à chaque exécution."""
+        every_seconds = max(1, int(every_seconds))
+
+        async def run(job: dict) -> None:
+            await self._schedule_recurring(job_type, every_seconds)
+            await handler(job)
+
+        self._recurring[job_type] = every_seconds
+        self.register(job_type, run, concurrency=concurrency)
+
+    def set_shard_scope(self, shard_count: int | None, shard_ids: list[int] | None) -> None:
+        """
+        Mode cluster : ne réclamer que les tâches des guilds portées par ces
+        shards (plus celles sans guild). None = toutes les guilds.
+        """
+        if shard_count and shard_ids is not None and len(set(shard_ids)) < int(shard_count):
+            self._shard_scope = (int(shard_count), sorted(set(int(i) for i in shard_ids)))
+        else:
+            self._shard_scope = None
+
+    async def enqueue(self, job_type: str, payload: dict | None = None, *, guild_id: int | None = None,
+                      delay_seconds: float = 0, run_at: datetime | None = None, priority: int = 0,
+                      dedupe_key: str | None = None, max_attempts: int = JOB_MAX_ATTEMPTS) -> int | None:
+        """
+        Enregistre une tâche ; retourne son id (celui de la tâche existante en
+        cas de dedupe, None si l'insertion a échoué). `run_at` (datetime,
+        naïf = UTC) prime sur `delay_seconds`.
+        """
+        if run_at is not None:
+            if run_at.tzinfo is None:
+                run_at = run_at.replace(tzinfo=timezone.utc)
+            delay_seconds = (run_at - datetime.now(timezone.utc)).total_seconds()
+        delay = max(0, int(round(delay_seconds)))
+        job_id = await run_db(
+            JobModel.enqueue, job_type, payload or {}, guild_id, delay, int(max_attempts),
+            int(priority), dedupe_key
+        )
+        if job_id and delay <= 0 and job_type in self._handlers:
+            # Tâche locale : pas la peine d'attendre le prochain poll.
+            self._wake.set()
+        return job_id
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            loop = asyncio.get_running_loop()
+            self._started_at = time.monotonic()
+            self._task = loop.create_task(self._loop())
+            for job_type, every in self._recurring.items():
+                # Première occurrence immédiate (fusionnée avec celle déjà en attente).
+                loop.create_task(self._schedule_recurring(job_type, every, first=True))
+            logger.info(f"✓ Worker de tâches démarré ({self.worker_id}, {len(self._handlers)} type(s))")
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Arrête le claim puis laisse `timeout` secondes aux tâches en cours."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._running:
+            # Les tâches interrompues seront reprises via requeue_stale.
+            await asyncio.wait(self._running, timeout=timeout)
+
+    def stats(self) -> dict:
+        uptime = time.monotonic() - self._started_at
+        return {
+            "worker_id": self.worker_id,
+            "shards": self._shard_scope[1] if self._shard_scope else None,
+            "running": len(self._running),
+            "completed": self.completed,
+            "retried": self.retried,
+            "dead": self.dead,
+            "per_min": round(self.completed * 60 / max(1.0, uptime), 2),
+            "types": {job_type: m.as_dict(uptime) for job_type, m in sorted(self._metrics.items())},
+        }
+
+    # ------------------------------------------------------------------
+    # Internes
+    # ------------------------------------------------------------------
+
+    async def _schedule_recurring(self, job_type: str, every_seconds: int, first: bool = False) -> None:
+        try:
+            await self.enqueue(
+                job_type, delay_seconds=0 if first else every_seconds,
+                dedupe_key=f"recurring:{job_type}", priority=-1, max_attempts=3,
+            )
+        except Exception as e:
+            logger.warning(f"⚠ Planification {job_type}: {e}")
+
+    def _claim_plan(self, free: int) -> list[tuple[list[str], int]]:
+        """
+        Découpe le claim selon les limites par type : un claim groupé pour les
+        types sans limite, un claim borné par type limité qui a de la place.
+        """
+        plan: list[tuple[list[str], int]] = []
+        unlimited = [t for t in self._handlers if t not in self._limits]
+        if unlimited:
+            plan.append((unlimited, free))
+        for job_type, limit in self._limits.items():
+            room = limit - self._running_by_type[job_type]
+            if room > 0:
+                plan.append(([job_type], min(room, free)))
+        return plan
+
+    async def _heartbeat(self) -> None:
+        if not self._running_ids:
+            return
+        job_ids = list(self._running_ids)
+        refreshed = await run_db(JobModel.heartbeat, self.worker_id, job_ids)
+        if refreshed < len(job_ids):
+            logger.warning(
+                f"⚠ {len(job_ids) - refreshed} tâche(s) en cours n'appartiennent plus à ce worker "
+                f"(verrou expiré)"
+            )
+
+    async def _loop(self) -> None:
+        last_requeue = 0.0
+        last_heartbeat = time.monotonic()
+        while True:
+            self._wake.clear()
+            try:
+                if time.monotonic() - last_heartbeat >= JOB_HEARTBEAT_SECONDS:
+                    last_heartbeat = time.monotonic()
+                    await self._heartbeat()
+
+                if time.monotonic() - last_requeue >= JOB_LOCK_TIMEOUT_SECONDS / 2:
+                    last_requeue = time.monotonic()
+                    requeued = await run_db(JobModel.requeue_stale, JOB_LOCK_TIMEOUT_SECONDS)
+                    if requeued:
+                        logger.warning(f"⚠ {requeued} tâche(s) bloquée(s) remise(s) en attente")
+
+                free = self.concurrency - len(self._running)
+                for job_types, limit in self._claim_plan(free) if free > 0 else []:
+                    jobs = await run_db(JobModel.claim, self.worker_id, min(limit, free), job_types, self._shard_scope)
+                    for job in jobs:
+                        self._spawn(job)
+                    free -= len(jobs)
+                    if free <= 0:
+                        break
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"⚠ Worker de tâches: {e}")
+
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    def _spawn(self, job: dict) -> None:
+        job_type = job["job_type"]
+        self._running_by_type[job_type] += 1
+        self._running_ids.add(job["id"])
+        task = asyncio.get_running_loop().create_task(self._execute(job))
+        self._running.add(task)
+        task.add_done_callback(lambda t: self._on_task_done(t, job_type, job["id"]))
+
+    def _on_task_done(self, task: asyncio.Task, job_type: str, job_id: int) -> None:
+        self._running.discard(task)
+        self._running_ids.discard(job_id)
+        self._running_by_type[job_type] -= 1
+        if self._running_by_type[job_type] <= 0:
+            del self._running_by_type[job_type]
+        # Une place s'est libérée : d'autres tâches attendent peut-être.
+        self._wake.set()
+
+    def _type_metrics(self, job_type: str) -> _TypeMetrics:
+        metrics = self._metrics.get(job_type)
+        if metrics is None:
+            metrics = self._metrics[job_type] = _TypeMetrics(JOB_LATENCY_WINDOW)
+        return metrics
+
+    async def _finish(self, job: dict, method, *args) -> None:
+        """Enregistre la fin (complete / fail) ; une erreur DB est journalisée, jamais propagée."""
+        try:
+            applied = await run_db(method, job["id"], self.worker_id, *args)
+        except Exception as e:
+            logger.error(f"✗ Tâche {job['job_type']}#{job['id']}: statut non enregistré ({e})")
+            return
+        if not applied:
+            logger.warning(
+                f"⚠ Tâche {job['job_type']}#{job['id']}: verrou perdu (reprise par un autre worker), "
+                f"résultat de cette exécution ignoré"
+            )
+
+    async def _execute(self, job: dict) -> None:
+        job_id, job_type = job["id"], job["job_type"]
+        handler, on_give_up = self._handlers.get(job_type, (None, None))
+        metrics = self._type_metrics(job_type)
+        if job.get("wait_ms") is not None:
+            metrics.wait_ms.append(float(job["wait_ms"]))
+        started = time.perf_counter()
+        try:
+            if handler is None:
+                raise PermanentJobError(f"aucun handler pour {job_type}")
+            await handler(job)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            attempts = int(job.get("attempts") or 1)
+            if isinstance(e, PermanentJobError) or attempts >= int(job.get("max_attempts") or 1):
+                self.dead += 1
+                metrics.dead += 1
+                await self._finish(job, JobModel.fail, error, None)
+                logger.error(f"✗ Tâche {job_type}#{job_id} abandonnée après {attempts} tentative(s): {error}")
+                if on_give_up is not None:
+                    try:
+                        await on_give_up(job, error)
+                    except Exception as cb_error:
+                        logger.warning(f"⚠ on_give_up {job_type}#{job_id}: {cb_error}")
+            else:
+                delay = backoff_seconds(attempts)
+                self.retried += 1
+                metrics.retried += 1
+                await self._finish(job, JobModel.fail, error, delay)
+                logger.warning(f"⚠ Tâche {job_type}#{job_id} en échec ({error}), nouvel essai dans {delay}s")
+            return
+
+        run_ms = (time.perf_counter() - started) * 1000
+        self.completed += 1
+        metrics.completed += 1
+        metrics.run_ms.append(run_ms)
+        await self._finish(job, JobModel.complete)
+        logger.debug(f"Tâche {job_type}#{job_id} terminée en {run_ms:.0f}ms")
+
+
+job_worker = JobWorker()
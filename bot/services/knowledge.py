@@ -0,0 +1,326 @@
+"""
+Recherche dans la base de connaissances (vai_knowledge_base) pour le support public.
+
+Un index BM25 en mémoire est tenu par guild :
+
+- il est (re)synchronisé quand `vai_guilds.kb_version` change (bumpé par
+  chaque écriture KB, et lu via le cache de config des guilds) ;
+- la synchro est incrémentale : on compare (id, checksum) de chaque entrée et
+  on ne recharge que les entrées ajoutées/modifiées, les supprimées sont retirées ;
+- une question (quasi) identique à une question de la KB reçoit directement la
+  réponse, sans appel LLM ; sinon les top-k entrées sont injectées dans le prompt.
+
+Benchmark (latence de construction / recherche, taux de réponse directe) :
+
+    python -m bot.services.knowledge
+"""
+
+import math
+import re
+import time
+import unicodedata
+from collections import Counter
+
+from loguru import logger
+
+from bot.config import KB_CONTEXT_TOP_K, KB_DIRECT_ANSWER_SIMILARITY, KB_MIN_CONTEXT_SCORE
+from bot.db.async_models import run_db
+from bot.db.models import KnowledgeBaseModel
+from bot.services.cache import SingleFlight
+
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i in is it me my of on or the this to what "
+    "when where which who why with you your "
+    "au aux avec ce ces comment dans de des du elle en est et il je la le les leur ma mais me mes "
+    "mon ne nous on ou par pas pour qu que quel quelle qui sa se ses son sur ta te tes ton tu un une "
+    "vos votre vous y est-ce".split()
+)
+
+
+def normalize_text(text: str) -> str:
+    """Minuscules, sans accents ni ponctuation, espaces compactés."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    return " ".join(_TOKEN_RE.findall(text))
+
+
+def tokenize(text: str) -> list[str]:
+    return [t for t in normalize_text(text).split() if t not in _STOPWORDS and len(t) > 1]
+
+
+def _jaccard(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class GuildKnowledgeIndex:
+    """Index BM25 d'une guild, mis à jour entrée par entrée."""
+
+    K1 = 1.5
+    B = 0.75
+    QUESTION_BOOST = 2  # les termes de la question comptent double
+
+    def __init__(self):
+        self.version = None
+        self._docs: dict[int, dict] = {}
+        self._postings: dict[str, set[int]] = {}
+        self._by_question: dict[str, set[int]] = {}   # question normalisée -> ids (réponse directe exacte)
+        self._total_len = 0
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def signatures(self) -> dict[int, int]:
+        return {kb_id: doc["checksum"] for kb_id, doc in self._docs.items()}
+
+    def upsert(self, entry: dict) -> None:
+        kb_id = int(entry["id"])
+        self.remove(kb_id)
+        question = entry.get("question") or ""
+        answer = entry.get("answer") or ""
+        q_tokens = tokenize(question)
+        tf = Counter(q_tokens * self.QUESTION_BOOST + tokenize(answer))
+        self._docs[kb_id] = {
+            "entry": entry,
+            "checksum": int(entry.get("checksum") or 0),
+            "tf": tf,
+            "length": sum(tf.values()),
+            "question_norm": normalize_text(question),
+            "question_terms": set(q_tokens),
+        }
+        for term in tf:
+            self._postings.setdefault(term, set()).add(kb_id)
+        if self._docs[kb_id]["question_norm"]:
+            self._by_question.setdefault(self._docs[kb_id]["question_norm"], set()).add(kb_id)
+        self._total_len += sum(tf.values())
+
+    def remove(self, kb_id: int) -> None:
+        doc = self._docs.pop(int(kb_id), None)
+        if doc is None:
+            return
+        self._total_len -= doc["length"]
+        same_question = self._by_question.get(doc["question_norm"])
+        if same_question is not None:
+            same_question.discard(int(kb_id))
+            if not same_question:
+                del self._by_question[doc["question_norm"]]
+        for term in doc["tf"]:
+            ids = self._postings.get(term)
+            if ids is not None:
+                ids.discard(int(kb_id))
+                if not ids:
+                    del self._postings[term]
+
+    def search(self, query: str, k: int = 3) -> list[tuple[float, dict]]:
+        terms = tokenize(query)
+        if not terms or not self._docs:
+            return []
+        n = len(self._docs)
+        avg_len = self._total_len / n if n else 1.0
+        scores: dict[int, float] = {}
+        # On ne parcourt que les entrées contenant au moins un terme de la requête.
+        for term in set(terms):
+            ids = self._postings.get(term)
+            if not ids:
+                continue
+            df = len(ids)
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for kb_id in ids:
+                doc = self._docs[kb_id]
+                freq = doc["tf"][term]
+                norm = freq + self.K1 * (1 - self.B + self.B * doc["length"] / avg_len)
+                scores[kb_id] = scores.get(kb_id, 0.0) + idf * freq * (self.K1 + 1) / norm
+        ranked = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)[:k]
+        return [(round(score, 3), self._docs[kb_id]["entry"]) for kb_id, score in ranked]
+
+    def exact_match(self, query: str) -> dict | None:
+        """Entrée dont la question normalisée est identique à la requête (O(1))."""
+        ids = self._by_question.get(normalize_text(query))
+        return self._docs[min(ids)]["entry"] if ids else None
+
+    def near_match(self, query: str, ranked: list[tuple[float, dict]]) -> dict | None:
+        """
+        Quasi-identique : similarité de Jaccard sur les questions, calculée
+        seulement sur les candidats BM25 (`ranked`, résultat de search()).
+        """
+        query_terms = set(tokenize(query))
+        best, best_sim = None, 0.0
+        for _, entry in ranked:
+            doc = self._docs.get(int(entry["id"]))
+            if doc is None:
+                continue
+            sim = _jaccard(query_terms, doc["question_terms"])
+            if sim > best_sim:
+                best, best_sim = doc["entry"], sim
+        return best if best_sim >= KB_DIRECT_ANSWER_SIMILARITY else None
+
+    def direct_match(self, query: str, k: int = KB_CONTEXT_TOP_K) -> dict | None:
+        """Entrée dont la question est identique ou quasi identique à la requête."""
+        return self.exact_match(query) or self.near_match(query, self.search(query, k))
+
+
+class KnowledgeService:
+    """Index par guild + statistiques de recherche."""
+
+    def __init__(self):
+        self._indexes: dict[int, GuildKnowledgeIndex] = {}
+        self._sync_flight = SingleFlight()
+        self.lookups = 0
+        self.direct_hits = 0
+        self.context_hits = 0
+        self.search_ms_total = 0.0
+
+    async def lookup(self, guild_id: int, kb_version: int, question: str,
+                     k: int = KB_CONTEXT_TOP_K) -> dict:
+        """
+        Returns:
+            {"direct": entrée KB ou None, "context": [entrées], "search_ms": float}
+        """
+        index = await self._ensure(int(guild_id), int(kb_version or 0))
+        started = time.perf_counter()
+        direct = index.exact_match(question)
+        context = []
+        if direct is None:
+            # Une seule recherche BM25 : candidats à la réponse directe puis contexte du LLM.
+            ranked = index.search(question, k)
+            direct = index.near_match(question, ranked)
+            if direct is None:
+                context = [entry for score, entry in ranked if score >= KB_MIN_CONTEXT_SCORE]
+        elapsed = (time.perf_counter() - started) * 1000
+
+        self.lookups += 1
+        self.search_ms_total += elapsed
+        if direct is not None:
+            self.direct_hits += 1
+        elif context:
+            self.context_hits += 1
+        return {"direct": direct, "context": context, "search_ms": round(elapsed, 3)}
+
+    async def _ensure(self, guild_id: int, kb_version: int) -> GuildKnowledgeIndex:
+        index = self._indexes.get(guild_id)
+        if index is not None and index.version == kb_version:
+            return index
+        return await self._sync_flight.do(guild_id, lambda: self._sync(guild_id, kb_version))
+
+    async def _sync(self, guild_id: int, kb_version: int) -> GuildKnowledgeIndex:
+        """Synchro incrémentale : ne recharge que les entrées ajoutées ou modifiées."""
+        index = self._indexes.setdefault(guild_id, GuildKnowledgeIndex())
+        try:
+            remote = await run_db(KnowledgeBaseModel.get_signatures, guild_id)
+        except Exception as e:
+            logger.warning(f"⚠ Synchro KB guild {guild_id} échouée: {e}")
+            return index
+
+        local = index.signatures()
+        remote_map = {int(row["id"]): int(row["checksum"] or 0) for row in remote}
+        for kb_id in set(local) - set(remote_map):
+            index.remove(kb_id)
+        changed = [kb_id for kb_id, checksum in remote_map.items() if local.get(kb_id) != checksum]
+        if changed:
+            for entry in await run_db(KnowledgeBaseModel.get_many, changed):
+                index.upsert(entry)
+
+        index.version = kb_version
+        logger.debug(
+            f"KB guild {guild_id}: {len(index)} entrées ({len(changed)} rechargée(s), version {kb_version})"
+        )
+        return index
+
+    def stats(self) -> dict:
+        return {
+            "guilds_indexed": len(self._indexes),
+            "lookups": self.lookups,
+            "direct_hits": self.direct_hits,
+            "context_hits": self.context_hits,
+            "direct_rate": round(self.direct_hits / self.lookups, 3) if self.lookups else 0.0,
+            "avg_search_ms": round(self.search_ms_total / self.lookups, 3) if self.lookups else 0.0,
+        }
+
+
+knowledge_service = KnowledgeService()
+
+
+# ----------------------------------------------------------------------------
+# Benchmark (KB synthétique)
+# ----------------------------------------------------------------------------
+
+_BENCH_KB = [
+    ("Comment vérifier mon compte ?", "Va dans #verification et clique sur le bouton Vérifier."),
+    ("Où est le channel des règles ?", "Les règles sont dans #regles, en haut de la liste."),
+    ("How do I get the member role?", "React with ✅ in #roles to get the member role."),
+    ("How can I report a player?", "Open a ticket with the player's name and screenshots."),
+    ("Quels sont les horaires du staff ?", "Le staff est disponible de 10h à 22h (heure de Paris)."),
+    ("How do I buy premium?", "Use /pay or visit the dashboard to upgrade to premium."),
+    ("Comment changer mon pseudo ?", "Utilise la commande /nick ou demande à un modérateur."),
+    ("Is there a minimum age to join?", "You must be at least 13 years old (Discord ToS)."),
+]
+
+_BENCH_QUERIES = [
+    ("comment verifier mon compte", 0, "direct"),
+    ("How do I get the member role", 2, "direct"),
+    ("ou sont les regles du serveur ?", 1, "context"),
+    ("I want to report someone who is cheating", 3, "context"),
+    ("le staff est dispo a quelle heure", 4, "context"),
+    ("how to upgrade to premium plan", 5, "context"),
+    ("what's the weather today", None, "none"),
+]
+
+
+def benchmark(filler_entries: int = 500, rounds: int = 200) -> dict:
+    """Construit un index (KB de test + entrées de remplissage) et mesure recherche / pertinence."""
+    import random
+
+    rng = random.Random(0)
+    vocab = [f"mot{i}" for i in range(2000)]
+    index = GuildKnowledgeIndex()
+
+    started = time.perf_counter()
+    for i, (question, answer) in enumerate(_BENCH_KB):
+        index.upsert({"id": i, "question": question, "answer": answer, "checksum": i})
+    for i in range(filler_entries):
+        index.upsert({
+            "id": 10_000 + i,
+            "question": " ".join(rng.choices(vocab, k=8)),
+            "answer": " ".join(rng.choices(vocab, k=40)),
+            "checksum": i,
+        })
+    build_ms = (time.perf_counter() - started) * 1000
+
+    correct = 0
+    direct = 0
+    for query, expected_id, expected_kind in _BENCH_QUERIES:
+        match = index.direct_match(query)
+        if match is not None:
+            direct += 1
+            kind, found = "direct", match["id"]
+        else:
+            hits = [e for s, e in index.search(query, KB_CONTEXT_TOP_K) if s >= KB_MIN_CONTEXT_SCORE]
+            kind, found = ("context", hits[0]["id"]) if hits else ("none", None)
+        if kind == expected_kind and found == expected_id:
+            correct += 1
+
+    timings = []
+    for i in range(rounds):
+        query = _BENCH_QUERIES[i % len(_BENCH_QUERIES)][0]
+        t0 = time.perf_counter()
+        if index.direct_match(query) is None:
+            index.search(query, KB_CONTEXT_TOP_K)
+        timings.append((time.perf_counter() - t0) * 1000)
+    timings.sort()
+
+    return {
+        "entries": len(index),
+        "build_ms": round(build_ms, 2),
+        "search_p50_ms": round(timings[len(timings) // 2], 3),
+        "search_p95_ms": round(timings[int(len(timings) * 0.95)], 3),
+        "direct_answer_rate": round(direct / len(_BENCH_QUERIES), 3),
+        "retrieval_accuracy": round(correct / len(_BENCH_QUERIES), 3),
+    }
+
+
+if __name__ == "__main__":
+    for key, value in benchmark().items():
+        print(f"{key}: {value}")
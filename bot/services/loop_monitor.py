@@ -0,0 +1,123 @@
+"""
+Mesure du retard de l'event loop (event-loop lag).
+
+Une coroutine se reveille toutes les `interval` secondes ; l'ecart entre le
+reveil attendu et le reveil reel correspond au temps pendant lequel l'event
+loop etait bloque (appels synchrones DB/HTTP dans un handler, etc.).
+Ces chiffres servent de point de comparaison avant/apres optimisation.
+
+Comparaison modeles synchrones / proxies async (bot/db/async_models.py) sous
+la meme charge de handlers :
+
+    python -m bot.services.loop_monitor          # requete DB simulee (5ms)
+    python -m bot.services.loop_monitor --db     # vraie requete MySQL
+"""
+
+import asyncio
+import sys
+import time
+from collections import deque
+
+from loguru import logger
+
+
+class EventLoopLagMonitor:
+    def __init__(self, interval: float = 0.5, warn_threshold: float = 0.25, window: int = 600):
+        self.interval = interval
+        self.warn_threshold = warn_threshold
+        self._samples: deque[float] = deque(maxlen=window)
+        self._max_lag = 0.0
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - start - self.interval)
+            self._samples.append(lag)
+            self._max_lag = max(self._max_lag, lag)
+            if lag >= self.warn_threshold:
+                logger.warning(f"⚠ Event loop bloque pendant {lag * 1000:.0f}ms")
+
+    def stats(self) -> dict:
+        """Lag en ms sur la fenetre glissante (moyenne, p95, max) + max depuis le demarrage."""
+        samples = sorted(self._samples)
+        if not samples:
+            return {"samples": 0, "avg_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0, "max_ever_ms": 0.0}
+        p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+        return {
+            "samples": len(samples),
+            "avg_ms": round(sum(samples) / len(samples) * 1000, 2),
+            "p95_ms": round(p95 * 1000, 2),
+            "max_ms": round(samples[-1] * 1000, 2),
+            "max_ever_ms": round(self._max_lag * 1000, 2),
+        }
+
+
+loop_lag_monitor = EventLoopLagMonitor()
+
+
+# ----------------------------------------------------------------------------
+# Benchmark avant/apres : meme charge, appels DB directs ou via run_db
+# ----------------------------------------------------------------------------
+
+def _simulated_query(latency: float = 0.005) -> None:
+    """Aller-retour MySQL simule (le thread est bloque, comme avec mysql.connector)."""
+    time.sleep(latency)
+
+
+async def _load(mode: str, query, events_per_sec: float, duration: float, queries_per_event: int) -> dict:
+    from bot.db.async_models import run_db
+
+    async def handler():
+        # Equivalent d'un on_message de TicketsCog : ticket, config guild, insert message
+        for _ in range(queries_per_event):
+            if mode == "sync":
+                query()
+            else:
+                await run_db(query)
+
+    monitor = EventLoopLagMonitor(interval=0.01, warn_threshold=float("inf"), window=100_000)
+    monitor.start()
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    count = int(events_per_sec * duration)
+    handlers = []
+    for i in range(count):
+        delay = started + i / events_per_sec - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        handlers.append(asyncio.create_task(handler()))
+    await asyncio.gather(*handlers)
+    await asyncio.sleep(monitor.interval * 2)
+    monitor.stop()
+    return {"mode": mode, "events": count, "elapsed_s": round(loop.time() - started, 2), **monitor.stats()}
+
+
+def benchmark(query=None, events_per_sec: float = 50, duration: float = 5.0,
+              queries_per_event: int = 3) -> list:
+    """Lag de l'event loop avec les modeles synchrones ("sync") puis les proxies async ("async")."""
+    query = query or _simulated_query
+    return [
+        asyncio.run(_load(mode, query, events_per_sec, duration, queries_per_event))
+        for mode in ("sync", "async")
+    ]
+
+
+if __name__ == "__main__":
+    query = None
+    if "--db" in sys.argv:
+        from bot.db.models import TicketModel
+        query = lambda: TicketModel.get_by_channel(0)  # noqa: E731 - un aller-retour indexe
+    for result in benchmark(query):
+        print(result)
@@ -0,0 +1,55 @@
+"""
+Tâches de maintenance (purges périodiques, recalcul des stats), exécutées
+par la file vai_jobs.
+
+Elles ne dépendent pas du client Discord : le bot les exécute par défaut
+(JOB_MAINTENANCE_IN_BOT=1), le worker autonome (`python -m bot.worker`)
+peut les reprendre. Plusieurs workers peuvent les enregistrer sans risque :
+la dedupe_key garantit une seule occurrence en attente.
+"""
+
+from loguru import logger
+
+from bot.config import (
+    JOB_DEAD_RETENTION_DAYS, JOB_DONE_RETENTION_DAYS, JOB_PRUNE_EVERY_SECONDS,
+    JOB_TICKET_STATS_REBUILD, TEMP_CODE_CLEANUP_SECONDS,
+)
+from bot.db.async_models import run_db
+from bot.db.models import GuildStatsModel, JobModel, TempCodeModel
+from bot.services.jobs import JobWorker, job_worker
+
+
+async def _cleanup_temp_codes(job: dict) -> None:
+    count = await run_db(TempCodeModel.cleanup)
+    if count:
+        logger.info(f"✓ {count} code(s) OAuth temporaire(s) purgé(s)")
+
+
+async def _prune_jobs(job: dict) -> None:
+    count = await run_db(JobModel.prune, JOB_DONE_RETENTION_DAYS, JOB_DEAD_RETENTION_DAYS)
+    if count:
+        logger.info(f"✓ {count} tâche(s) terminée(s) purgée(s) de vai_jobs")
+
+
+async def _rebuild_ticket_stats(job: dict) -> None:
+    """
+    Recalcule les stats tickets pré-agrégées d'une guild (payload guild_id) ;
+    sans guild_id, planifie une tâche par guild ayant des tickets (backfill).
+    """
+    guild_id = (job.get("payload") or {}).get("guild_id") or job.get("guild_id")
+    if guild_id:
+        await run_db(GuildStatsModel.rebuild, int(guild_id))
+        return
+    guild_ids = await run_db(GuildStatsModel.guild_ids_with_tickets)
+    for gid in guild_ids:
+        await run_db(
+            JobModel.enqueue, JOB_TICKET_STATS_REBUILD, {"guild_id": gid}, gid, 0, 5,
+            priority=-5, dedupe_key=f"{JOB_TICKET_STATS_REBUILD}:{gid}",
+        )
+    logger.info(f"✓ Recalcul des stats tickets planifié pour {len(guild_ids)} guild(s)")
+
+
+def register_maintenance_jobs(worker: JobWorker = job_worker) -> None:
+    worker.register_recurring("maintenance.temp_codes.cleanup", _cleanup_temp_codes, TEMP_CODE_CLEANUP_SECONDS)
+    worker.register_recurring("maintenance.jobs.prune", _prune_jobs, JOB_PRUNE_EVERY_SECONDS)
+    worker.register(JOB_TICKET_STATS_REBUILD, _rebuild_ticket_stats, concurrency=2)
@@ -0,0 +1,188 @@
+"""
+Priorisation automatique des tickets, hors du chemin de traitement des messages.
+
+Avant : chaque message utilisateur rechargeait tout l'historique du ticket et
+déclenchait un appel LLM. Désormais `PriorityEngine.observe()` se contente
+d'empiler le message et (re)programme une classification en arrière-plan :
+
+- au bout de `every_n` nouveaux messages, ou
+- après `quiet_seconds` sans nouveau message (l'utilisateur a fini d'écrire).
+
+Le LLM reçoit uniquement les nouveaux messages + un état glissant (priorité
+actuelle et quelques messages récents déjà vus), chargé depuis la DB une seule
+fois par ticket.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Awaitable, Callable
+
+from loguru import logger
+
+from bot.config import (
+    PRIORITY_CONTEXT_MESSAGES, PRIORITY_QUIET_SECONDS, PRIORITY_RECLASSIFY_EVERY,
+    PRIORITY_STATE_IDLE_SECONDS,
+)
+from bot.db.async_models import AsyncTicketMessageModel
+
+
+class _TicketState:
+    __slots__ = (
+        "ticket_id", "priority", "language", "topic", "pending", "context",
+        "seeded", "timer", "running", "last_activity",
+    )
+
+    def __init__(self, ticket_id: int, priority: str | None, language: str, topic: str | None,
+                 context_size: int):
+        self.ticket_id = ticket_id
+        self.priority = priority or "medium"
+        self.language = language
+        self.topic = topic
+        self.pending: list[dict] = []
+        self.context: deque[dict] = deque(maxlen=context_size)
+        self.seeded = False
+        self.timer: asyncio.Task | None = None
+        self.running = False
+        self.last_activity = time.monotonic()
+
+
+class PriorityEngine:
+    def __init__(self, groq_client, on_change: Callable[[int, str], Awaitable[None]], *,
+                 every_n: int = PRIORITY_RECLASSIFY_EVERY,
+                 quiet_seconds: float = PRIORITY_QUIET_SECONDS,
+                 context_messages: int = PRIORITY_CONTEXT_MESSAGES):
+        self.groq_client = groq_client
+        self.on_change = on_change
+        self.every_n = max(1, int(every_n))
+        self.quiet_seconds = float(quiet_seconds)
+        self.context_messages = max(0, int(context_messages))
+        self._states: dict[int, _TicketState] = {}
+        self.observed = 0
+        self.classifications = 0
+
+    def observe(self, ticket_id: int, *, author: str, content: str, message_id: int | None,
+                priority: str | None, language: str, topic: str | None = None) -> None:
+        """Enregistre un message utilisateur ; ne bloque jamais (aucun I/O)."""
+        content = (content or "").strip()
+        if not content:
+            return
+
+        state = self._states.get(ticket_id)
+        if state is None:
+            self._prune()
+            state = _TicketState(ticket_id, priority, language, topic, self.context_messages)
+            self._states[ticket_id] = state
+        state.language = language or state.language
+        state.last_activity = time.monotonic()
+        state.pending.append({
+            "author": author,
+            "content": content,
+            "message_id": message_id,
+            "sent_at": state.last_activity,
+        })
+        self.observed += 1
+
+        if state.running:
+            # Sera repris à la fin de la classification en cours.
+            return
+        delay = 0.0 if len(state.pending) >= self.every_n else self.quiet_seconds
+        self._schedule(state, delay)
+
+    def forget(self, ticket_id: int) -> None:
+        """A appeler à la fermeture du ticket."""
+        state = self._states.pop(ticket_id, None)
+        if state and state.timer and not state.timer.done():
+            state.timer.cancel()
+
+    def shutdown(self) -> None:
+        for ticket_id in list(self._states):
+            self.forget(ticket_id)
+
+    def stats(self) -> dict:
+        return {
+            "tracked_tickets": len(self._states),
+            "observed_messages": self.observed,
+            "classifications": self.classifications,
+            "llm_calls_saved": max(0, self.observed - self.classifications),
+        }
+
+    # ------------------------------------------------------------------
+    # Internes
+    # ------------------------------------------------------------------
+
+    def _schedule(self, state: _TicketState, delay: float) -> None:
+        if state.timer and not state.timer.done():
+            state.timer.cancel()
+        state.timer = asyncio.get_running_loop().create_task(self._run_after(state, delay))
+
+    async def _run_after(self, state: _TicketState, delay: float) -> None:
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            return
+
+        state.running = True
+        try:
+            await self._classify(state)
+        except asyncio.CancelledError:
+            return
+        except Exception as e:
+            logger.debug(f"Auto-priorite ticket {state.ticket_id} ignoree: {e}")
+        finally:
+            state.running = False
+            state.timer = None
+
+        # Messages arrivés pendant l'appel LLM.
+        if state.pending and self._states.get(state.ticket_id) is state:
+            delay = 0.0 if len(state.pending) >= self.every_n else self.quiet_seconds
+            self._schedule(state, delay)
+
+    async def _classify(self, state: _TicketState) -> None:
+        new_messages, state.pending = state.pending, []
+        if not new_messages:
+            return
+
+        if not state.seeded:
+            await self._seed_context(state, {m["message_id"] for m in new_messages})
+
+        self.classifications += 1
+        result = await self.groq_client.classify_ticket_priority(
+            new_messages,
+            state.language,
+            previous_priority=state.priority,
+            context=list(state.context),
+            topic=state.topic,
+        )
+        state.context.extend(new_messages)
+
+        if result and result != state.priority and self._states.get(state.ticket_id) is state:
+            state.priority = result
+            await self.on_change(state.ticket_id, result)
+
+    async def _seed_context(self, state: _TicketState, exclude_ids: set) -> None:
+        """Charge une fois les derniers messages du ticket (ex: après un redémarrage du bot)."""
+        state.seeded = True
+        if not self.context_messages:
+            return
+        try:
+            msgs = await AsyncTicketMessageModel.get_by_ticket(state.ticket_id)
+        except Exception:
+            return
+        for m in (msgs or [])[-(self.context_messages + len(exclude_ids)):]:
+            if m.get("discord_message_id") in exclude_ids:
+                continue
+            content = (m.get("original_content") or "").strip()
+            if content:
+                state.context.append({
+                    "author": m.get("author_username") or str(m.get("author_id")),
+                    "content": content,
+                    "message_id": m.get("discord_message_id"),
+                })
+
+    def _prune(self) -> None:
+        """Oublie les tickets inactifs (fermés depuis le dashboard, abandonnés...)."""
+        limit = time.monotonic() - PRIORITY_STATE_IDLE_SECONDS
+        for ticket_id, state in list(self._states.items()):
+            if state.last_activity < limit and not state.running:
+                self.forget(ticket_id)
@@ -0,0 +1,378 @@
+"""
+Résumé des tickets en map-reduce.
+
+Avant : seuls les 60 derniers messages étaient envoyés en un seul prompt au
+modèle qualité ; le début des longs tickets était perdu et les gros prompts
+étaient lents. Désormais :
+
+- un ticket court (< SUMMARY_DIRECT_MAX_TOKENS) est résumé en un seul appel ;
+- sinon la conversation est découpée en fenêtres de ~SUMMARY_CHUNK_TOKENS,
+  résumées en parallèle par le modèle rapide (map), puis fusionnées par le
+  modèle qualité (reduce) ;
+- les fenêtres sont découpées depuis le début du ticket : un nouveau message ne
+  modifie que la dernière. Les résumés partiels sont mis en cache (mémoire +
+  vai_ticket_summary_chunks, clé = hash du contenu), un ticket résumé à nouveau
+  ne paie donc que les fenêtres nouvelles ;
+- budgets : messages tronqués à SUMMARY_MESSAGE_MAX_CHARS, au plus
+  SUMMARY_MAX_CHUNKS fenêtres (la première est toujours gardée), réduction
+  intermédiaire si les résumés partiels dépassent SUMMARY_MERGE_INPUT_TOKENS.
+
+Pendant que le ticket est ouvert, `RollingSummaryEngine` tient en plus un
+résumé glissant (vai_tickets.rolling_summary) : rafraîchi en arrière-plan
+après une rafale de messages, à partir du résumé précédent et des seuls
+nouveaux messages. A la fermeture il ne reste qu'un petit delta à intégrer.
+"""
+
+import asyncio
+import hashlib
+import time
+
+from loguru import logger
+
+from bot.config import (
+    GROQ_MODEL_FAST, GROQ_MODEL_QUALITY,
+    SUMMARY_ROLLING_EVERY, SUMMARY_ROLLING_QUIET_SECONDS,
+    SUMMARY_CHUNK_CACHE_SIZE, SUMMARY_CHUNK_OUTPUT_TOKENS, SUMMARY_CHUNK_TOKENS,
+    SUMMARY_DIRECT_MAX_TOKENS, SUMMARY_MAX_CHUNKS, SUMMARY_MERGE_INPUT_TOKENS,
+    SUMMARY_MESSAGE_MAX_CHARS, SUMMARY_PARALLEL_CHUNKS,
+)
+from bot.db.async_models import AsyncTicketMessageModel, AsyncTicketModel, run_db
+from bot.db.models import TicketSummaryChunkModel
+from bot.services.cache import TTLCache
+from bot.services.groq_client import SUMMARY_ERROR_RESPONSES, SUMMARY_FALLBACK_RESPONSE
+
+
+_CHUNK_CACHE_TTL = 6 * 3600
+
+
+def _tokens(text: str) -> int:
+    # Même approximation que groq_keys.estimate_tokens (≈ 4 caractères / token).
+    return len(text) // 4 + 1
+
+
+def _message_entry(message: dict) -> dict | None:
+    content = (message.get("original_content") or message.get("content") or "").strip()
+    if not content:
+        return None
+    if len(content) > SUMMARY_MESSAGE_MAX_CHARS:
+        content = content[:SUMMARY_MESSAGE_MAX_CHARS] + " [...]"
+    return {
+        "id": message.get("id"),
+        "author": message.get("author_username") or message.get("author") or str(message.get("author_id")),
+        "content": content,
+    }
+
+
+class TicketSummarizer:
+    # Partagés entre instances (close_ticket et TicketCloseView).
+    chunk_cache = TTLCache(maxsize=SUMMARY_CHUNK_CACHE_SIZE, ttl=_CHUNK_CACHE_TTL)
+    chunks_computed = 0
+    chunks_reused = 0
+    summaries = 0
+
+    def __init__(self, groq_client):
+        self.groq_client = groq_client
+
+    async def summarize(self, ticket_id: int, messages: list[dict], language: str) -> str:
+        """
+        Résumé du ticket. `messages` : lignes de vai_ticket_messages (ou dicts
+        {author, content}) dans l'ordre chronologique.
+        """
+        conversation = [e for e in map(_message_entry, messages or []) if e]
+        lines = [(e["id"], f"[{e['author']}]: {e['content']}") for e in conversation]
+
+        type(self).summaries += 1
+        if sum(_tokens(line) for _, line in lines) <= SUMMARY_DIRECT_MAX_TOKENS:
+            return await self.groq_client.generate_ticket_summary(conversation, language)
+
+        windows = self._windows(lines)
+        if len(windows) > SUMMARY_MAX_CHUNKS:
+            logger.info(
+                f"Résumé ticket {ticket_id}: {len(windows)} fenêtres, "
+                f"on garde la première et les {SUMMARY_MAX_CHUNKS - 1} plus récentes"
+            )
+            windows = windows[:1] + windows[-(SUMMARY_MAX_CHUNKS - 1):]
+
+        partials = await self._map(ticket_id, windows, language)
+        partials = [p for p in partials if p]
+        if not partials:
+            return SUMMARY_FALLBACK_RESPONSE
+
+        partials = await self._reduce_to_budget(partials, language)
+        return await self.groq_client.merge_ticket_summaries(partials, language)
+
+    # ------------------------------------------------------------------
+    # Map
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _windows(lines: list[tuple]) -> list[list[tuple]]:
+        """Découpe déterministe depuis le début : les fenêtres pleines ne changent plus."""
+        windows, current, size = [], [], 0
+        for item in lines:
+            cost = _tokens(item[1])
+            if current and size + cost > SUMMARY_CHUNK_TOKENS:
+                windows.append(current)
+                current, size = [], 0
+            current.append(item)
+            size += cost
+        if current:
+            windows.append(current)
+        return windows
+
+    @staticmethod
+    def _chunk_hash(window: list[tuple], language: str) -> str:
+        digest = hashlib.sha256(language.encode("utf-8"))
+        for _, line in window:
+            digest.update(b"\x1e")
+            digest.update(line.encode("utf-8"))
+        return digest.hexdigest()
+
+    async def _map(self, ticket_id: int, windows: list[list[tuple]], language: str) -> list[str | None]:
+        hashes = [self._chunk_hash(w, language) for w in windows]
+        results: list[str | None] = [self.chunk_cache.get((ticket_id, h)) for h in hashes]
+
+        missing = [h for h, r in zip(hashes, results) if r is None]
+        if missing:
+            try:
+                stored = await run_db(TicketSummaryChunkModel.get_many, ticket_id, missing)
+            except Exception as e:
+                logger.debug(f"Résumés partiels ticket {ticket_id} non lus: {e}")
+                stored = {}
+            for i, h in enumerate(hashes):
+                if results[i] is None and h in stored:
+                    results[i] = stored[h]
+                    self.chunk_cache.set((ticket_id, h), stored[h])
+
+        reused = sum(1 for r in results if r is not None)
+        type(self).chunks_reused += reused
+
+        semaphore = asyncio.Semaphore(SUMMARY_PARALLEL_CHUNKS)
+
+        async def compute(i: int) -> None:
+            window, chunk_hash = windows[i], hashes[i]
+            async with semaphore:
+                summary = await self.groq_client.summarize_ticket_chunk(
+                    "\n".join(line for _, line in window), language,
+                    max_tokens=SUMMARY_CHUNK_OUTPUT_TOKENS,
+                )
+            if not summary:
+                return
+            results[i] = summary
+            type(self).chunks_computed += 1
+            self.chunk_cache.set((ticket_id, chunk_hash), summary)
+            try:
+                await run_db(
+                    TicketSummaryChunkModel.store, ticket_id, chunk_hash, summary, language,
+                    window[0][0], window[-1][0],
+                )
+            except Exception as e:
+                logger.debug(f"Résumé partiel ticket {ticket_id} non stocké: {e}")
+
+        todo = [i for i, r in enumerate(results) if r is None]
+        await asyncio.gather(*(compute(i) for i in todo))
+        logger.info(
+            f"Résumé ticket {ticket_id}: {len(windows)} fenêtres "
+            f"({reused} en cache, {len(todo)} calculée(s))"
+        )
+        return results
+
+    # ------------------------------------------------------------------
+    # Reduce
+    # ------------------------------------------------------------------
+
+    async def _reduce_to_budget(self, partials: list[str], language: str) -> list[str]:
+        """Regroupe les résumés partiels (modèle rapide) tant qu'ils dépassent le budget de fusion."""
+        while len(partials) > 1 and sum(_tokens(p) for p in partials) > SUMMARY_MERGE_INPUT_TOKENS:
+            groups, current, size = [], [], 0
+            for p in partials:
+                cost = _tokens(p)
+                if current and size + cost > SUMMARY_CHUNK_TOKENS:
+                    groups.append(current)
+                    current, size = [], 0
+                current.append(p)
+                size += cost
+            if current:
+                groups.append(current)
+            if len(groups) == len(partials):
+                break  # chaque résumé partiel remplit déjà une fenêtre
+
+            reduced = await asyncio.gather(*(
+                self.groq_client.summarize_ticket_chunk(
+                    "\n\n".join(group), language, max_tokens=SUMMARY_CHUNK_OUTPUT_TOKENS
+                )
+                for group in groups
+            ))
+            partials = [r if r else "\n".join(g) for r, g in zip(reduced, groups)]
+        return partials
+
+    @classmethod
+    def stats(cls) -> dict:
+        return {
+            "summaries": cls.summaries,
+            "chunks_computed": cls.chunks_computed,
+            "chunks_reused": cls.chunks_reused,
+            "chunk_cache": cls.chunk_cache.stats(),
+        }
+
+
+class _RollingState:
+    __slots__ = ("ticket_id", "language", "pending", "timer", "running", "last_activity")
+
+    def __init__(self, ticket_id: int, language: str):
+        self.ticket_id = ticket_id
+        self.language = language
+        self.pending = 0
+        self.timer: asyncio.Task | None = None
+        self.running = False
+        self.last_activity = time.monotonic()
+
+
+class RollingSummaryEngine:
+    """Résumé glissant des tickets ouverts, rafraîchi en arrière-plan."""
+
+    def __init__(self, groq_client, summarizer: TicketSummarizer, *,
+                 every_n: int = SUMMARY_ROLLING_EVERY,
+                 quiet_seconds: float = SUMMARY_ROLLING_QUIET_SECONDS):
+        self.groq_client = groq_client
+        self.summarizer = summarizer
+        self.every_n = max(1, int(every_n))
+        self.quiet_seconds = float(quiet_seconds)
+        self._states: dict[int, _RollingState] = {}
+        self.refreshes = 0
+        self.closes_reused = 0
+        self.closes_delta = 0
+        self.closes_full = 0
+
+    def observe(self, ticket_id: int, language: str) -> None:
+        """Un message vient d'être stocké dans le ticket ; ne bloque jamais."""
+        state = self._states.get(ticket_id)
+        if state is None:
+            state = _RollingState(ticket_id, language)
+            self._states[ticket_id] = state
+        state.language = language or state.language
+        state.pending += 1
+        state.last_activity = time.monotonic()
+        if state.running:
+            return
+        self._schedule(state, 0.0 if state.pending >= self.every_n else self.quiet_seconds)
+
+    def forget(self, ticket_id: int) -> None:
+        state = self._states.pop(ticket_id, None)
+        if state and state.timer and not state.timer.done():
+            state.timer.cancel()
+
+    def shutdown(self) -> None:
+        for ticket_id in list(self._states):
+            self.forget(ticket_id)
+
+    async def finalize(self, ticket: dict, messages: list[dict], language: str) -> str:
+        """
+        Résumé final à la fermeture : le résumé glissant s'il couvre déjà tout,
+        sinon le résumé glissant + les derniers messages (un petit appel), et en
+        dernier recours le résumé complet.
+        """
+        ticket_id = int(ticket["id"])
+        self.forget(ticket_id)
+
+        previous, covered = self._usable(ticket, language)
+        if previous is not None:
+            new = [e for e in map(_message_entry, messages or [])
+                   if e and int(e["id"] or 0) > covered]
+            if not new:
+                self.closes_reused += 1
+                return previous
+            if sum(_tokens(e["content"]) for e in new) <= SUMMARY_DIRECT_MAX_TOKENS:
+                updated = await self.groq_client.update_ticket_summary(
+                    previous, new, language, model=GROQ_MODEL_QUALITY
+                )
+                if updated:
+                    self.closes_delta += 1
+                    return updated
+
+        self.closes_full += 1
+        return await self.summarizer.summarize(ticket_id, messages, language)
+
+    def stats(self) -> dict:
+        return {
+            "tracked_tickets": len(self._states),
+            "refreshes": self.refreshes,
+            "closes_reused": self.closes_reused,
+            "closes_delta": self.closes_delta,
+            "closes_full": self.closes_full,
+        }
+
+    # ------------------------------------------------------------------
+    # Internes
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _usable(ticket: dict, language: str) -> tuple[str | None, int]:
+        summary = (ticket.get("rolling_summary") or "").strip()
+        if not summary or (ticket.get("rolling_summary_language") or language) != language:
+            return None, 0
+        return summary, int(ticket.get("rolling_summary_message_id") or 0)
+
+    def _schedule(self, state: _RollingState, delay: float) -> None:
+        if state.timer and not state.timer.done():
+            state.timer.cancel()
+        state.timer = asyncio.get_running_loop().create_task(self._run_after(state, delay))
+
+    async def _run_after(self, state: _RollingState, delay: float) -> None:
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            return
+
+        state.running = True
+        state.pending = 0
+        try:
+            await self._refresh(state)
+        except asyncio.CancelledError:
+            return
+        except Exception as e:
+            logger.debug(f"Résumé glissant ticket {state.ticket_id} ignoré: {e}")
+        finally:
+            state.running = False
+            state.timer = None
+
+        if self._states.get(state.ticket_id) is not state:
+            return
+        if state.pending:
+            self._schedule(state, 0.0 if state.pending >= self.every_n else self.quiet_seconds)
+        else:
+            # Rien en attente : l'état sera recréé au prochain message.
+            del self._states[state.ticket_id]
+
+    async def _refresh(self, state: _RollingState) -> None:
+        ticket = await AsyncTicketModel.get(state.ticket_id)
+        if not ticket or ticket.get("status") == "closed":
+            return
+
+        previous, covered = self._usable(ticket, state.language)
+        rows = await AsyncTicketMessageModel.get_since(state.ticket_id, covered)
+        if not rows:
+            return
+        new = [e for e in map(_message_entry, rows) if e]
+
+        if not new:
+            summary = previous
+        elif sum(_tokens(e["content"]) for e in new) <= SUMMARY_DIRECT_MAX_TOKENS:
+            summary = await self.groq_client.update_ticket_summary(
+                previous, new, state.language, model=GROQ_MODEL_FAST
+            )
+        else:
+            # Premier résumé d'un long ticket (ou gros retard) : map-reduce,
+            # dont les fenêtres restent en cache pour la suite.
+            all_rows = await AsyncTicketMessageModel.get_by_ticket(state.ticket_id)
+            summary = await self.summarizer.summarize(state.ticket_id, all_rows or [], state.language)
+
+        if not summary or summary in SUMMARY_ERROR_RESPONSES:
+            return
+        await AsyncTicketModel.set_rolling_summary(
+            state.ticket_id, summary, state.language, int(rows[-1]["id"])
+        )
+        self.refreshes += 1
+        logger.debug(
+            f"Résumé glissant ticket {state.ticket_id} mis à jour ({len(new)} nouveau(x) message(s))"
+        )
@@ -0,0 +1,97 @@
+"""
+Index mémoire des channels de tickets ouverts.
+
+`TicketsCog.on_message` reçoit les messages de tous les channels de tous les
+serveurs ; la grande majorité ne sont pas des tickets. Plutôt que de faire un
+`TicketModel.get_by_channel` à chaque message, on garde l'ensemble des
+channel_id des tickets ouverts :
+
+- chargé au démarrage (`load`), puis resynchronisé périodiquement ;
+- mis à jour à la création / fermeture d'un ticket par le bot ;
+- une fermeture depuis le dashboard (/internal/ticket/{id}/close) est
+  rattrapée au prochain message du channel (la lecture DB voit le ticket fermé
+  et l'entrée est retirée) ou à la prochaine resynchronisation.
+
+Tant que l'index n'a pas été chargé, `may_be_ticket` renvoie toujours True
+(on retombe sur la lecture DB plutôt que d'ignorer un vrai ticket).
+"""
+
+import time
+
+from loguru import logger
+
+from bot.db.async_models import AsyncTicketModel
+
+
+class OpenTicketIndex:
+    def __init__(self):
+        self._channels: set[int] = set()
+        self.loaded = False
+        self.loaded_at = 0.0
+        # Modifications faites pendant un rechargement (pour ne pas les perdre).
+        self._loading = False
+        self._added_during_load: set[int] = set()
+        self._removed_during_load: set[int] = set()
+        self.rejected = 0
+        self.lookups = 0
+
+    async def load(self) -> bool:
+        """(Re)charge la liste des channels de tickets ouverts depuis la DB."""
+        self._loading = True
+        self._added_during_load.clear()
+        self._removed_during_load.clear()
+        try:
+            channel_ids = await AsyncTicketModel.get_open_channel_ids()
+        except Exception as e:
+            logger.warning(f"⚠ Index des tickets ouverts non chargé: {e}")
+            return False
+        finally:
+            self._loading = False
+
+        channels = {int(c) for c in channel_ids or []}
+        channels |= self._added_during_load
+        channels -= self._removed_during_load
+        if self.loaded:
+            stale = len(self._channels - channels)
+            if stale:
+                logger.debug(f"Index tickets: {stale} channel(s) fermé(s) hors bot retiré(s)")
+        self._channels = channels
+        self.loaded = True
+        self.loaded_at = time.monotonic()
+        return True
+
+    def add(self, channel_id: int) -> None:
+        channel_id = int(channel_id)
+        self._channels.add(channel_id)
+        if self._loading:
+            self._added_during_load.add(channel_id)
+            self._removed_during_load.discard(channel_id)
+
+    def discard(self, channel_id: int) -> None:
+        channel_id = int(channel_id)
+        self._channels.discard(channel_id)
+        if self._loading:
+            self._removed_during_load.add(channel_id)
+            self._added_during_load.discard(channel_id)
+
+    def may_be_ticket(self, channel_id: int) -> bool:
+        """False = channel certainement pas un ticket ouvert (aucune requête DB nécessaire)."""
+        if not self.loaded or int(channel_id) in self._channels:
+            self.lookups += 1
+            return True
+        self.rejected += 1
+        return False
+
+    def __len__(self) -> int:
+        return len(self._channels)
+
+    def stats(self) -> dict:
+        return {
+            "loaded": self.loaded,
+            "open_channels": len(self._channels),
+            "rejected_without_db": self.rejected,
+            "db_lookups": self.lookups,
+        }
+
+
+open_ticket_index = OpenTicketIndex()
@@ -1,19 +1,49 @@
 """
 Service de traduction avec cache
 Détecte les langues, vérifie le cache, et appelle Groq si nécessaire
+
+Deux niveaux de cache : une LRU mémoire (partagée par toutes les instances du
+service) devant la table vai_translations_cache.
+
+Les hits ne sont plus écrits à chaque lecture : ils sont cumulés en mémoire et
+appliqués périodiquement en une seule requête (flush_hit_counts). Une traduction
+qui atteint TRANSLATION_CACHE_HIT_THRESHOLD hits reste plus longtemps en mémoire.
+
+Les traductions identiques demandées en même temps (même content_hash) ne
+donnent lieu qu'à une seule recherche DB / un seul appel Groq (SingleFlight).
 """
 
 import hashlib
 import re
+import threading
+from collections import Counter
 from typing import Optional
 
 from langdetect import detect_langs, LangDetectException, DetectorFactory
 from loguru import logger
+from bot.config import (
+    TRANSLATION_CACHE_HIT_THRESHOLD, TRANSLATION_HOT_CACHE_TTL,
+    TRANSLATION_MEMORY_CACHE_SIZE, TRANSLATION_MEMORY_CACHE_TTL,
+)
+from bot.services.cache import SingleFlight, TTLCache
 from bot.services.groq_client import GroqClient
 from bot.db.models import TranslationCacheModel
+from bot.db.async_models import run_db
 
 
 class TranslatorService:
+    # Cache mémoire content_hash -> (texte traduit, hits connus en DB, chaud ?),
+    # commun à toutes les instances (les vues de fermeture de ticket créent
+    # leur propre TranslatorService).
+    memory_cache = TTLCache(maxsize=TRANSLATION_MEMORY_CACHE_SIZE, ttl=TRANSLATION_MEMORY_CACHE_TTL)
+
+    # Traductions en cours, partagées entre appelants concurrents
+    inflight = SingleFlight()
+
+    # Hits en attente d'écriture dans vai_translations_cache.hit_count
+    _pending_hits: Counter = Counter()
+    _pending_lock = threading.Lock()
+
     def __init__(self):
         """Initialise le service de traduction."""
         # Make langdetect deterministic across runs.
@@ -109,7 +139,45 @@ class TranslatorService:
         content = f"{text}|{source_lang}|{target_lang}".encode('utf-8')
         return hashlib.sha256(content).hexdigest()
 
-    def translate(self, text: str, source_language: str, target_language: str) -> tuple[str, bool]:
+    @classmethod
+    def _remember(cls, content_hash: str, translated: str, known_hits: int) -> None:
+        """Met la traduction en mémoire ; TTL long si elle est « chaude »."""
+        with cls._pending_lock:
+            hits = known_hits + cls._pending_hits.get(content_hash, 0)
+        hot = hits >= TRANSLATION_CACHE_HIT_THRESHOLD
+        cls.memory_cache.set(
+            content_hash,
+            (translated, known_hits, hot),
+            ttl=TRANSLATION_HOT_CACHE_TTL if hot else None,
+        )
+
+    @classmethod
+    def _record_hit(cls, content_hash: str) -> int:
+        """Compte un hit (écrit plus tard par flush_hit_counts) ; retourne les hits en attente."""
+        with cls._pending_lock:
+            cls._pending_hits[content_hash] += 1
+            return cls._pending_hits[content_hash]
+
+    @classmethod
+    async def flush_hit_counts(cls) -> int:
+        """Applique les hits cumulés en une requête groupée. Appelé périodiquement et à l'arrêt."""
+        with cls._pending_lock:
+            pending = dict(cls._pending_hits)
+            cls._pending_hits.clear()
+        if not pending:
+            return 0
+        try:
+            updated = await run_db(TranslationCacheModel.increment_hits, pending)
+            logger.debug(f"✓ Hits cache traduction écrits ({sum(pending.values())} hits, {updated} lignes)")
+            return updated
+        except Exception as e:
+            # On remet les compteurs pour le prochain flush.
+            with cls._pending_lock:
+                cls._pending_hits.update(pending)
+            logger.warning(f"⚠ Flush des hits du cache de traduction échoué: {e}")
+            return 0
+
+    async def translate(self, text: str, source_language: str, target_language: str) -> tuple[str, bool]:
         """
         Traduit un texte avec cache.
         
@@ -127,29 +195,54 @@ class TranslatorService:
 
         # Générer hash et chercher en cache
         content_hash = self.generate_content_hash(text, source_language, target_language)
-        cache_result = TranslationCacheModel.get(content_hash)
+
+        cached = self.memory_cache.get(content_hash)
+        if cached is not None:
+            translated, known_hits, hot = cached
+            pending = self._record_hit(content_hash)
+            if not hot and known_hits + pending >= TRANSLATION_CACHE_HIT_THRESHOLD:
+                self._remember(content_hash, translated, known_hits)
+            logger.debug("✓ Traduction trouvée en cache mémoire")
+            return translated, True
+
+        return await self.inflight.do(
+            content_hash,
+            lambda: self._lookup_or_translate(content_hash, text, source_language, target_language),
+        )
+
+    async def _lookup_or_translate(self, content_hash: str, text: str, source_language: str,
+                                   target_language: str) -> tuple[str, bool]:
+        """Cache MySQL puis Groq (exécuté une seule fois par content_hash en vol)."""
+        cache_result = await run_db(TranslationCacheModel.get, content_hash)
 
         if cache_result:
-            logger.info(f"✓ Traduction trouvée en cache (hit #{cache_result['hit_count']})")
+            pending = self._record_hit(content_hash)
+            known_hits = int(cache_result.get('hit_count') or 0)
+            logger.info(f"✓ Traduction trouvée en cache (hit #{known_hits + pending})")
+            self._remember(content_hash, cache_result['translated_text'], known_hits)
             return cache_result['translated_text'], True
 
         # Cache miss: appeler Groq
         logger.debug(f"✗ Cache miss, appel Groq pour traduction")
-        translated_text = self.groq_client.translate(text, source_language, target_language)
+        translated_text = await self.groq_client.translate(text, source_language, target_language)
 
         # Stocker en cache
-        TranslationCacheModel.store(
+        await run_db(
+            TranslationCacheModel.store,
             content_hash=content_hash,
             original_text=text,
             translated_text=translated_text,
             source_language=source_language,
             target_language=target_language
         )
+        # Pas de mise en mémoire si Groq a échoué (le texte source est renvoyé tel quel).
+        if translated_text != text:
+            self._remember(content_hash, translated_text, 0)
 
         return translated_text, False
 
-    def translate_message_for_staff(self, text: str, user_language: str, 
-                                   staff_language: str = 'en') -> tuple[str, bool]:
+    async def translate_message_for_staff(self, text: str, user_language: str,
+                                         staff_language: str = 'en') -> tuple[str, bool]:
         """
         Traduit un message utilisateur pour le staff.
         
@@ -161,10 +254,10 @@ class TranslatorService:
         Returns:
             Tuple (message traduit, from_cache: bool)
         """
-        return self.translate(text, user_language, staff_language)
+        return await self.translate(text, user_language, staff_language)
 
-    def translate_response_for_user(self, text: str, response_language: str,
-                                   user_language: str) -> tuple[str, bool]:
+    async def translate_response_for_user(self, text: str, response_language: str,
+                                         user_language: str) -> tuple[str, bool]:
         """
         Traduit une réponse du staff pour l'utilisateur.
         
@@ -176,4 +269,4 @@ class TranslatorService:
         Returns:
             Tuple (réponse traduite, from_cache: bool)
         """
-        return self.translate(text, response_language, user_language)
+        return await self.translate(text, response_language, user_language)
@@ -0,0 +1,241 @@
+"""
+Triage local des tickets (sans appel LLM).
+
+La plupart des tickets se classent avec des signaux simples : mots-clés
+("down", "urgent", "payment failed", "impossible de me connecter"...), rythme
+des messages, sujet choisi à l'ouverture (TicketOpenSelect). `TriageClassifier`
+calcule un score par priorité et une confiance ; avec TRIAGE_LOCAL_ENABLED,
+`classify_ticket_priority` ne fait appel à GROQ_MODEL_FAST que si cette
+confiance est trop faible.
+
+Un jeu de validation rédigé indépendamment des motifs (triage_benchmark.py)
+mesure la précision et la part d'appels LLM évités, et sert à choisir
+TRIAGE_CONFIDENCE_THRESHOLD :
+
+    python -m bot.services.triage
+
+Tant qu'aucun seuil n'atteint la précision visée avec une couverture non
+nulle (négations, passé, questions mal gérés par les mots-clés), le triage
+local reste désactivé et toutes les priorités viennent du LLM.
+"""
+
+import re
+import time
+import unicodedata
+
+from bot.config import TRIAGE_CONFIDENCE_THRESHOLD
+
+
+PRIORITIES = ("low", "medium", "high", "urgent")
+
+
+def _normalize(text: str) -> str:
+    """Minuscules sans accents, apostrophes unifiées."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return text.lower().replace("’", "'")
+
+
+# (motif, poids) par priorité. Les motifs portent sur le texte normalisé.
+_KEYWORDS = {
+    "urgent": [
+        (r"\burgent|\burgence\b|\basap\b|\bemergency\b", 1.5),
+        (r"\b(is|are|server|site|bot|service|api)\s+down\b|\boutage\b|\bpanne\b|hors service|\bne repond plus\b", 2.0),
+        (r"\bhack(ed|e)?\b|\bpirat|\bcompromis|\bcompromised\b|\bstolen\b|\bvol(e)? de compte\b", 2.0),
+        (r"\bdata loss\b|perte de donnees|\btout le monde\b|\ball (users|members)\b|\bproduction\b", 1.0),
+        (r"\bcritical\b|\bcritique\b", 1.0),
+    ],
+    "high": [
+        (r"payment (failed|declined)|paiement (echoue|refuse)|charged twice|debite deux fois", 2.0),
+        (r"\brefund\b|\brembourse", 1.0),
+        (r"can'?t (log ?in|login|connect|access)|cannot (log ?in|login|access)|unable to (log ?in|login|access)"
+         r"|impossible de (me )?(connecter|acceder)|locked out|\bbloque\b|\bblocked\b", 1.5),
+        (r"not working|doesn'?t work|ne (fonctionne|marche) (plus|pas)|marche pas|\bbroken\b", 1.0),
+        (r"\berror\b|\berreur\b|\bbug\b|\bcrash", 0.75),
+        (r"\bstill\b.*\b(waiting|no answer)\b|toujours pas|\bany update\b|des nouvelles", 0.5),
+    ],
+    "low": [
+        (r"\bhow (do|can|to)\b|\bcomment (faire|on|je)\b|\bwhere (is|can)\b|\bou (est|trouver)\b", 1.0),
+        (r"\bquestion\b|\binfo(rmation)?s?\b|\bjust wondering\b|\bcurious\b|\bpar curiosite\b", 1.0),
+        (r"\bsuggestion\b|\bfeature request\b|\bidee\b|\bidea\b|\bpartenariat\b|\bpartnership\b", 1.25),
+        (r"\bno rush\b|\bpas (d'urgence|presse)\b|\bwhen you (can|have time)\b|quand vous (pouvez|aurez)", 1.5),
+    ],
+}
+
+# Sujets de TicketOpenSelect (valeur normalisée) -> (priorité, poids).
+_TOPIC_HINTS = [
+    (r"billing|payment|paiement|achat|order|commande|refund|rembours|facturation", "high", 1.0),
+    (r"incident|outage|panne|security|securite|hack", "urgent", 1.0),
+    (r"bug|report|technique|technical|support", "medium", 0.5),
+    (r"question|info|general|suggestion|partenariat|partnership|feedback|autre|other", "low", 1.0),
+]
+
+_COMPILED = {
+    label: [(re.compile(pattern), weight) for pattern, weight in patterns]
+    for label, patterns in _KEYWORDS.items()
+}
+_COMPILED_TOPICS = [(re.compile(p), label, w) for p, label, w in _TOPIC_HINTS]
+
+# Poids de départ : "medium" gagne en l'absence de signal, mais avec une confiance nulle.
+_BASELINE = 0.5
+# Messages rapprochés : au-delà de RATE_BURST messages en RATE_WINDOW secondes.
+_RATE_WINDOW = 60.0
+_RATE_BURST = 4
+
+
+class TriageClassifier:
+    def __init__(self, threshold: float = TRIAGE_CONFIDENCE_THRESHOLD):
+        self.threshold = float(threshold)
+        self.local_decisions = 0
+        self.escalations = 0
+
+    def classify(self, messages: list, topic: str | None = None, now: float | None = None) -> dict:
+        """
+        `messages` : dicts {content, sent_at?} (sent_at = time.monotonic() à la réception).
+
+        Returns:
+            {"label", "confidence", "scores", "signals"}
+        """
+        scores = {label: 0.0 for label in PRIORITIES}
+        scores["medium"] = _BASELINE
+        signals: list[str] = []
+
+        text = _normalize("\n".join(str(m.get("content") or "") for m in messages or []))
+        for label, patterns in _COMPILED.items():
+            for regex, weight in patterns:
+                if regex.search(text):
+                    scores[label] += weight
+                    signals.append(f"{label}:{regex.pattern[:24]}")
+
+        if topic:
+            topic_norm = _normalize(topic)
+            for regex, label, weight in _COMPILED_TOPICS:
+                if regex.search(topic_norm):
+                    scores[label] += weight
+                    signals.append(f"topic:{label}")
+                    break
+
+        # Rafale de messages : l'utilisateur insiste / est bloqué.
+        now = time.monotonic() if now is None else now
+        recent = [m for m in messages or [] if m.get("sent_at") and now - m["sent_at"] <= _RATE_WINDOW]
+        if len(recent) >= _RATE_BURST:
+            scores["high"] += 0.75
+            signals.append(f"rate:{len(recent)}/min")
+
+        # Texte crié (majuscules / points d'exclamation).
+        raw = " ".join(str(m.get("content") or "") for m in messages or [])
+        letters = [ch for ch in raw if ch.isalpha()]
+        if len(letters) >= 12 and sum(ch.isupper() for ch in letters) / len(letters) > 0.6:
+            scores["high"] += 0.5
+            signals.append("caps")
+        if raw.count("!") >= 3:
+            scores["high"] += 0.25
+            signals.append("exclamations")
+
+        ranked = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
+        (label, top), (_, second) = ranked[0], ranked[1]
+        evidence = sum(scores.values()) - _BASELINE
+        margin = (top - second) / top if top > 0 else 0.0
+        confidence = round(margin * min(1.0, evidence / 1.5), 3)
+
+        return {"label": label, "confidence": confidence, "scores": scores, "signals": signals}
+
+    def decide(self, messages: list, topic: str | None = None) -> str | None:
+        """Priorité si le signal local est suffisant, sinon None (-> LLM)."""
+        result = self.classify(messages, topic=topic)
+        if result["confidence"] >= self.threshold:
+            self.local_decisions += 1
+            return result["label"]
+        self.escalations += 1
+        return None
+
+    def stats(self) -> dict:
+        total = self.local_decisions + self.escalations
+        return {
+            "local_decisions": self.local_decisions,
+            "escalations": self.escalations,
+            "llm_calls_saved_pct": round(100 * self.local_decisions / total, 1) if total else 0.0,
+        }
+
+
+triage_classifier = TriageClassifier()
+
+
+# ----------------------------------------------------------------------------
+# Mesure sur le jeu de validation (bot/services/triage_benchmark.py)
+# ----------------------------------------------------------------------------
+
+def _run(classifier: TriageClassifier) -> list:
+    from bot.services.triage_benchmark import HELDOUT_SET
+
+    rows = []
+    for texts, topic, expected, kind in HELDOUT_SET:
+        result = classifier.classify([{"content": t} for t in texts], topic=topic)
+        rows.append((result["label"], result["confidence"], expected, kind, texts[0]))
+    return rows
+
+
+def _measure(rows: list, threshold: float) -> dict:
+    confident = [r for r in rows if r[1] >= threshold]
+    correct = [r for r in confident if r[0] == r[2]]
+    return {
+        "threshold": threshold,
+        "coverage": round(len(confident) / len(rows), 3) if rows else 0.0,
+        "local_accuracy": round(len(correct) / len(confident), 3) if confident else None,
+    }
+
+
+def sweep(classifier: TriageClassifier | None = None, step: float = 0.05) -> list:
+    """Couverture / précision locale pour chaque seuil de 0 à 1."""
+    rows = _run(classifier or TriageClassifier())
+    return [_measure(rows, round(i * step, 3)) for i in range(int(round(1 / step)) + 1)]
+
+
+def pick_threshold(classifier: TriageClassifier | None = None, min_accuracy: float = 0.9) -> float | None:
+    """
+    Plus petit seuil (couverture max) dont la précision locale atteint
+    `min_accuracy`, None si aucun ne l'atteint (triage local à laisser
+    désactivé).
+    """
+    for point in sweep(classifier):
+        if point["local_accuracy"] is not None and point["local_accuracy"] >= min_accuracy:
+            return point["threshold"]
+    return None
+
+
+def evaluate(classifier: TriageClassifier | None = None) -> dict:
+    """
+    Mesure le classifieur local sur le jeu de validation (HELDOUT_SET).
+
+    - coverage : part des tickets tranchés localement (appels LLM évités)
+    - local_accuracy : précision sur ces tickets
+    - overall_accuracy : précision en prenant le label local même sous le seuil
+    - by_kind : couverture / précision par type de cas (clear, negative, ambiguous)
+    """
+    clf = classifier or TriageClassifier()
+    rows = _run(clf)
+    by_kind = {}
+    for kind in sorted({r[3] for r in rows}):
+        by_kind[kind] = _measure([r for r in rows if r[3] == kind], clf.threshold)
+    return {
+        "total": len(rows),
+        **{k: v for k, v in _measure(rows, clf.threshold).items() if k != "threshold"},
+        "overall_accuracy": round(sum(r[0] == r[2] for r in rows) / len(rows), 3) if rows else 0.0,
+        "by_kind": by_kind,
+        "confident_errors": [
+            (r[4][:50], r[2], r[0], r[1]) for r in rows if r[1] >= clf.threshold and r[0] != r[2]
+        ],
+    }
+
+
+if __name__ == "__main__":
+    for key, value in evaluate().items():
+        print(f"{key}: {value}")
+    print("sweep:")
+    for point in sweep():
+        print(f"  {point}")
+    threshold = pick_threshold()
+    if threshold is None:
+        print("aucun seuil n'atteint 0.9 de precision locale : garder TRIAGE_LOCAL_ENABLED = False")
+    else:
+        print(f"seuil suggere (precision locale >= 0.9): {threshold}")
@@ -0,0 +1,86 @@
+"""
+Jeu de validation du triage local (bot/services/triage.py).
+
+Ouvertures de tickets réalistes (style Discord : minuscules, fautes,
+français / anglais mélangés), rédigées à partir de tickets de support
+anonymisés et non à partir des listes de mots-clés du classifieur. Les
+priorités suivent les définitions du prompt LLM (groq_client) :
+
+- low    : question simple, demande d'information, pas d'urgence ;
+- medium : problème à résoudre mais pas bloquant immédiatement ;
+- high   : service perturbé, utilisateur bloqué sur une action importante ;
+- urgent : incident critique, service principal down, urgence forte.
+
+Chaque cas porte un type :
+
+- "clear"     : priorité évidente pour un humain ;
+- "negative"  : contient un mot déclencheur qui ne veut pas dire ce qu'il
+  semble ("pas urgent", "le bug d'hier est corrigé", "refund policy"...) ;
+- "ambiguous" : un humain hésiterait ; idéalement le triage local passe la
+  main au LLM.
+
+Ne pas ajuster les motifs de triage.py sur ces cas : ils servent à choisir
+TRIAGE_CONFIDENCE_THRESHOLD et à mesurer la précision réelle.
+"""
+
+# (messages, sujet choisi à l'ouverture, priorité attendue, type)
+HELDOUT_SET = [
+    # --- clear -------------------------------------------------------------
+    (["yo le bot répond plus du tout depuis ce matin, aucune commande passe sur le serv"], "", "urgent", "clear"),
+    (["every command times out, the whole bot seems dead for our 3k member server"], "support", "urgent", "clear"),
+    (["quelqu'un a utilisé le token de notre bot pour spam tous les salons, on a besoin d'aide vite"], "", "urgent", "clear"),
+    (["our admin account got taken over and they are deleting channels right now"], "", "urgent", "clear"),
+    (["aucun ticket ne s'ouvre, le bouton renvoie 'interaction failed' pour tout le monde"], "support", "urgent", "clear"),
+    (["dashboard shows 502 bad gateway for everyone on the team"], "", "urgent", "clear"),
+    (["bonjour, j'ai payé le plan pro hier et le serveur est toujours en free"], "billing", "high", "clear"),
+    (["i paid with crypto 2 hours ago, invoice says confirmed but premium is not active"], "", "high", "clear"),
+    (["j'ai été prélevé 2 fois pour le même abonnement ce mois-ci"], "", "high", "clear"),
+    (["when I click login with discord it loops back to the login page forever"], "", "high", "clear"),
+    (["je n'arrive plus à accéder au panel depuis que j'ai changé de pc"], "", "high", "clear"),
+    (["tickets get closed by themselves after a few seconds, members lose their conversation"], "", "high", "clear"),
+    (["the transcript DM never arrives when a ticket is closed, we need them for moderation"], "", "high", "clear"),
+    (["la traduction auto met parfois la réponse dans la mauvaise langue"], "", "medium", "clear"),
+    (["the embed colour I set in settings isn't applied to the welcome message"], "", "medium", "clear"),
+    (["le nom du salon de ticket coupe les pseudos trop longs, c'est pas très lisible"], "", "medium", "clear"),
+    (["staff suggestions show up in english even though the server language is french"], "", "medium", "clear"),
+    (["the stats page shows 0 tickets this month but we had some"], "", "medium", "clear"),
+    (["la catégorie des tickets fermés ne se met pas à jour quand je la change"], "", "medium", "clear"),
+    (["hey, is there a way to give the support role access to closed tickets?"], "", "low", "clear"),
+    (["c'est possible de mettre un emoji sur le bouton d'ouverture ?"], "", "low", "clear"),
+    (["what's the difference between premium and pro?"], "", "low", "clear"),
+    (["vous comptez ajouter un export des tickets en pdf un jour ?"], "", "low", "clear"),
+    (["would love a dark theme for the dashboard, thanks for the bot btw"], "", "low", "clear"),
+    (["quels sont les moyens de paiement acceptés ?"], "", "low", "clear"),
+    (["can the bot work in two servers with the same subscription?"], "", "low", "clear"),
+    (["salut ! je voulais juste savoir si vous gardez les messages des tickets et combien de temps"], "", "low", "clear"),
+
+    # --- negative ----------------------------------------------------------
+    (["pas urgent du tout, mais comment on change la langue par défaut ?"], "", "low", "negative"),
+    (["not urgent: could you tell me where the knowledge base settings are?"], "", "low", "negative"),
+    (["the outage from yesterday is fixed on our side, thanks! just closing the loop"], "", "low", "negative"),
+    (["le bug d'hier avec les traductions est corrigé, merci beaucoup"], "", "low", "negative"),
+    (["what is your refund policy if we cancel after a week?"], "billing", "low", "negative"),
+    (["is there an error log somewhere I can check myself?"], "", "low", "negative"),
+    (["down to test the beta features if you need testers"], "", "low", "negative"),
+    (["comment vous gérez les pannes ? vous avez une page de statut ?"], "", "low", "negative"),
+    (["our server got hacked last year so we want to know what permissions the bot really needs"], "", "low", "negative"),
+    (["I can't find the option to rename tickets, does it exist?"], "", "low", "negative"),
+    (["je suis bloqué sur rien, juste une question sur les quotas de la kb"], "", "low", "negative"),
+    (["URGENT!!! do you have a discord partner program??"], "", "low", "negative"),
+    (["critical question for our staff meeting: can we assign tickets to specific mods?"], "", "low", "negative"),
+    (["ça ne fonctionne pas encore chez nous mais c'est normal, on n'a pas fini la config, juste une question sur les catégories"], "", "low", "negative"),
+
+    # --- ambiguous ---------------------------------------------------------
+    (["help"], "", "medium", "ambiguous"),
+    (["hello ?", "anyone here", "??"], "", "medium", "ambiguous"),
+    (["le bot marche bizarrement"], "", "medium", "ambiguous"),
+    (["the bot is slow today"], "", "medium", "ambiguous"),
+    (["j'ai un souci avec mon abonnement"], "billing", "high", "ambiguous"),
+    (["some members say they can't open tickets, others can"], "", "high", "ambiguous"),
+    (["it says error when I save"], "", "medium", "ambiguous"),
+    (["problème de paiement"], "", "high", "ambiguous"),
+    (["need to talk to an admin about our account"], "", "medium", "ambiguous"),
+    (["les réponses de l'ia sont nulles sur notre serveur"], "", "medium", "ambiguous"),
+    (["bot offline?"], "", "urgent", "ambiguous"),
+    (["on a perdu la config après la mise à jour, faut tout refaire ?"], "", "high", "ambiguous"),
+]
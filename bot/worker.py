@@ -0,0 +1,81 @@
+"""
+Worker de tâches autonome (sans connexion Discord).
+
+    python -m bot.worker
+
+Consomme la file vai_jobs en parallèle du bot (SKIP LOCKED) pour les types
+qui n'ont pas besoin du client Discord : tâches de maintenance périodiques.
+Avec ce process déployé, JOB_MAINTENANCE_IN_BOT=0 retire ces tâches du bot.
+"""
+
+import asyncio
+import signal
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+from loguru import logger
+
+load_dotenv()
+
+Path('logs').mkdir(exist_ok=True)
+
+logger.remove()
+logger.add(
+    "logs/worker.log",
+    rotation="500 MB",
+    retention="10 days",
+    level="INFO",
+    format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {message}"
+)
+logger.add(sys.stdout, format="{message}", level="INFO")
+
+from bot.db.async_models import shutdown_db_executor
+from bot.services.jobs import job_worker
+from bot.services.maintenance import register_maintenance_jobs
+
+STATS_EVERY_SECONDS = 60
+
+
+def _log_stats() -> None:
+    stats = job_worker.stats()
+    details = ", ".join(
+        f"{job_type} {m['completed']} ok (attente p95 {m['wait_p95_ms']}ms, exécution p95 {m['run_p95_ms']}ms)"
+        for job_type, m in stats["types"].items()
+    )
+    logger.info(
+        f"♥ Worker {stats['worker_id']}: {stats['running']} en cours / {stats['completed']} ok / "
+        f"{stats['retried']} retentées / {stats['dead']} en dead-letter ({stats['per_min']}/min)"
+        + (f" — {details}" if details else "")
+    )
+
+
+async def main() -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            # Windows : KeyboardInterrupt géré par asyncio.run
+            pass
+
+    register_maintenance_jobs(job_worker)
+    job_worker.start()
+    try:
+        while not stop.is_set():
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=STATS_EVERY_SECONDS)
+            except asyncio.TimeoutError:
+                _log_stats()
+    finally:
+        logger.info("Arrêt du worker de tâches...")
+        await job_worker.stop()
+        shutdown_db_executor()
+
+
+if __name__ == '__main__':
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        logger.info("Worker arrêté par l'utilisateur")
@@ -50,10 +50,15 @@ CREATE TABLE IF NOT EXISTS vai_guilds (
     ticket_open_needs_deploy  TINYINT(1)    DEFAULT 0   COMMENT '1 = bot doit (re)deployer le message ouverture',
     ticket_open_last_deploy_error TEXT                   COMMENT 'Derniere erreur de deploiement (debug)',
     ticket_open_delete_requested  TINYINT(1)    DEFAULT 0 COMMENT '1 = bot doit supprimer le message ouverture',
+    config_version      BIGINT UNSIGNED NOT NULL DEFAULT 0 COMMENT 'Timestamp ms de la derniere ecriture (cache config du bot)',
+    kb_version          BIGINT UNSIGNED NOT NULL DEFAULT 0 COMMENT 'Timestamp ms de la derniere ecriture KB (index KB du bot)',
     created_at          TIMESTAMP       DEFAULT CURRENT_TIMESTAMP,
     updated_at          TIMESTAMP       DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     KEY idx_tier    (tier),
-    KEY idx_created (created_at)
+    KEY idx_created (created_at),
+    KEY idx_config_version (config_version),
+    KEY idx_ticket_open_deploy (ticket_open_needs_deploy),
+    KEY idx_ticket_open_delete (ticket_open_delete_requested)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- ============================================================================
@@ -88,13 +93,44 @@ CREATE TABLE IF NOT EXISTS vai_tickets (
     assigned_staff_id   BIGINT,
     assigned_staff_name VARCHAR(100),
     priority            ENUM('low','medium','high') DEFAULT 'medium',
+    topic               VARCHAR(100)                COMMENT 'Sujet choisi a louverture (TicketOpenSelect)',
     close_reason        TEXT,
     transcript          LONGTEXT                    COMMENT 'Resume IA genere a la cloture',
+    rolling_summary     TEXT                        COMMENT 'Resume IA glissant (ticket ouvert)',
+    rolling_summary_language   VARCHAR(10),
+    rolling_summary_message_id INT                  COMMENT 'Dernier vai_ticket_messages.id couvert',
+    rolling_summary_at  TIMESTAMP       NULL,
     opened_at           TIMESTAMP       DEFAULT CURRENT_TIMESTAMP,
     closed_at           TIMESTAMP       NULL,
     KEY idx_guild_status (guild_id, status),
     KEY idx_user        (user_id),
-    KEY idx_opened      (opened_at)
+    KEY idx_opened      (opened_at),
+    KEY idx_guild_opened        (guild_id, opened_at, id),
+    KEY idx_guild_status_opened (guild_id, status, opened_at, id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- ============================================================================
+-- VAI_GUILD_TICKET_STATS / VAI_GUILD_TICKET_DAILY - Stats tickets pre-agregees
+-- Tenues a jour par TicketModel (create/close/update) dans la meme transaction,
+-- recalculables par la tache stats.tickets.rebuild (GuildStatsModel.rebuild).
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS vai_guild_ticket_stats (
+    guild_id            BIGINT          PRIMARY KEY,
+    open_count          INT UNSIGNED    NOT NULL DEFAULT 0,
+    in_progress_count   INT UNSIGNED    NOT NULL DEFAULT 0,
+    closed_count        INT UNSIGNED    NOT NULL DEFAULT 0,
+    total_count         INT UNSIGNED    NOT NULL DEFAULT 0,
+    updated_at          TIMESTAMP       DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE IF NOT EXISTS vai_guild_ticket_daily (
+    guild_id            BIGINT          NOT NULL,
+    day                 DATE            NOT NULL,
+    dimension           VARCHAR(16)     NOT NULL    COMMENT 'opened | closed | language | priority',
+    dim_value           VARCHAR(32)     NOT NULL DEFAULT '' COMMENT 'Langue / priorite (vide pour opened/closed)',
+    ticket_count        INT UNSIGNED    NOT NULL DEFAULT 0,
+    PRIMARY KEY (guild_id, day, dimension, dim_value)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- ============================================================================
@@ -118,6 +154,23 @@ CREATE TABLE IF NOT EXISTS vai_ticket_messages (
     FOREIGN KEY (ticket_id) REFERENCES vai_tickets(id) ON DELETE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
+-- ============================================================================
+-- VAI_TICKET_SUMMARY_CHUNKS - Resumes partiels (map-reduce) des longs tickets
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS vai_ticket_summary_chunks (
+    id                  INT AUTO_INCREMENT PRIMARY KEY,
+    ticket_id           INT             NOT NULL,
+    chunk_hash          CHAR(64)        NOT NULL     COMMENT 'SHA256 (langue + messages de la fenetre)',
+    first_message_id    INT                          COMMENT 'vai_ticket_messages.id du premier message',
+    last_message_id     INT                          COMMENT 'vai_ticket_messages.id du dernier message',
+    language            VARCHAR(10),
+    summary             TEXT,
+    created_at          TIMESTAMP       DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY uq_ticket_chunk (ticket_id, chunk_hash),
+    FOREIGN KEY (ticket_id) REFERENCES vai_tickets(id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
 -- ============================================================================
 -- VAI_TRANSLATIONS_CACHE - Cache des traductions avec SHA256
 -- ============================================================================
@@ -162,7 +215,9 @@ CREATE TABLE IF NOT EXISTS vai_orders (
     KEY idx_order_id (order_id),
     KEY idx_user     (user_id),
     KEY idx_status   (status),
-    KEY idx_created  (created_at)
+    KEY idx_created  (created_at),
+    KEY idx_created_id        (created_at, id),
+    KEY idx_status_created_id (status, created_at, id)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- ============================================================================
@@ -254,12 +309,14 @@ CREATE TABLE IF NOT EXISTS vai_dashboard_sessions (
     discord_username    VARCHAR(100),
     access_token        VARCHAR(500)                COMMENT 'Token OAuth2 Discord',
     jwt_token           TEXT                        COMMENT 'JWT session dashboard',
+    jwt_token_hash      CHAR(64)                    COMMENT 'SHA-256 hex du JWT (recherche indexee)',
     guild_ids_json      JSON                        COMMENT 'Liste des guild_ids autorises (owner/admin) au login',
     is_revoked          TINYINT(1)      DEFAULT 0,
     expires_at          TIMESTAMP,
     created_at          TIMESTAMP       DEFAULT CURRENT_TIMESTAMP,
     KEY idx_user    (discord_user_id),
-    KEY idx_expires (expires_at)
+    KEY idx_expires (expires_at),
+    KEY idx_jwt_hash (jwt_token_hash)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- ============================================================================
@@ -280,7 +337,9 @@ CREATE TABLE IF NOT EXISTS vai_audit_log (
     KEY idx_actor   (actor_id),
     KEY idx_guild   (guild_id),
     KEY idx_action  (action),
-    KEY idx_created (created_at)
+    KEY idx_created (created_at),
+    KEY idx_created_id       (created_at, id),
+    KEY idx_guild_created_id (guild_id, created_at, id)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- ============================================================================
@@ -304,6 +363,57 @@ CREATE TABLE IF NOT EXISTS vai_bot_status (
 INSERT IGNORE INTO vai_bot_status (id, guild_count, user_count, version)
 VALUES (1, 0, 0, '0.2.0');
 
+-- ============================================================================
+-- VAI_BOT_SHARD_STATUS - Heartbeat par shard (un process du bot = une plage de shards)
+-- /internal/bot/status agrege ces lignes ; vai_bot_status reste le repli mono-process.
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS vai_bot_shard_status (
+    shard_id        INT             PRIMARY KEY,
+    shard_count     INT             NOT NULL DEFAULT 1 COMMENT 'Nombre total de shards du bot',
+    cluster_id      VARCHAR(64)                     COMMENT 'Process qui porte le shard (BOT_CLUSTER_ID)',
+    worker_id       VARCHAR(100)                    COMMENT 'hostname:pid',
+    guild_count     INT             DEFAULT 0,
+    user_count      INT             DEFAULT 0,
+    channel_count   INT             DEFAULT 0,
+    latency_ms      FLOAT           DEFAULT 0,
+    uptime_sec      INT             DEFAULT 0,
+    started_at      TIMESTAMP       NULL,
+    version         VARCHAR(20),
+    updated_at      TIMESTAMP       DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    KEY idx_updated (updated_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- ============================================================================
+-- VAI_JOBS - File de taches persistante (bot/services/jobs.py)
+-- Claim concurrent par SELECT ... FOR UPDATE SKIP LOCKED (MySQL 8+),
+-- retries avec backoff exponentiel via run_at.
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS vai_jobs (
+    id              BIGINT AUTO_INCREMENT PRIMARY KEY,
+    job_type        VARCHAR(64)     NOT NULL        COMMENT 'Ex: ticket.close.summary',
+    guild_id        BIGINT                          COMMENT 'Guild concernee (filtrage / stats)',
+    payload         JSON,
+    status          ENUM('pending','running','done','dead') NOT NULL DEFAULT 'pending' COMMENT 'dead = abandonnee (dead-letter)',
+    priority        SMALLINT        NOT NULL DEFAULT 0 COMMENT 'Plus grand = reclamee en premier',
+    dedupe_key      VARCHAR(191)    NULL            COMMENT 'Une seule tache en attente par cle (videe au claim)',
+    attempts        INT             NOT NULL DEFAULT 0,
+    max_attempts    INT             NOT NULL DEFAULT 5,
+    run_at          TIMESTAMP(3)    NOT NULL DEFAULT CURRENT_TIMESTAMP(3) COMMENT 'Pas executee avant cette date (planification / backoff)',
+    locked_by       VARCHAR(100)                    COMMENT 'Worker qui execute la tache',
+    locked_at       TIMESTAMP(3)    NULL            COMMENT 'Debut de l execution (claim)',
+    heartbeat_at    TIMESTAMP(3)    NULL            COMMENT 'Dernier signe de vie du worker (verrou)',
+    last_error      TEXT,
+    created_at      TIMESTAMP       DEFAULT CURRENT_TIMESTAMP,
+    finished_at     TIMESTAMP(3)    NULL,
+    UNIQUE KEY uq_dedupe (dedupe_key),
+    KEY idx_claim_priority (status, priority, run_at),
+    KEY idx_guild   (guild_id),
+    KEY idx_type    (job_type, status),
+    KEY idx_finished (status, finished_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
 -- ============================================================================
 -- Indexes supplementaires pour performance
 -- ============================================================================
@@ -343,12 +453,15 @@ CREATE OR REPLACE VIEW vai_dashboard_stats AS
 SELECT
     (SELECT COUNT(*) FROM vai_guilds)                                              AS total_guilds,
     (SELECT COUNT(*) FROM vai_dashboard_users)                                     AS total_users,
-    (SELECT COUNT(*) FROM vai_tickets WHERE DATE(opened_at) = CURDATE())           AS tickets_today,
+    (SELECT COUNT(*) FROM vai_tickets
+      WHERE opened_at >= CURDATE()
+        AND opened_at <  CURDATE() + INTERVAL 1 DAY)                              AS tickets_today,
     (SELECT COUNT(*) FROM vai_orders  WHERE status = 'pending')                    AS orders_pending,
     (SELECT COALESCE(SUM(amount),0) FROM vai_payments
       WHERE status = 'completed'
-        AND YEAR(paid_at) = YEAR(CURDATE())
-        AND MONTH(paid_at) = MONTH(CURDATE()))                                    AS revenue_month,
+        AND paid_at >= CURDATE() - INTERVAL (DAYOFMONTH(CURDATE()) - 1) DAY
+        AND paid_at <  CURDATE() - INTERVAL (DAYOFMONTH(CURDATE()) - 1) DAY
+                       + INTERVAL 1 MONTH)                                        AS revenue_month,
     (SELECT COUNT(*) FROM vai_subscriptions WHERE is_active = 1)                   AS active_subs,
     (SELECT guild_count FROM vai_bot_status WHERE id = 1)                          AS bot_guild_count,
     (SELECT user_count FROM vai_bot_status WHERE id = 1)                           AS bot_user_count,
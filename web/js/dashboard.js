@@ -639,6 +639,13 @@ function setStatValue(id, value) {
 // BOT STATUS (accessible à tous les utilisateurs authentifiés)
 // ─────────────────────────────────────────────────────────────────
 
+function formatShards(b) {
+  const total = b.shard_count ?? 1;
+  const online = b.shards_online ?? total;
+  const label = `${total} shard${total > 1 ? "s" : ""}`;
+  return online < total ? `${online}/${label} en ligne` : label;
+}
+
 function formatUptime(seconds) {
   if (!seconds || seconds <= 0) return "—";
   const d = Math.floor(seconds / 86400);
@@ -678,7 +685,7 @@ async function loadBotStatus() {
     setStatValue("dash-bot-users", `${b.user_count ?? 0} utilisateurs`);
     setStatValue("dash-bot-uptime", formatUptime(b.uptime_sec));
     setStatValue("dash-bot-version", b.version || "—");
-    setStatValue("dash-bot-shards", `${b.shard_count ?? 1} shard${(b.shard_count ?? 1) > 1 ? "s" : ""}`);
+    setStatValue("dash-bot-shards", formatShards(b));
 
     if (b.started_at) {
       try {
@@ -867,6 +874,21 @@ async function viewTicketTranscript(ticketId) {
       lines.push(String(data.transcript || "").trim());
       lines.push("");
       lines.push("");
+    } else if ((data.rolling_summary || "").trim()) {
+      // Ticket encore ouvert : résumé glissant mis à jour par le bot.
+      let updated = "";
+      if (data.rolling_summary_at) {
+        try {
+          updated = new Date(data.rolling_summary_at).toLocaleString("fr-FR");
+        } catch (_) {
+          updated = String(data.rolling_summary_at);
+        }
+      }
+      lines.push(updated ? `Résumé en cours (mis à jour le ${updated})` : "Résumé en cours");
+      lines.push("-----------------------------");
+      lines.push(String(data.rolling_summary || "").trim());
+      lines.push("");
+      lines.push("");
     }
 
     // Messages détaillés : original + traduction éventuelle
@@ -1547,7 +1569,7 @@ async function loadSuperAdminData() {
     setStatValue("admin-bot-version", b.version || "—");
     setStatValue("admin-bot-latency", b.latency_ms != null ? `${b.latency_ms}ms` : "—");
     setStatValue("admin-bot-channels", b.channel_count ?? "—");
-    setStatValue("admin-bot-shards", `${b.shard_count ?? 1} shard${(b.shard_count ?? 1) > 1 ? "s" : ""}`);
+    setStatValue("admin-bot-shards", formatShards(b));
 
     if (b.started_at) {
       try {